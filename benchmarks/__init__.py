@@ -0,0 +1,16 @@
+"""
+Benchmarks
+==========
+
+Benchmark scripts to measure chalumo performances. They are not part of the package
+and are not run from the test suite.
+
+Each benchmark module can be run as a script from the repository root, for example: ::
+
+    python -m benchmarks.scanner
+
+Module ``benchmarks.harness`` runs every benchmark on a synthetic corpus built by
+``benchmarks.corpus`` and saves results as JSON to compare them across versions.
+Module ``benchmarks.memory`` measures memory peaks on corpora of increasing sizes.
+
+"""
@@ -0,0 +1,246 @@
+"""
+Corpus generator
+================
+
+Generate a deterministic corpus of synthetic templates: ::
+
+    python -m benchmarks.corpus /tmp/corpus --files 200 --size 20000
+
+The same options and seed always generate the same corpus. Each file has its own
+seed derived from the corpus seed and its index, so adding files does not change the
+previous ones.
+
+Options are:
+
+files
+    Number of files, stored in sub directories of 50 files.
+size
+    Approximative size of each file in bytes.
+attribute_density
+    Ratio of lines which have an element with a class attribute.
+class_length
+    Average number of classes in an attribute.
+duplicate_ratio
+    Ratio of attributes which contain a duplicate class.
+whitespace_ratio
+    Ratio of attributes which contain invalid whitespaces.
+tag_density
+    Ratio of lines and attributes which contain Django template tags.
+"""
+import argparse
+import random
+from pathlib import Path
+
+
+DEFAULT_OPTIONS = {
+    "files": 100,
+    "size": 20000,
+    "attribute_density": 0.5,
+    "class_length": 4,
+    "duplicate_ratio": 0.1,
+    "whitespace_ratio": 0.1,
+    "tag_density": 0.1,
+    "seed": 42,
+}
+
+FILES_PER_DIRECTORY = 50
+
+ELEMENTS = ["div", "p", "span", "a", "li", "section", "button"]
+
+CLASSES = [
+    "container", "row", "col", "item", "active", "disabled", "btn", "btn-primary",
+    "card", "card-body", "title", "text-muted", "list", "list-item", "nav",
+    "nav-link", "header", "footer", "content", "wrapper",
+] + ["col-md-{}".format(i) for i in range(1, 13)] + [
+    "utility-{}".format(i) for i in range(100)
+]
+
+TEXTS = [
+    "Lorem ipsum dolor sit amet.",
+    "Consectetur adipiscing elit.",
+    "Sed do eiusmod tempor.",
+]
+
+ATTRIBUTE_TAGS = [
+    "{% if active %}active{% endif %}",
+    "{{ item.css_class }}",
+    '{% cycle "odd" "even" %}',
+]
+
+LINE_TAGS = [
+    "{% if user.is_authenticated %}",
+    "{% endif %}",
+    "{{ object.title }}",
+    '{% url "home" %}',
+    "{# A comment #}",
+]
+
+
+def build_attribute(randomizer, options):
+    """
+    Build a class attribute value.
+
+    Arguments:
+        randomizer (random.Random): Random generator.
+        options (dict): Corpus options.
+
+    Returns:
+        string: Attribute value.
+    """
+    length = max(1, randomizer.randint(1, options["class_length"] * 2 - 1))
+    items = randomizer.sample(CLASSES, min(length, len(CLASSES)))
+
+    if randomizer.random() < options["duplicate_ratio"]:
+        items.insert(randomizer.randint(0, len(items)), randomizer.choice(items))
+
+    if randomizer.random() < options["tag_density"]:
+        tag = randomizer.choice(ATTRIBUTE_TAGS)
+        items.insert(randomizer.randint(0, len(items)), tag)
+
+    if randomizer.random() < options["whitespace_ratio"]:
+        separators = [randomizer.choice([" ", "  ", "\t", " \n "]) for item in items]
+        return " " + "".join([
+            item + separator for item, separator in zip(items, separators)
+        ])
+
+    return " ".join(items)
+
+
+def build_line(randomizer, options):
+    """
+    Build a template line.
+
+    Arguments:
+        randomizer (random.Random): Random generator.
+        options (dict): Corpus options.
+
+    Returns:
+        string: Template line with its line break.
+    """
+    text = randomizer.choice(TEXTS)
+
+    if randomizer.random() < options["tag_density"]:
+        text = randomizer.choice(LINE_TAGS) + " " + text
+
+    if randomizer.random() < options["attribute_density"]:
+        element = randomizer.choice(ELEMENTS)
+        return '<{0} class="{1}">{2}</{0}>\n'.format(
+            element, build_attribute(randomizer, options), text
+        )
+
+    return "<p>{}</p>\n".format(text)
+
+
+def build_source(seed, options):
+    """
+    Build a template content.
+
+    Arguments:
+        seed (integer): Seed of random generator for this template.
+        options (dict): Corpus options.
+
+    Returns:
+        string: Template content of about ``size`` characters.
+    """
+    randomizer = random.Random(seed)
+    lines = []
+    length = 0
+
+    while length < options["size"]:
+        line = build_line(randomizer, options)
+        lines.append(line)
+        length += len(line)
+
+    return "".join(lines)
+
+
+def get_options(**kwargs):
+    """
+    Return corpus options completed with default values.
+
+    Keyword Arguments:
+        **kwargs: Options to change from ``DEFAULT_OPTIONS``.
+
+    Returns:
+        dict: Corpus options.
+    """
+    unknown = set(kwargs).difference(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError("Unknown corpus options: {}".format(", ".join(unknown)))
+
+    options = dict(DEFAULT_OPTIONS)
+    options.update(kwargs)
+
+    return options
+
+
+def iter_sources(options):
+    """
+    Iterate over corpus sources without writing them.
+
+    Arguments:
+        options (dict): Corpus options.
+
+    Yields:
+        tuple: Relative file path (``pathlib.Path``) and template content.
+    """
+    for index in range(options["files"]):
+        path = Path("dir_{:03d}".format(index // FILES_PER_DIRECTORY)) / (
+            "template_{:05d}.html".format(index)
+        )
+        yield path, build_source(options["seed"] * 1000003 + index, options)
+
+
+def generate_corpus(destination, options):
+    """
+    Write corpus sources in a directory.
+
+    Arguments:
+        destination (pathlib.Path): Directory where to write sources.
+        options (dict): Corpus options.
+
+    Returns:
+        list: Written file paths.
+    """
+    paths = []
+
+    for path, source in iter_sources(options):
+        path = destination / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+        paths.append(path)
+
+    return paths
+
+
+def add_arguments(parser):
+    """
+    Add corpus options to an argument parser.
+
+    Arguments:
+        parser (argparse.ArgumentParser): Parser to add arguments to.
+    """
+    for name, value in DEFAULT_OPTIONS.items():
+        parser.add_argument(
+            "--{}".format(name.replace("_", "-")),
+            dest=name,
+            type=type(value),
+            default=value,
+            help="Default to {}.".format(value),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("destination", type=Path, help="Directory to write to.")
+    add_arguments(parser)
+    args = vars(parser.parse_args())
+
+    destination = args.pop("destination")
+    paths = generate_corpus(destination, get_options(**args))
+
+    print("Generated {} files in {}".format(len(paths), destination))
+
+
+if __name__ == "__main__":
+    main()
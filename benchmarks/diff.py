@@ -0,0 +1,115 @@
+"""
+Diff benchmarks
+===============
+
+Compare diff engines on large templates: ::
+
+    python -m benchmarks.diff
+
+Cases are:
+
+repeated
+    A template made of a few repeated lines with a dirty attribute every ten lines.
+    The difflib engine ignores these popular lines to align contents.
+sparse
+    A template of distinct lines with only a few dirty attributes. This is the worst
+    case for the difflib engine which has to compare every line.
+
+Each template is about 5 MB by default, this can be changed with ``--size``. Every
+line of the repeated template is popular so it is compared as a single block by the
+spans engine, the sparse template only compares the few dirty lines.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from chalumo.diff import DIFF_ENGINES, SourceDiff
+
+
+BLOCK = (
+    '<div class="item">\n'
+    '    <p class="text">Lorem ipsum dolor sit amet.</p>\n'
+    '</div>\n'
+)
+DIRTY = '<div class=" item  item  dirty ">\n'
+
+CASES = {
+    "repeated": lambda index: DIRTY if index % 10 == 0 else BLOCK,
+    "sparse": lambda index: (
+        DIRTY if index % 1000 == 0 else '<p class="line-{}">Line</p>\n'.format(index)
+    ),
+}
+
+
+def build(case, size):
+    """
+    Return a template of at least given size in bytes.
+    """
+    builder = CASES[case]
+    lines = []
+    length = index = 0
+
+    while length < size:
+        line = builder(index)
+        lines.append(line)
+        length += len(line)
+        index += 1
+
+    return "".join(lines)
+
+
+def measure(engine, result, repeat=3):
+    """
+    Return the best duration of a diff and its output.
+    """
+    differ = SourceDiff(diff_engine=engine, cache_dir=None)
+    durations = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        output = "".join(differ.diff_source(*result, edits=result.edits))
+        durations.append(time.perf_counter() - start)
+
+    return min(durations), output
+
+
+def run(size):
+    """
+    Run every case for every engine.
+
+    Returns:
+        list: List of tuple for case name, engine name, duration and True if output
+        is the same than the difflib engine one.
+    """
+    results = []
+    differ = SourceDiff(cache_dir=None)
+
+    for case in CASES:
+        result = differ.process_source(Path(case), build(case, size))
+
+        outputs = {}
+        # Reference engine first so other engines outputs can be compared to it
+        for name in sorted(DIFF_ENGINES, key=lambda item: item != "difflib"):
+            duration, outputs[name] = measure(name, result, repeat=1)
+            results.append(
+                (case, name, duration, outputs[name] == outputs.get("difflib"))
+            )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--size", type=float, default=5.0,
+        help="Template size in megabytes."
+    )
+    args = parser.parse_args()
+
+    print("{:<12}{:>10}{:>14}{:>10}".format("Case", "Engine", "Seconds", "Same"))
+    for case, name, duration, same in run(int(args.size * 1024 * 1024)):
+        print("{:<12}{:>10}{:>14.6f}{:>10}".format(case, name, duration, str(same)))
+
+
+if __name__ == "__main__":
+    main()
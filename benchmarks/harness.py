@@ -0,0 +1,396 @@
+"""
+Benchmark harness
+=================
+
+Measure each part of the pipeline on a generated corpus and save results as JSON: ::
+
+    python -m benchmarks.harness --output results.json
+
+The corpus is generated in a temporary directory from the corpus options, see
+``benchmarks.corpus``. Every benchmark runs in a single process without cache and
+keeps the best and mean durations of its repeats.
+
+Benchmarks are:
+
+discovery
+    ``SourceDiscovery.get_source_files`` on the corpus directory.
+parser
+    ``HtmlAttributeParser.process_source`` on every source, without any rule.
+fixer
+    ``SourceFixer.process_source`` on every source with the default rules.
+django
+    Django pre processor then post processor on every source.
+diff
+    ``SourceDiff.run`` on the corpus directory.
+writer
+    ``SourceWriter.run`` on a fresh copy of the corpus directory.
+
+With option ``--baseline`` the run is compared to results from a previous run: ::
+
+    python -m benchmarks.harness --baseline benchmarks/baseline.json
+
+Best durations are compared and the relative delta of each benchmark is reported. A
+benchmark is a regression when its delta is greater than its tolerance, then the
+script exits with code 1. Default tolerance is given with ``--default-tolerance``,
+it can be changed for a benchmark with ``--tolerance``, for example
+``--tolerance django=0.25``. A baseline may also define tolerances in an item
+``tolerances``, options have priority over them.
+
+Baseline and current run must have been made with the same corpus options, so corpus
+options default to the baseline ones. Durations depend on the machine, the checked in
+``benchmarks/baseline.json`` has to be regenerated with option ``--output`` on the
+machine which runs the comparison. Tolerances from options and baseline are saved in
+output. Benchmarks which read or write files are noisier,
+so the baseline gives them wider tolerances.
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chalumo.diff import SourceDiff
+from chalumo.discovery import SourceDiscovery
+from chalumo.fixer import SourceFixer
+from chalumo.parser import HtmlAttributeParser
+from chalumo.processors.django import DjangoPreProcessor, DjangoPostProcessor
+from chalumo.reformat import SourceWriter
+
+from .corpus import DEFAULT_OPTIONS, add_arguments, generate_corpus, get_options
+
+
+def measure(function, repeat, setup=None):
+    """
+    Measure the durations of a function.
+
+    Arguments:
+        function (callable): Function to measure, it is called without argument.
+        repeat (integer): Number of runs.
+
+    Keyword Arguments:
+        setup (callable): Function called before each run, it is not measured.
+
+    Returns:
+        dict: Best and mean durations in seconds with the number of runs.
+    """
+    durations = []
+
+    for i in range(repeat):
+        if setup:
+            setup()
+
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "best": min(durations),
+        "mean": statistics.mean(durations),
+        "repeat": repeat,
+    }
+
+
+def bench_discovery(corpus, sources):
+    discoverer = SourceDiscovery()
+
+    return lambda: list(discoverer.get_source_files(corpus))
+
+
+def bench_parser(corpus, sources):
+    parser = HtmlAttributeParser()
+
+    return lambda: [parser.process_source(path, source) for path, source in sources]
+
+
+def bench_fixer(corpus, sources):
+    fixer = SourceFixer(cache_dir=None)
+
+    def run():
+        # Memo is emptied so every run normalizes the same values
+        fixer.normalize_value.cache_clear()
+        return [fixer.process_source(path, source).fixed for path, source in sources]
+
+    return run
+
+
+def bench_django(corpus, sources):
+    pre_processor = DjangoPreProcessor()
+    post_processor = DjangoPostProcessor()
+
+    def run():
+        for path, source in sources:
+            context = pre_processor.get_context(source)
+            post_processor.render(context.content, context)
+
+    return run
+
+
+def bench_diff(corpus, sources):
+    differ = SourceDiff(cache_dir=None, output_callable=lambda output: None)
+
+    return lambda: differ.run(corpus)
+
+
+def bench_writer(corpus, sources):
+    writer = SourceWriter(cache_dir=None)
+    destination = corpus.parent / "writer"
+
+    def setup():
+        if destination.exists():
+            shutil.rmtree(destination)
+        shutil.copytree(corpus, destination)
+
+    return setup, lambda: writer.run(destination)
+
+
+# Available benchmarks indexed on their name
+BENCHMARKS = {
+    "discovery": bench_discovery,
+    "parser": bench_parser,
+    "fixer": bench_fixer,
+    "django": bench_django,
+    "diff": bench_diff,
+    "writer": bench_writer,
+}
+
+
+def get_environment():
+    """
+    Return informations about the environment which produced results.
+
+    Returns:
+        dict: Environment informations.
+    """
+    from chalumo import __version__
+
+    return {
+        "chalumo": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run(options, names=None, repeat=3):
+    """
+    Generate a corpus and run benchmarks on it.
+
+    Arguments:
+        options (dict): Corpus options.
+
+    Keyword Arguments:
+        names (list): Names of benchmarks to run. Default to every benchmark.
+        repeat (integer): Number of runs for each benchmark.
+
+    Returns:
+        dict: Results with environment, corpus options and durations of each
+        benchmark.
+    """
+    results = {
+        "environment": get_environment(),
+        "corpus": options,
+        "benchmarks": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = Path(directory) / "corpus"
+        paths = generate_corpus(corpus, options)
+        sources = [(path, path.read_text()) for path in paths]
+
+        results["corpus"] = dict(options, bytes=sum([
+            path.stat().st_size for path in paths
+        ]))
+
+        for name in names or BENCHMARKS:
+            bench = BENCHMARKS[name](corpus, sources)
+            setup = None
+            if isinstance(bench, tuple):
+                setup, bench = bench
+
+            results["benchmarks"][name] = measure(bench, repeat, setup=setup)
+
+    return results
+
+
+def compare(results, baseline, tolerances=None, default_tolerance=0.1):
+    """
+    Compare benchmark results to baseline results.
+
+    Arguments:
+        results (dict): Current results as returned by ``run``.
+        baseline (dict): Baseline results.
+
+    Keyword Arguments:
+        tolerances (dict): Relative tolerance indexed on benchmark name. Default to
+            tolerances from baseline.
+        default_tolerance (float): Relative tolerance for a benchmark without its
+            own tolerance.
+
+    Returns:
+        list: A dictionnary for each benchmark in both results, with its name, baseline
+        and current best durations, relative delta, tolerance and a boolean
+        ``regression``.
+    """
+    if results["corpus"] != baseline["corpus"]:
+        raise ValueError("Baseline has been made with different corpus options.")
+
+    tolerances = dict(baseline.get("tolerances", {}), **(tolerances or {}))
+    rows = []
+
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+
+        reference = baseline["benchmarks"][name]["best"]
+        delta = (result["best"] - reference) / reference if reference else 0.0
+        tolerance = tolerances.get(name, default_tolerance)
+
+        rows.append({
+            "name": name,
+            "baseline": reference,
+            "current": result["best"],
+            "delta": delta,
+            "tolerance": tolerance,
+            "regression": delta > tolerance,
+        })
+
+    return rows
+
+
+def parse_tolerance(value):
+    """
+    Parse a tolerance option.
+
+    Arguments:
+        value (string): Option value as ``NAME=RATIO``.
+
+    Returns:
+        tuple: Benchmark name and its relative tolerance.
+    """
+    name, sep, ratio = value.partition("=")
+
+    if not sep or name not in BENCHMARKS:
+        raise argparse.ArgumentTypeError(
+            "Invalid tolerance '{}', expected NAME=RATIO.".format(value)
+        )
+
+    try:
+        return name, float(ratio)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid tolerance ratio: {}".format(ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--output", type=Path, default=None,
+        help="File path where to write JSON results. Default to standard output.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="Number of runs for each benchmark. Default to 3.",
+    )
+    parser.add_argument(
+        "--bench", action="append", choices=list(BENCHMARKS), default=None,
+        help="Benchmark to run, can be given many times. Default to every one.",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=None,
+        help="File path of baseline JSON results to compare the run to.",
+    )
+    parser.add_argument(
+        "--tolerance", type=parse_tolerance, action="append", default=[],
+        help=(
+            "Relative tolerance of a benchmark as NAME=RATIO, can be given many times."
+        ),
+    )
+    parser.add_argument(
+        "--default-tolerance", type=float, default=0.1,
+        help="Relative tolerance of benchmarks without their own one. Default to 0.1.",
+    )
+    add_arguments(parser)
+    # Corpus options are only known once baseline has been loaded
+    parser.set_defaults(**dict.fromkeys(DEFAULT_OPTIONS))
+    args = vars(parser.parse_args())
+
+    output = args.pop("output")
+    repeat = args.pop("repeat")
+    names = args.pop("bench")
+    baseline_path = args.pop("baseline")
+    tolerances = dict(args.pop("tolerance"))
+    default_tolerance = args.pop("default_tolerance")
+
+    options = {}
+    baseline = None
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text())
+        options.update({
+            name: value for name, value in baseline["corpus"].items()
+            if name in DEFAULT_OPTIONS
+        })
+    options.update({name: value for name, value in args.items() if value is not None})
+
+    results = run(get_options(**options), names=names, repeat=repeat)
+
+    print("{:<12}{:>14}{:>14}".format("Benchmark", "Best", "Mean"), file=sys.stderr)
+    for name, result in results["benchmarks"].items():
+        print(
+            "{:<12}{:>14.6f}{:>14.6f}".format(name, result["best"], result["mean"]),
+            file=sys.stderr,
+        )
+
+    # Tolerances are saved so results can be used as a baseline
+    if baseline and baseline.get("tolerances"):
+        results["tolerances"] = dict(baseline["tolerances"], **tolerances)
+    elif tolerances:
+        results["tolerances"] = tolerances
+
+    content = json.dumps(results, indent=4)
+
+    if output:
+        output.write_text(content + "\n")
+    elif not baseline:
+        print(content)
+
+    if baseline:
+        try:
+            rows = compare(
+                results,
+                baseline,
+                tolerances=tolerances,
+                default_tolerance=default_tolerance,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+        print("", file=sys.stderr)
+        print(
+            "{:<12}{:>14}{:>14}{:>10}{:>11}".format(
+                "Benchmark", "Baseline", "Current", "Delta", "Tolerance"
+            ),
+            file=sys.stderr,
+        )
+        for row in rows:
+            print(
+                "{:<12}{:>14.6f}{:>14.6f}{:>+10.1%}{:>11.1%}{}".format(
+                    row["name"], row["baseline"], row["current"], row["delta"],
+                    row["tolerance"], "  REGRESSION" if row["regression"] else "",
+                ),
+                file=sys.stderr,
+            )
+
+        regressions = [row["name"] for row in rows if row["regression"]]
+        if regressions:
+            print(
+                "Regression on: {}".format(", ".join(regressions)), file=sys.stderr
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Memory benchmarks
+=================
+
+Measure memory high water of commands ``diff`` and ``reformat`` on corpora of
+increasing sizes: ::
+
+    python -m benchmarks.memory --output memory.json
+
+Each measure runs in a new interpreter so its peak RSS only belongs to the measured
+command. Two peaks are recorded:
+
+rss
+    Peak resident set size of the process in bytes, it includes the interpreter and
+    imported modules.
+tracemalloc
+    Peak size of memory blocks allocated by Python while the command runs, in bytes.
+    This is the part which depends on the processed corpus.
+
+Sources are processed one at a time, so peaks should barely grow with the number of
+files once the memo of normalized values is full, with default memo size this
+happens after about a hundred files of the default corpus. Corpora are built with
+``benchmarks.corpus`` and every option but ``files`` can be given.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from .corpus import DEFAULT_OPTIONS, add_arguments, generate_corpus, get_options
+
+
+COMMANDS = ["diff", "reformat"]
+
+FILES = [100, 200, 400, 800]
+
+SCRIPT = """
+import json
+import resource
+import sys
+from pathlib import Path
+
+from benchmarks.memory import run_command, trace_peak
+
+peak = trace_peak(run_command, sys.argv[1], Path(sys.argv[2]))
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# Linux reports kilobytes where macOS reports bytes
+if sys.platform != "darwin":
+    rss *= 1024
+
+print(json.dumps({"tracemalloc": peak, "rss": rss}))
+"""
+
+
+def run_command(command, basepath, **kwargs):
+    """
+    Run a command on a directory without cache, output or pool.
+
+    Arguments:
+        command (string): Command name from ``COMMANDS``.
+        basepath (pathlib.Path): Directory to process.
+
+    Keyword Arguments:
+        **kwargs: Other arguments given to the command class, like ``memo_size``.
+    """
+    if command == "diff":
+        from chalumo.diff import SourceDiff
+
+        SourceDiff(
+            cache_dir=None, output_callable=lambda output: None, **kwargs
+        ).run(basepath)
+    elif command == "reformat":
+        from chalumo.reformat import SourceWriter
+
+        SourceWriter(cache_dir=None, **kwargs).run(basepath)
+    else:
+        raise ValueError("Unknown command: {}".format(command))
+
+
+def trace_peak(function, *args, **kwargs):
+    """
+    Return the peak size of memory allocated by Python during a function call.
+
+    Arguments:
+        function (callable): Function to call.
+        *args: Positional arguments given to function.
+
+    Keyword Arguments:
+        **kwargs: Keyword arguments given to function.
+
+    Returns:
+        integer: Peak size in bytes.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def measure(command, basepath):
+    """
+    Measure memory peaks of a command in a new interpreter.
+
+    Arguments:
+        command (string): Command name from ``COMMANDS``.
+        basepath (pathlib.Path): Directory to process.
+
+    Returns:
+        dict: Peak RSS and tracemalloc peak in bytes.
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", SCRIPT, command, str(basepath)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=str(Path(__file__).parent.parent),
+    )
+
+    return json.loads(process.stdout)
+
+
+def run(options, files=None, commands=None):
+    """
+    Measure memory peaks of commands on corpora of increasing sizes.
+
+    A new corpus is generated for each measure since ``reformat`` modifies it.
+
+    Arguments:
+        options (dict): Corpus options, option ``files`` is ignored.
+
+    Keyword Arguments:
+        files (list): Numbers of files of corpora. Default to ``FILES``.
+        commands (list): Command names to measure. Default to ``COMMANDS``.
+
+    Returns:
+        list: A dictionnary for each measure with command name, number of files,
+        corpus size in bytes and peaks.
+    """
+    results = []
+
+    for command in commands or COMMANDS:
+        for count in files or FILES:
+            with tempfile.TemporaryDirectory() as directory:
+                paths = generate_corpus(Path(directory), dict(options, files=count))
+
+                result = {
+                    "command": command,
+                    "files": count,
+                    "bytes": sum([path.stat().st_size for path in paths]),
+                }
+                result.update(measure(command, Path(directory)))
+
+            results.append(result)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--output", type=Path, default=None,
+        help="File path where to write JSON results.",
+    )
+    parser.add_argument(
+        "--command", action="append", choices=COMMANDS, default=None,
+        help="Command to measure, can be given many times. Default to every one.",
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=FILES,
+        help="Numbers of files of corpora. Default to {}.".format(
+            " ".join([str(count) for count in FILES])
+        ),
+    )
+    add_arguments(parser)
+    args = vars(parser.parse_args())
+
+    output = args.pop("output")
+    commands = args.pop("command")
+    files = args.pop("sizes")
+
+    options = get_options(**{
+        name: value for name, value in args.items()
+        if name in DEFAULT_OPTIONS and name != "files"
+    })
+    results = run(options, files=files, commands=commands)
+
+    print("{:<10}{:>8}{:>14}{:>14}{:>14}".format(
+        "Command", "Files", "Corpus", "Tracemalloc", "RSS"
+    ))
+    for result in results:
+        print("{:<10}{:>8}{:>12.1f}MB{:>12.1f}MB{:>12.1f}MB".format(
+            result["command"],
+            result["files"],
+            result["bytes"] / 1000000,
+            result["tracemalloc"] / 1000000,
+            result["rss"] / 1000000,
+        ))
+
+    if output:
+        output.write_text(json.dumps({
+            "corpus": options,
+            "results": results,
+        }, indent=4) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Scanner benchmarks
+==================
+
+Compare attribute engines on adversarial contents: ::
+
+    python -m benchmarks.scanner
+
+Cases are:
+
+unterminated
+    An attribute which is never closed, followed by a lot of space separated words.
+    This is the worst case for the reference regex engine which backtracks on every
+    space.
+huge
+    A single huge attribute which is correctly closed.
+many
+    A lot of small attributes.
+
+Once an engine exceeds the time limit for a case, it is skipped for bigger sizes.
+"""
+import argparse
+import time
+
+from chalumo.scanner import ATTRIBUTE_ENGINES
+
+
+CASES = {
+    "unterminated": lambda size: '<div class="' + ("foo " * size),
+    "huge": lambda size: '<div class="' + ("foo " * size) + '">Lorem</div>',
+    "many": lambda size: '<p class="foo bar">Lorem</p>\n' * size,
+}
+
+SIZES = [1000, 2000, 4000, 8000, 16000, 32000, 64000]
+
+
+def measure(engine, source, repeat=3):
+    """
+    Return the best duration of a full scan.
+    """
+    durations = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        for match in engine.finditer(source):
+            pass
+        durations.append(time.perf_counter() - start)
+
+    return min(durations)
+
+
+def run(sizes=None, limit=2.0):
+    """
+    Run every case for every engine on every size.
+
+    Returns:
+        list: List of tuple for case name, size, engine name and duration. Duration
+        is ``None`` when engine has been skipped.
+    """
+    results = []
+
+    for case, builder in CASES.items():
+        skipped = set()
+
+        for size in sizes or SIZES:
+            source = builder(size)
+
+            for name, engine_class in ATTRIBUTE_ENGINES.items():
+                if name in skipped:
+                    results.append((case, size, name, None))
+                    continue
+
+                duration = measure(engine_class("class"), source)
+                results.append((case, size, name, duration))
+
+                if duration > limit:
+                    skipped.add(name)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--limit", type=float, default=2.0,
+        help="Time limit in seconds after which an engine is skipped for a case."
+    )
+    args = parser.parse_args()
+
+    print("{:<14}{:>10}{:>10}{:>14}".format("Case", "Size", "Engine", "Seconds"))
+    for case, size, name, duration in run(limit=args.limit):
+        if duration is not None:
+            duration = "{:.6f}".format(duration)
+
+        print("{:<14}{:>10}{:>10}{:>14}".format(
+            case, size, name, duration or "skipped"
+        ))
+
+
+if __name__ == "__main__":
+    main()
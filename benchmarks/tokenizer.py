@@ -0,0 +1,113 @@
+"""
+Tokenizer benchmarks
+====================
+
+Compare template tokenizers on Django templates: ::
+
+    python -m benchmarks.tokenizer
+
+Cases are:
+
+tags
+    A template where almost every line contains template tags and variables.
+text
+    A template with a few template tags among a lot of HTML.
+
+The import duration of each tokenizer is measured in a new interpreter.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from chalumo.processors.tokenizer import TOKENIZERS
+
+
+CASES = {
+    "tags": lambda size: (
+        '<div class="item {% if a %}active{% endif %}">{{ obj.name }}'
+        '{% trans "Hello" %}{# note #}</div>\n'
+    ) * size,
+    "text": lambda size: (
+        '<div class="item">\n    <p class="text">Lorem ipsum dolor sit.</p>\n</div>\n'
+        * 20 +
+        '{% include "item.html" %}\n'
+    ) * (size // 20),
+}
+
+SIZES = [1000, 10000, 100000]
+
+# Import every module required for a tokenizer to tokenize
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+from chalumo.processors.tokenizer import get_tokenizer
+list(get_tokenizer("{name}").tokenize("{{{{ foo }}}}"))
+print(time.perf_counter() - start)
+"""
+
+
+def measure(tokenizer, source, repeat=3):
+    """
+    Return the best duration of a full tokenization.
+    """
+    durations = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        for token in tokenizer.tokenize(source):
+            pass
+        durations.append(time.perf_counter() - start)
+
+    return min(durations)
+
+
+def measure_import(name):
+    """
+    Return the import duration of a tokenizer in a new interpreter.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(name=name)],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+    return float(output)
+
+
+def run(sizes=None):
+    """
+    Run every case for every tokenizer on every size.
+
+    Returns:
+        list: List of tuple for case name, size, tokenizer name and duration.
+    """
+    results = []
+
+    for name in TOKENIZERS:
+        results.append(("import", 0, name, measure_import(name)))
+
+    for case, builder in CASES.items():
+        for size in sizes or SIZES:
+            source = builder(size)
+
+            for name, tokenizer_class in TOKENIZERS.items():
+                results.append(
+                    (case, size, name, measure(tokenizer_class(), source))
+                )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    print("{:<10}{:>10}{:>10}{:>14}".format("Case", "Size", "Tokenizer", "Seconds"))
+    for case, size, name, duration in run():
+        print("{:<10}{:>10}{:>10}{:>14.6f}".format(case, size, name, duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,6 @@
 from __future__ import absolute_import, unicode_literals
 
 import os
-from setuptools.config import read_configuration
-
-import pkg_resources
 
 PROJECT_DIR = os.path.join(os.path.dirname(__file__), "..")
 
@@ -15,13 +12,35 @@ def _extract_version(package_name):
     installed
     """
     try:
-        return pkg_resources.get_distribution(package_name).version
-    except pkg_resources.DistributionNotFound:
-        _conf = read_configuration(os.path.join(PROJECT_DIR, "setup.cfg"))
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        # Python 3.7 does not have importlib.metadata
+        pass
+    else:
+        try:
+            return version(package_name)
+        except PackageNotFoundError:
+            pass
+
+    from configparser import ConfigParser
+
+    _conf = ConfigParser()
+    _conf.read(os.path.join(PROJECT_DIR, "setup.cfg"))
+
     return _conf["metadata"]["version"]
 
 
 __pkgname__ = "chalumo"
 
 
-__version__ = _extract_version(__pkgname__)
+def __getattr__(name):
+    """
+    Lazily compute the package version on its first access since getting it from
+    package metadata is costly at startup.
+    """
+    if name == "__version__":
+        global __version__
+        __version__ = _extract_version(__pkgname__)
+        return __version__
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,234 @@
+"""
+Result cache
+============
+
+A persistent cache to remember the source contents which are already clean, so they
+can be skipped on the next runs.
+
+Cache entries are indexed by a hash of the source content combined with a fingerprint
+of the configuration which produced the result, so a configuration change never
+reuses a previous result.
+
+Every entry is an empty file stored in the cache directory, this allows many processes
+to share the same cache without any locking. Entry modification time is refreshed on
+each hit so the eviction is a *Least Recently Used* policy.
+
+Listing every entry to prune the cache is costly for a large cache, so after a run the
+number of entries is first estimated from a sample of sub directories. Keys are
+hashes, so entries are evenly dispatched in sub directories. The cache is only pruned
+when the estimate is over the limit, then it is pruned under the limit so the next
+runs do not have to prune it again at once.
+
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def get_default_cache_dir():
+    """
+    Return the default cache directory for the current user.
+
+    It follows the XDG specification with environment variable ``XDG_CACHE_HOME``
+    if defined, else it fallbacks to ``~/.cache``.
+
+    Returns:
+        pathlib.Path: Default cache directory path.
+    """
+    basedir = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(basedir) / "chalumo"
+
+
+def get_fingerprint(options):
+    """
+    Compute a fingerprint from configuration options.
+
+    Arguments:
+        options (dict): Options which have an effect on results. Values must be
+            serializable to JSON.
+
+    Returns:
+        string: Fingerprint hash.
+    """
+    payload = json.dumps(options, sort_keys=True)
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Store and lookup clean source contents.
+
+    Arguments:
+        directory (pathlib.Path): Directory where to store entries, it will be created
+            if it does not exist yet.
+        fingerprint (string): Fingerprint of configuration options.
+
+    Keyword Arguments:
+        max_entries (integer): Maximum number of entries to keep when pruning cache.
+    """
+    DEFAULT_MAX_ENTRIES = 100000
+    # Number of sub directories, one for each possible two hexadecimal characters
+    SHARDS = 256
+    # Number of entries to count before an estimate is considered accurate enough
+    SAMPLE_ENTRIES = 1000
+    # Ratio of maximum entries to keep when cache is pruned because it is full
+    PRUNE_RATIO = 0.9
+
+    def __init__(self, directory, fingerprint, max_entries=None):
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+
+    def get_key(self, content):
+        """
+        Compute entry key for a content.
+
+        Arguments:
+            content (string): Source content.
+
+        Returns:
+            string: Entry key.
+        """
+        digest = hashlib.sha256(self.fingerprint.encode("utf-8"))
+        digest.update(content.encode("utf-8", "surrogatepass"))
+
+        return digest.hexdigest()
+
+    def get_entry_path(self, key):
+        """
+        Return entry file path for a key.
+
+        Entries are dispatched in sub directories from the key start to avoid huge
+        directories.
+
+        Arguments:
+            key (string): Entry key.
+
+        Returns:
+            pathlib.Path: Entry file path.
+        """
+        return self.directory / key[:2] / key
+
+    def is_clean(self, content):
+        """
+        Check if a content is known to be clean.
+
+        Arguments:
+            content (string): Source content.
+
+        Returns:
+            boolean: True if content has been stored as clean.
+        """
+        entry = self.get_entry_path(self.get_key(content))
+
+        try:
+            # Refresh entry time for eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def set_clean(self, content):
+        """
+        Store a content as clean.
+
+        Arguments:
+            content (string): Source content.
+        """
+        entry = self.get_entry_path(self.get_key(content))
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        entry.touch()
+
+    def get_entries(self):
+        """
+        List all stored entries.
+
+        Returns:
+            list: List of tuple with entry modification time and its path.
+        """
+        entries = []
+
+        if not self.directory.is_dir():
+            return entries
+
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir(follow_symlinks=False):
+                    continue
+
+                with os.scandir(shard.path) as items:
+                    for item in items:
+                        try:
+                            entries.append((item.stat().st_mtime_ns, item.path))
+                        except FileNotFoundError:
+                            continue
+
+        return entries
+
+    def estimate_entries(self):
+        """
+        Estimate the number of stored entries from a sample of sub directories.
+
+        Sub directories are counted until enough entries have been seen, a small
+        cache is then entirely counted.
+
+        Returns:
+            integer: Estimated number of entries.
+        """
+        count = 0
+
+        for shard in range(self.SHARDS):
+            try:
+                with os.scandir(self.directory / "{:02x}".format(shard)) as items:
+                    count += sum([1 for item in items])
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+
+            if count >= self.SAMPLE_ENTRIES:
+                return count * self.SHARDS // (shard + 1)
+
+        return count
+
+    def prune_if_full(self):
+        """
+        Prune cache only when its estimated number of entries is over the limit.
+
+        Returns:
+            integer: Number of removed entries.
+        """
+        if self.estimate_entries() <= self.max_entries:
+            return 0
+
+        return self.prune(keep=int(self.max_entries * self.PRUNE_RATIO))
+
+    def prune(self, keep=None):
+        """
+        Remove least recently used entries when there is more than the maximum
+        entries allowed.
+
+        Keyword Arguments:
+            keep (integer): Number of entries to keep. Default to the maximum
+                entries allowed.
+
+        Returns:
+            integer: Number of removed entries.
+        """
+        entries = self.get_entries()
+        overflow = len(entries) - (self.max_entries if keep is None else keep)
+
+        if overflow <= 0:
+            return 0
+
+        entries.sort()
+
+        for mtime, path in entries[:overflow]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+
+        return overflow
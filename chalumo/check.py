@@ -0,0 +1,226 @@
+"""
+Check
+=====
+
+Implement the report of rule violations without building any fixed source.
+
+Violations are found from the edits the parser made on a source, so a processor
+which does not preserve positions can not be used to check sources.
+
+Violations are output as text lines by default or given to a reporter from
+``chalumo.reporters`` which streams machine readable records.
+
+"""
+import time
+
+from .discovery import SourceDiscovery
+from .exceptions import HtmlLinterException
+from .fixer import SourceFixer
+from .lines import LineIndex
+from .reporters import FileReport
+from .rules import RULES, compile_checker
+
+
+class Violation:
+    """
+    A rule violation in a source.
+
+    Arguments:
+        filepath (pathlib.Path): Source file path.
+        line (integer): Line number of violating attribute, starting from one.
+        column (integer): Column number of violating attribute, starting from one.
+        code (string): Violated rule code.
+    """
+    __slots__ = ("filepath", "line", "column", "code")
+
+    def __init__(self, filepath, line, column, code):
+        self.filepath = filepath
+        self.line = line
+        self.column = column
+        self.code = code
+
+    def __str__(self):
+        return "{}:{}:{}: {} {}".format(
+            self.filepath, self.line, self.column, self.code,
+            RULES[self.code].description,
+        )
+
+    def __repr__(self):
+        return "<Violation {}:{}:{} {}>".format(
+            self.filepath, self.line, self.column, self.code
+        )
+
+
+class SourceChecker(SourceFixer, SourceDiscovery):
+    """
+    Report rule violations from discovered files.
+
+    Keywords Arguments:
+        fail_fast (boolean): If True, stop at the first violation found. Default to
+            False.
+        output_callable (callable): Function to use to output violations as text.
+            Default to ``print`` function.
+        reporter (chalumo.reporters.BaseReporter): Reporter to give file reports
+            to instead of text output. Default to ``None``.
+    """
+    def __init__(self, *args, **kwargs):
+        self.fail_fast = kwargs.pop("fail_fast", False)
+
+        self.echo = print
+        if "output_callable" in kwargs:
+            self.echo = kwargs.pop("output_callable")
+
+        self.reporter = kwargs.pop("reporter", None)
+
+        super().__init__(*args, **kwargs)
+
+        if not self.pre_processor.preserves_offsets:
+            raise HtmlLinterException(
+                "Checking requires a pre processor which preserves offsets."
+            )
+
+        self.checker = compile_checker(self.enabled_rules)
+
+    def __getstate__(self):
+        """
+        Compiled checker can not be pickled and outputs are not required in a worker
+        process, they are removed from state.
+        """
+        state = super().__getstate__()
+        del state["checker"]
+        # Outputs are only used from main process
+        state["echo"] = None
+        state["reporter"] = None
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore state with compiled checker.
+        """
+        super().__setstate__(state)
+        self.checker = compile_checker(self.enabled_rules)
+
+    def get_violations(self, result):
+        """
+        Find rule violations of a processed source from its edits.
+
+        Each edited attribute value is checked as the parser has seen it, so with
+        processors it is checked with its template tags masked.
+
+        Arguments:
+            result (chalumo.parser.ProcessedSource): Processed source.
+
+        Returns:
+            list: List of ``Violation`` objects, ordered by position. With
+            ``fail_fast`` enabled there is at most one violation.
+        """
+        violations = []
+
+        if not result.changed:
+            return violations
+
+        index = LineIndex(result.source)
+        head = len(self.attribute_start)
+        tail = len(self.attribute_end)
+
+        for start, end, replacement in result.edits:
+            value = result.source[start + head:end - tail]
+            masked = self.pre_processor.get_context(value).content
+            line, column = index.get_position(start)
+
+            for code in self.checker(masked):
+                violations.append(Violation(result.filepath, line, column, code))
+
+                if self.fail_fast:
+                    return violations
+
+        return violations
+
+    def check_file(self, filepath):
+        """
+        Find rule violations of a single file.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+
+        Returns:
+            chalumo.reporters.FileReport: File report with its violations, a file
+            known as clean from cache is reported without any violation. ``None``
+            if file is not elligible.
+        """
+        start = time.perf_counter()
+        source = self.read_source(filepath)
+
+        if source is None:
+            return None
+
+        if self.is_cached(filepath, source):
+            return FileReport(
+                filepath,
+                [],
+                filepath.stat().st_size,
+                time.perf_counter() - start,
+                cached=True,
+            )
+
+        result = self.fix_content(filepath, source)
+
+        started = self.stats.start()
+        violations = self.get_violations(result)
+        self.stats.stop("check", started)
+
+        return FileReport(
+            filepath,
+            violations,
+            filepath.stat().st_size,
+            time.perf_counter() - start,
+        )
+
+    def output_report(self, report):
+        """
+        Output violations of a file report as text lines.
+
+        Arguments:
+            report (chalumo.reporters.FileReport): Report of a checked file.
+        """
+        for violation in report.violations:
+            self.echo(str(violation))
+
+    def run(self, basepath):
+        """
+        Output rule violations for all discovered files from given basepath.
+
+        Arguments:
+            basepath (pathlib.Path): Base path where to search for sources.
+
+        Returns:
+            integer: Number of found violations.
+        """
+        count = 0
+        outputs = self.map_sources("check_file", self.get_source_files(basepath))
+        output = self.reporter.report_file if self.reporter else self.output_report
+
+        if self.reporter:
+            self.reporter.start()
+
+        try:
+            for report in outputs:
+                if report is None:
+                    continue
+
+                output(report)
+                count += len(report.violations)
+
+                if count and self.fail_fast:
+                    self.log.debug("🛑 Stopped at first violation")
+                    break
+        finally:
+            outputs.close()
+
+            if self.reporter:
+                self.reporter.finish()
+
+        self.finish()
+
+        return count
@@ -1,3 +1,4 @@
+import logging
 from pathlib import Path
 
 import click
@@ -57,12 +58,263 @@ COMMON_OPTIONS = {
         "args": ("--pattern",),
         "kwargs": {
             "metavar": "STRING",
+            "multiple": True,
             "help": (
-                "Pattern to use for file discovery in given basepath. When given "
-                "basepath is a single file path, the pattern will not be used."
+                "Pattern to use for file discovery in given basepath. This option "
+                "can be given many times to search for many patterns. Default to "
+                "'**/*.html'. When given basepath is a single file path, the pattern "
+                "will not be used."
+            ),
+        }
+    },
+    "exclude": {
+        "args": ("--exclude",),
+        "kwargs": {
+            "metavar": "STRING",
+            "multiple": True,
+            "help": (
+                "Pattern of files and directories to exclude from discovery, "
+                "excluded directories are never walked. A pattern without '/' "
+                "matches names at any level, else it matches paths relative to "
+                "basepath. This option can be given many times."
+            ),
+        }
+    },
+    "no-default-excludes": {
+        "args": ("--no-default-excludes",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Disable default exclusions of directories like '.git', "
+                "'node_modules', '__pycache__' or virtual environments."
+            ),
+            "default": False,
+        }
+    },
+    "jobs": {
+        "args": ("--jobs", "-j"),
+        "kwargs": {
+            "metavar": "INTEGER",
+            "type": click.IntRange(min=0),
+            "help": (
+                "Number of processes to use to process files. '0' will use as many "
+                "processes as available CPUs. Outputs are always in the same order "
+                "whatever is the number of processes."
             ),
             "show_default": True,
-            "default": "",
+            "default": 1,
+        }
+    },
+    "cache-dir": {
+        "args": ("--cache-dir",),
+        "kwargs": {
+            "type": click.Path(
+                file_okay=False, dir_okay=True, writable=True, resolve_path=False,
+                path_type=Path,
+            ),
+            "help": (
+                "Directory of the cache which remembers already clean sources so "
+                "they are skipped on next runs. Default to 'chalumo' directory in "
+                "user cache directory."
+            ),
+            "default": None,
+        }
+    },
+    "fail-fast": {
+        "args": ("--fail-fast",),
+        "kwargs": {
+            "is_flag": True,
+            "help": "Stop discovery and processing at the first violation found.",
+            "default": False,
+        }
+    },
+    "format": {
+        "args": ("--format",),
+        "kwargs": {
+            "metavar": "STRING",
+            "type": click.Choice(["text", "jsonl", "sarif"]),
+            "help": (
+                "Report format. 'text' outputs a line per violation, 'jsonl' "
+                "outputs JSON Lines records per violation and per file and 'sarif' "
+                "outputs a SARIF document."
+            ),
+            "show_default": True,
+            "default": "text",
+        }
+    },
+    "output": {
+        "args": ("--output",),
+        "kwargs": {
+            "type": click.Path(
+                file_okay=True, dir_okay=False, writable=True, resolve_path=False,
+                path_type=Path,
+            ),
+            "help": (
+                "File path where to write the report. Default to the standard "
+                "output."
+            ),
+            "default": None,
+        }
+    },
+    "stats": {
+        "args": ("--stats",),
+        "kwargs": {
+            "metavar": "STRING",
+            "type": click.Choice(["table", "json"]),
+            "help": (
+                "Measure time spent in each processing phase and count files, "
+                "bytes, attributes and changed attributes. Statistics are output "
+                "on standard error at the end either as a 'table' or as 'json'."
+            ),
+            "default": None,
+        }
+    },
+    "no-cache": {
+        "args": ("--no-cache",),
+        "kwargs": {
+            "is_flag": True,
+            "help": "Disable the cache so every source is processed.",
+            "default": False,
+        }
+    },
+    "watch": {
+        "args": ("--watch",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "After a first run on every discovered file, watch them and run "
+                "again on modified or new files until interrupted. A watched run "
+                "is never forwarded to the daemon."
+            ),
+            "default": False,
+        }
+    },
+    "socket": {
+        "args": ("--socket",),
+        "kwargs": {
+            "type": click.Path(
+                file_okay=True, dir_okay=False, resolve_path=False, path_type=Path,
+            ),
+            "help": (
+                "Path of the daemon socket. Default to 'daemon.sock' in the "
+                "'chalumo' directory of user cache directory."
+            ),
+            "default": None,
+        }
+    },
+    "no-daemon": {
+        "args": ("--no-daemon",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Always run in the current process. Default is to forward the run to "
+                "the daemon started with command 'serve' when it is listening."
+            ),
+            "default": False,
         }
     },
 }
+
+
+def output_stats(stats, stats_format):
+    """
+    Output statistics on standard error.
+
+    Arguments:
+        stats (chalumo.stats.NullStats): Statistics to output.
+        stats_format (string): Statistics format, either ``table`` or ``json``. If
+            empty, nothing is output.
+    """
+    if not stats_format:
+        return
+
+    if stats_format == "json":
+        click.echo(stats.to_json(), err=True)
+    else:
+        click.echo(stats.to_table(), err=True)
+
+
+def forward_to_daemon(command, basepath, options, socket_path=None, **kwargs):
+    """
+    Run a command in the daemon if one is listening.
+
+    Log records of the run are emitted on the current process logger, so they are
+    output with the current verbosity. A daemon with another version or other
+    registered rules refuses the run.
+
+    Arguments:
+        command (string): Command name.
+        basepath (pathlib.Path): Base path where to search for sources.
+        options (dict): Options given to the command class.
+
+    Keyword Arguments:
+        socket_path (pathlib.Path): Daemon socket path. Default to the default
+            socket path for the current user.
+        **kwargs: Other request items, like statistics format.
+
+    Returns:
+        integer: Command exit code. ``None`` if no daemon is listening or if it
+        refused the run, then the command has to be run in the current process.
+    """
+    from .. import __version__
+    from ..client import forward, get_default_socket_path
+    from ..rules import get_rules_fingerprint
+
+    logger = logging.getLogger("chalumo")
+    socket_path = socket_path or get_default_socket_path()
+
+    code = forward(
+        socket_path,
+        dict(
+            kwargs,
+            command=command,
+            basepath=basepath,
+            options=options,
+            version=__version__,
+            rules=get_rules_fingerprint(),
+            log_level=logger.getEffectiveLevel(),
+        ),
+        write=lambda text: click.echo(text, nl=False),
+        write_error=lambda text: click.echo(text, err=True),
+        log=logger.log,
+    )
+
+    if code is not None:
+        logger.debug("🔌 Ran in daemon from socket: {}".format(socket_path))
+
+    return code
+
+
+def watch_sources(cleaner, basepath, run_files):
+    """
+    Run a command on every discovered source then run it again on changed sources
+    until interrupted.
+
+    Arguments:
+        cleaner (chalumo.discovery.SourceDiscovery): Configured instance which
+            discovers sources.
+        basepath (pathlib.Path): Base path where to search for sources.
+        run_files (callable): Function to run command on an iterable of file paths.
+    """
+    from ..watcher import get_watcher
+
+    logger = logging.getLogger("chalumo")
+    watcher = get_watcher(cleaner, basepath)
+
+    try:
+        # Watcher is started before the first run so no change is missed meanwhile
+        run_files(cleaner.get_source_files(basepath))
+
+        logger.info("👀 Watching with {}: {}".format(
+            watcher.__class__.__name__, basepath
+        ))
+
+        for filepaths in watcher.watch():
+            logger.info("🔁 Changed: {}".format(
+                ", ".join([str(path) for path in filepaths])
+            ))
+            run_files(filepaths)
+    except KeyboardInterrupt:
+        logger.info("🛑 Watch interrupted")
+    finally:
+        watcher.close()
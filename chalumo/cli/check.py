@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import logging
+import sys
+
+import click
+
+from ..cache import get_default_cache_dir
+from ..stats import Stats
+from ..check import SourceChecker
+from ..reporters import get_reporter
+
+from .base import (
+    COMMON_ARGS, COMMON_OPTIONS, forward_to_daemon, output_stats,
+)
+
+
+@click.command()
+@click.argument("basepath", **COMMON_ARGS["basepath"]["kwargs"])
+@click.option(
+    *COMMON_OPTIONS["profile"]["args"],
+    **COMMON_OPTIONS["profile"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["require-pragma"]["args"],
+    **COMMON_OPTIONS["require-pragma"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["pattern"]["args"],
+    **COMMON_OPTIONS["pattern"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["exclude"]["args"],
+    **COMMON_OPTIONS["exclude"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-default-excludes"]["args"],
+    **COMMON_OPTIONS["no-default-excludes"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["jobs"]["args"],
+    **COMMON_OPTIONS["jobs"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["cache-dir"]["args"],
+    **COMMON_OPTIONS["cache-dir"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-cache"]["args"],
+    **COMMON_OPTIONS["no-cache"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["fail-fast"]["args"],
+    **COMMON_OPTIONS["fail-fast"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["format"]["args"],
+    **COMMON_OPTIONS["format"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["output"]["args"],
+    **COMMON_OPTIONS["output"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["stats"]["args"],
+    **COMMON_OPTIONS["stats"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["socket"]["args"],
+    **COMMON_OPTIONS["socket"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-daemon"]["args"],
+    **COMMON_OPTIONS["no-daemon"]["kwargs"]
+)
+@click.pass_context
+def check_command(context, basepath, profile, require_pragma, pattern, exclude,
+                  no_default_excludes, jobs, cache_dir, no_cache, fail_fast,
+                  format, output, stats, socket, no_daemon):
+    """
+    Report rule violations on discovered files with their rule code, file, line and
+    column. Exit with code 1 if any violation is found.
+
+    The basepath argument may be a directory to recursively search or a single file
+    path.
+    """
+    logger = logging.getLogger("chalumo")
+
+    if no_cache:
+        cache_dir = None
+    elif not cache_dir:
+        cache_dir = get_default_cache_dir()
+
+    options = {
+        "pragma_tag": require_pragma,
+        "compatibility": profile,
+        "fail_fast": fail_fast,
+        "file_search_pattern": pattern,
+        "excludes": exclude,
+        "default_excludes": not no_default_excludes,
+        "jobs": jobs,
+        "cache_dir": cache_dir,
+    }
+
+    if not no_daemon:
+        code = forward_to_daemon(
+            "check", basepath, options, socket_path=socket, stats=stats,
+            format=format, output=output,
+        )
+        if code is not None:
+            context.exit(code)
+
+    cleaner = SourceChecker(
+        output_callable=click.echo,
+        stats=Stats() if stats else None,
+        **options
+    )
+
+    if basepath.is_file():
+        logger.info("📂 Opening single file: {}".format(basepath))
+    else:
+        logger.info("📂 Opening base directory: {}".format(basepath))
+
+    logger.info("🔧 Using pattern: {}".format(
+        ", ".join(cleaner.file_search_patterns)
+    ))
+
+    if cleaner.excludes:
+        logger.debug("🔧 Excludes: {}".format(", ".join(cleaner.excludes)))
+
+    logger.info("🔧 Profile: {}".format(profile))
+
+    if cleaner.pragma_tag:
+        logger.info("🔧 Required pragma tag: {}".format(cleaner.pragma_tag))
+
+    if cleaner.cache:
+        logger.debug("🔧 Cache directory: {}".format(cleaner.cache.directory))
+
+    if cleaner.jobs > 1:
+        logger.info("🔧 Jobs: {}".format(cleaner.jobs))
+
+    if output:
+        logger.info("🔧 Report: {}".format(output))
+
+    with contextlib.ExitStack() as stack:
+        if output:
+            stream = stack.enter_context(output.open("w", buffering=65536))
+        else:
+            stream = sys.stdout
+
+        if format != "text":
+            cleaner.reporter = get_reporter(
+                format, stream, rules=list(cleaner.enabled_rules)
+            )
+        elif output:
+            cleaner.echo = lambda line: stream.write(line + "\n")
+
+        count = cleaner.run(basepath)
+
+    output_stats(cleaner.stats, stats)
+
+    if count:
+        context.exit(1)
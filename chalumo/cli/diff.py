@@ -3,9 +3,13 @@ import logging
 
 import click
 
+from ..cache import get_default_cache_dir
+from ..stats import Stats
 from ..diff import SourceDiff
 
-from .base import COMMON_ARGS, COMMON_OPTIONS
+from .base import (
+    COMMON_ARGS, COMMON_OPTIONS, forward_to_daemon, output_stats, watch_sources,
+)
 
 
 @click.command()
@@ -22,8 +26,46 @@ from .base import COMMON_ARGS, COMMON_OPTIONS
     *COMMON_OPTIONS["pattern"]["args"],
     **COMMON_OPTIONS["pattern"]["kwargs"]
 )
+@click.option(
+    *COMMON_OPTIONS["exclude"]["args"],
+    **COMMON_OPTIONS["exclude"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-default-excludes"]["args"],
+    **COMMON_OPTIONS["no-default-excludes"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["jobs"]["args"],
+    **COMMON_OPTIONS["jobs"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["cache-dir"]["args"],
+    **COMMON_OPTIONS["cache-dir"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-cache"]["args"],
+    **COMMON_OPTIONS["no-cache"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["stats"]["args"],
+    **COMMON_OPTIONS["stats"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["watch"]["args"],
+    **COMMON_OPTIONS["watch"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["socket"]["args"],
+    **COMMON_OPTIONS["socket"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-daemon"]["args"],
+    **COMMON_OPTIONS["no-daemon"]["kwargs"]
+)
 @click.pass_context
-def diff_command(context, basepath, profile, require_pragma, pattern):
+def diff_command(context, basepath, profile, require_pragma, pattern, exclude,
+                 no_default_excludes, jobs, cache_dir, no_cache, stats, watch,
+                 socket, no_daemon):
     """
     Apply rules fixes on discovered files then output a diff between original and fixed
     sources.
@@ -33,11 +75,32 @@ def diff_command(context, basepath, profile, require_pragma, pattern):
     """
     logger = logging.getLogger("chalumo")
 
+    if no_cache:
+        cache_dir = None
+    elif not cache_dir:
+        cache_dir = get_default_cache_dir()
+
+    options = {
+        "pragma_tag": require_pragma,
+        "compatibility": profile,
+        "file_search_pattern": pattern,
+        "excludes": exclude,
+        "default_excludes": not no_default_excludes,
+        "jobs": jobs,
+        "cache_dir": cache_dir,
+    }
+
+    if not no_daemon and not watch:
+        code = forward_to_daemon(
+            "diff", basepath, options, socket_path=socket, stats=stats
+        )
+        if code is not None:
+            context.exit(code)
+
     cleaner = SourceDiff(
-        pragma_tag=require_pragma,
-        compatibility=profile,
         output_callable=click.echo,
-        file_search_pattern=pattern,
+        stats=Stats() if stats else None,
+        **options
     )
 
     if basepath.is_file():
@@ -45,11 +108,27 @@ def diff_command(context, basepath, profile, require_pragma, pattern):
     else:
         logger.info("📂 Opening base directory: {}".format(basepath))
 
-    logger.info("🔧 Using pattern: {}".format(cleaner.file_search_pattern))
+    logger.info("🔧 Using pattern: {}".format(
+        ", ".join(cleaner.file_search_patterns)
+    ))
+
+    if cleaner.excludes:
+        logger.debug("🔧 Excludes: {}".format(", ".join(cleaner.excludes)))
 
     logger.info("🔧 Profile: {}".format(profile))
 
     if cleaner.pragma_tag:
         logger.info("🔧 Required pragma tag: {}".format(cleaner.pragma_tag))
 
-    cleaner.run(basepath)
+    if cleaner.cache:
+        logger.debug("🔧 Cache directory: {}".format(cleaner.cache.directory))
+
+    if cleaner.jobs > 1:
+        logger.info("🔧 Jobs: {}".format(cleaner.jobs))
+
+    if watch:
+        watch_sources(cleaner, basepath, cleaner.run_files)
+    else:
+        cleaner.run(basepath)
+
+    output_stats(cleaner.stats, stats)
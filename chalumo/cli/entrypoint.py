@@ -4,14 +4,12 @@ Main entrance to commandline actions
 Since Click use function docstring to build its help content, no command
 function are documented.
 """
+import importlib
+
 import click
 
 from chalumo.logger import init_logger
 
-from .version import version_command
-from .diff import diff_command
-from .reformat import reformat_command
-
 
 # Help alias on "-h" argument
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -28,7 +26,49 @@ APP_LOGGER_CONF = (
 )
 
 
-@click.group(context_settings=CONTEXT_SETTINGS)
+# Available commands with the path to their function, each command module is only
+# imported when its command is invoked
+LAZY_COMMANDS = {
+    "version": "chalumo.cli.version.version_command",
+    "check": "chalumo.cli.check.check_command",
+    "diff": "chalumo.cli.diff.diff_command",
+    "reformat": "chalumo.cli.reformat.reformat_command",
+    "serve": "chalumo.cli.serve.serve_command",
+}
+
+
+class LazyGroup(click.Group):
+    """
+    A command group which loads its commands only when they are required.
+
+    Keyword Arguments:
+        lazy_commands (dict): Command paths indexed on command names.
+    """
+    def __init__(self, *args, **kwargs):
+        self.lazy_commands = kwargs.pop("lazy_commands", {})
+        super().__init__(*args, **kwargs)
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands:
+            return self._load_command(cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name):
+        module_path, name = self.lazy_commands[cmd_name].rsplit(".", 1)
+        module = importlib.import_module(module_path)
+
+        return getattr(module, name)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_commands=LAZY_COMMANDS,
+    context_settings=CONTEXT_SETTINGS,
+)
 @click.option(
     "-v", "--verbose",
     type=click.IntRange(min=0, max=5),
@@ -65,9 +105,3 @@ def cli_frontend(ctx, verbose):
         "verbosity": verbose,
         "logger": root_logger,
     }
-
-
-# Attach commands methods to the main grouper
-cli_frontend.add_command(version_command, name="version")
-cli_frontend.add_command(diff_command, name="diff")
-cli_frontend.add_command(reformat_command, name="reformat")
@@ -3,9 +3,13 @@ import logging
 
 import click
 
+from ..cache import get_default_cache_dir
+from ..stats import Stats
 from ..reformat import SourceWriter
 
-from .base import COMMON_ARGS, COMMON_OPTIONS
+from .base import (
+    COMMON_ARGS, COMMON_OPTIONS, forward_to_daemon, output_stats,
+)
 
 
 @click.command()
@@ -22,8 +26,42 @@ from .base import COMMON_ARGS, COMMON_OPTIONS
     *COMMON_OPTIONS["pattern"]["args"],
     **COMMON_OPTIONS["pattern"]["kwargs"]
 )
+@click.option(
+    *COMMON_OPTIONS["exclude"]["args"],
+    **COMMON_OPTIONS["exclude"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-default-excludes"]["args"],
+    **COMMON_OPTIONS["no-default-excludes"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["jobs"]["args"],
+    **COMMON_OPTIONS["jobs"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["cache-dir"]["args"],
+    **COMMON_OPTIONS["cache-dir"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-cache"]["args"],
+    **COMMON_OPTIONS["no-cache"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["stats"]["args"],
+    **COMMON_OPTIONS["stats"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["socket"]["args"],
+    **COMMON_OPTIONS["socket"]["kwargs"]
+)
+@click.option(
+    *COMMON_OPTIONS["no-daemon"]["args"],
+    **COMMON_OPTIONS["no-daemon"]["kwargs"]
+)
 @click.pass_context
-def reformat_command(context, basepath, profile, require_pragma, pattern):
+def reformat_command(context, basepath, profile, require_pragma, pattern, exclude,
+                     no_default_excludes, jobs, cache_dir, no_cache, stats, socket,
+                     no_daemon):
     """
     Rewrite sources with applied rules fixes on discovered files.
 
@@ -32,22 +70,53 @@ def reformat_command(context, basepath, profile, require_pragma, pattern):
     """
     logger = logging.getLogger("chalumo")
 
-    cleaner = SourceWriter(
-        pragma_tag=require_pragma,
-        compatibility=profile,
-        file_search_pattern=pattern,
-    )
+    if no_cache:
+        cache_dir = None
+    elif not cache_dir:
+        cache_dir = get_default_cache_dir()
+
+    options = {
+        "pragma_tag": require_pragma,
+        "compatibility": profile,
+        "file_search_pattern": pattern,
+        "excludes": exclude,
+        "default_excludes": not no_default_excludes,
+        "jobs": jobs,
+        "cache_dir": cache_dir,
+    }
+
+    if not no_daemon:
+        code = forward_to_daemon(
+            "reformat", basepath, options, socket_path=socket, stats=stats
+        )
+        if code is not None:
+            context.exit(code)
+
+    cleaner = SourceWriter(stats=Stats() if stats else None, **options)
 
     if basepath.is_file():
         logger.info("📂 Opening single file: {}".format(basepath))
     else:
         logger.info("📂 Opening base directory: {}".format(basepath))
 
-    logger.info("🔧 Using pattern: {}".format(cleaner.file_search_pattern))
+    logger.info("🔧 Using pattern: {}".format(
+        ", ".join(cleaner.file_search_patterns)
+    ))
+
+    if cleaner.excludes:
+        logger.debug("🔧 Excludes: {}".format(", ".join(cleaner.excludes)))
 
     logger.info("🔧 Profile: {}".format(profile))
 
     if cleaner.pragma_tag:
         logger.info("🔧 Required pragma tag: {}".format(cleaner.pragma_tag))
 
+    if cleaner.cache:
+        logger.debug("🔧 Cache directory: {}".format(cleaner.cache.directory))
+
+    if cleaner.jobs > 1:
+        logger.info("🔧 Jobs: {}".format(cleaner.jobs))
+
     cleaner.run(basepath)
+
+    output_stats(cleaner.stats, stats)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import logging
+import signal
+import sys
+
+import click
+
+from ..client import forward, get_default_socket_path
+from ..server import DaemonServer
+
+from .base import COMMON_OPTIONS
+
+
+@click.command()
+@click.option(
+    *COMMON_OPTIONS["socket"]["args"],
+    **COMMON_OPTIONS["socket"]["kwargs"]
+)
+@click.option(
+    "--stop",
+    is_flag=True,
+    help="Stop the daemon which is listening on socket.",
+    default=False,
+)
+@click.pass_context
+def serve_command(context, socket, stop):
+    """
+    Start a daemon which runs commands 'check', 'diff' and 'reformat' for clients
+    over a Unix socket.
+
+    Commands forward their runs to the daemon when it is listening, it keeps
+    configured instances, caches and pools of processes warm between runs. Commands
+    run in their own process when no daemon is listening.
+    """
+    logger = logging.getLogger("chalumo")
+
+    socket = socket or get_default_socket_path()
+
+    if stop:
+        code = forward(
+            socket,
+            {"command": "shutdown"},
+            write=lambda text: click.echo(text, nl=False),
+            write_error=lambda text: click.echo(text, err=True),
+        )
+        if code is None:
+            logger.warning("No daemon is listening on: {}".format(socket))
+        else:
+            logger.info("🛑 Daemon stopped: {}".format(socket))
+        return
+
+    # Terminating the daemon stops it like an interruption so socket is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    server = DaemonServer(socket)
+
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        logger.info("🛑 Daemon interrupted")
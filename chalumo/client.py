@@ -0,0 +1,152 @@
+"""
+Daemon client
+=============
+
+Forward a command run to a daemon started with ``chalumo serve``.
+
+This module is imported by every command, so it only relies on light modules from
+standard library. When no daemon is listening on the socket, nothing is sent and the
+caller runs the command itself.
+
+Messages are JSON objects, one per line. Client sends a single request then reads
+responses until the ``exit`` message:
+
+accepted
+    The daemon has started the run. Until then, a daemon which does not respond in
+    time is considered as busy and the caller runs the command itself.
+output
+    A chunk of text to write on standard output.
+log
+    A log record from the run with its level number and message.
+refused
+    The daemon does not have the same version or registered rules than the client,
+    nothing has been run and the caller runs the command itself.
+error
+    The daemon failed to run the command, its message is output on standard error.
+exit
+    The run is over, with its exit code and statistics as text if requested.
+
+"""
+import json
+import os
+import socket
+
+from .cache import get_default_cache_dir
+
+
+# Time in seconds to wait for a daemon to connect and accept a request
+DEFAULT_TIMEOUT = 3
+
+
+def get_default_socket_path():
+    """
+    Return the default socket path for the current user.
+
+    It lives in the user cache directory, see
+    ``chalumo.cache.get_default_cache_dir``.
+
+    Returns:
+        pathlib.Path: Default socket path.
+    """
+    return get_default_cache_dir() / "daemon.sock"
+
+
+def connect(socket_path, timeout=None):
+    """
+    Connect to a daemon socket.
+
+    Arguments:
+        socket_path (pathlib.Path): Socket path.
+
+    Keyword Arguments:
+        timeout (float): Time in seconds to wait for connection, it stays set on the
+            socket for its operations. Default to wait without limit.
+
+    Returns:
+        socket.socket: Connected socket. ``None`` if no daemon is listening on this
+        path, if it is not allowed to connect or does not respond in time, or if
+        platform does not support Unix sockets.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+
+    try:
+        client.connect(str(socket_path))
+    except (
+        FileNotFoundError, ConnectionRefusedError, PermissionError, socket.timeout,
+    ):
+        client.close()
+        return None
+
+    return client
+
+
+def forward(socket_path, request, write, write_error, log=None,
+            timeout=DEFAULT_TIMEOUT):
+    """
+    Send a command request to the daemon and output its responses.
+
+    Arguments:
+        socket_path (pathlib.Path): Socket path.
+        request (dict): Request to send, it must be serializable to JSON. Paths are
+            relative to the current working directory which is sent along. A command
+            request must have the client ``version`` and ``rules`` fingerprint, it
+            may have a ``log_level`` for records to send back.
+        write (callable): Function to write a chunk of text on standard output.
+        write_error (callable): Function to write a line on standard error.
+
+    Keyword Arguments:
+        log (callable): Function to emit a log record from its level number and
+            message. Default to write messages with ``write_error``.
+        timeout (float): Time in seconds to wait for the daemon to connect and
+            accept the request. There is no limit once the run has started.
+
+    Returns:
+        integer: Command exit code. ``None`` if no daemon is listening, if it does
+        not accept the request in time or if it refused it, then command has not
+        been run.
+    """
+    client = connect(socket_path, timeout=timeout)
+
+    if client is None:
+        return None
+
+    request = dict(request, cwd=os.getcwd())
+
+    with client, client.makefile("rw", encoding="utf-8") as stream:
+        try:
+            stream.write(json.dumps(request, default=str) + "\n")
+            stream.flush()
+
+            for line in stream:
+                message = json.loads(line)
+
+                if message["type"] == "accepted":
+                    client.settimeout(None)
+                elif message["type"] == "output":
+                    write(message["text"])
+                elif message["type"] == "log":
+                    if log:
+                        log(message["level"], message["message"])
+                    else:
+                        write_error(message["message"])
+                elif message["type"] == "refused":
+                    return None
+                elif message["type"] == "error":
+                    write_error(message["message"])
+                elif message["type"] == "exit":
+                    if message.get("stats"):
+                        write_error(message["stats"])
+
+                    return message["code"]
+        # Timeout is only set until the run is accepted, so nothing has been run
+        except socket.timeout:
+            return None
+
+    # Daemon has stopped before the end of the run
+    write_error("Daemon connection has been closed before the end of the run.")
+
+    return 1
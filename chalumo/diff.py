@@ -5,11 +5,511 @@ Changes diff
 This is to make a diff output of change proposal for parsed contents against the lint
 rules.
 
+There is two diff engines:
+
+spans
+    The default engine which builds the unified diff hunks directly from the edits
+    made by the parser and a line index of original content. Only the lines touched
+    by edits are compared so it does not depend on the file size. The output is
+    always the same than ``difflib.unified_diff``. For modified contents of 200 lines
+    or more, difflib does not align contents on its most frequent lines (its
+    *autojunk* heuristic), these *popular* lines are counted from the original lines
+    and edits so the edited lines are compared the same way. An unchanged part
+    between edits which has only popular lines can not be aligned on its own so it
+    is compared along with the edits around. Contents are only compared with difflib
+    when an edited line which is not popular is found elsewhere in contents.
+
+difflib
+    The reference engine which compares the whole original and modified contents with
+    ``difflib.unified_diff``. It becomes very slow on large files with many repeated
+    lines. It is always used when the parser has no edits for a source, like when
+    a pre processor does not preserve content positions.
+
 """
+import collections
 import difflib
 
 from .discovery import SourceDiscovery
+from .exceptions import HtmlLinterException
 from .fixer import SourceFixer
+from .lines import LineIndex
+from .parser import apply_edits
+
+
+DIFF_ENGINES = ["spans", "difflib"]
+
+# Number of unchanged lines around edits which are compared with edited lines. Without
+# them an edited line could be aligned differently than difflib does when it is equal
+# to a neighbour line.
+SPAN_MARGIN_LINES = 8
+
+# Number of modified content lines from which difflib applies its autojunk heuristic
+AUTOJUNK_LINES = 200
+
+
+def get_block_edges(index, first, last, new_lines):
+    """
+    Count the unchanged lines at the start and the end of an edit block.
+
+    Arguments:
+        index (chalumo.lines.LineIndex): Line index of original source content.
+        first (integer): Index of first original line of block.
+        last (integer): Index of last original line of block.
+        new_lines (list): Modified lines of block.
+
+    Returns:
+        tuple: Number of unchanged lines at block start and at block end, they do
+        not overlap.
+    """
+    lines = index.lines
+    size = min(last - first + 1, len(new_lines))
+
+    head = 0
+    while head < size and lines[first + head] == new_lines[head]:
+        head += 1
+
+    tail = 0
+    while tail < size - head and lines[last - tail] == new_lines[-1 - tail]:
+        tail += 1
+
+    return head, tail
+
+
+def get_popular_blocks(index, blocks):
+    """
+    Find the modified content lines which difflib autojunk heuristic ignores and
+    the blocks of lines difflib compares then.
+
+    Like ``difflib.SequenceMatcher`` does, a line is popular when modified content
+    has at least 200 lines and the line is repeated more than once every hundred
+    lines.
+
+    Difflib only aligns contents on lines which are not popular, then extends the
+    alignment on equal neighbour lines. So an unchanged part of content between
+    changes is aligned in place only if it has a line which is not popular, else
+    it is compared with the changes around. Then the edited lines are only known to
+    be aligned like difflib does when their lines which are not popular are not
+    found elsewhere.
+
+    Arguments:
+        index (chalumo.lines.LineIndex): Line index of original source content.
+        blocks (list): Edit blocks without any margin lines, as returned from
+            ``get_edit_blocks``.
+
+    Returns:
+        tuple: Popular lines and blocks of lines to compare. Blocks are the given
+        ones if there is no popular line and ``None`` if alignment can not be known
+        from edits.
+    """
+    size = len(index) + sum([
+        len(new_lines) - (last - first + 1) for first, last, new_lines in blocks
+    ])
+
+    if size < AUTOJUNK_LINES:
+        return set(), blocks
+
+    lines = index.lines
+    old_counts = collections.Counter(lines)
+    new_counts = old_counts.copy()
+
+    for first, last, new_lines in blocks:
+        new_counts.subtract(lines[first:last + 1])
+        new_counts.update(new_lines)
+
+    threshold = size // 100 + 1
+    popular = {line for line, count in new_counts.items() if count > threshold}
+
+    if not popular:
+        return popular, blocks
+
+    # Blocks are merged over unchanged parts which can not be aligned, each one with
+    # its count of unchanged lines at start and end which are aligned in place
+    merged = []
+    start = 0
+
+    for first, last, new_lines in blocks:
+        head, tail = get_block_edges(index, first, last, new_lines)
+        aligned = not all([line in popular for line in lines[start:first + head]])
+
+        if aligned:
+            merged.append([first, last, list(new_lines), head, tail])
+        elif merged:
+            merged[-1][2].extend(lines[merged[-1][1] + 1:first])
+            merged[-1][2].extend(new_lines)
+            merged[-1][1] = last
+            merged[-1][4] = tail
+        else:
+            merged.append([0, last, lines[:first] + new_lines, 0, tail])
+
+        start = last + 1 - tail
+
+    if all([line in popular for line in lines[start:]]):
+        merged[-1][2].extend(lines[merged[-1][1] + 1:])
+        merged[-1][1] = len(lines) - 1
+        merged[-1][4] = 0
+
+    compared = []
+
+    for first, last, new_lines, head, tail in merged:
+        old_changed = collections.Counter(lines[first + head:last + 1 - tail])
+        new_changed = collections.Counter(new_lines[head:len(new_lines) - tail])
+
+        for line in new_changed:
+            if line not in popular and old_counts[line] > old_changed[line]:
+                return popular, None
+
+        for line in old_changed:
+            if line not in popular and new_counts[line] > new_changed[line]:
+                return popular, None
+
+        compared.append(
+            (first + head, last - tail, new_lines[head:len(new_lines) - tail])
+        )
+
+    return popular, compared
+
+
+def append_opcode(opcodes, opcode):
+    """
+    Append an opcode to a list, merging it with the previous one if they are both
+    ``equal`` like ``difflib.SequenceMatcher.get_opcodes`` does.
+
+    Arguments:
+        opcodes (list): Opcodes list to append to.
+        opcode (tuple): Opcode to append.
+    """
+    if opcodes and opcode[0] == "equal" and opcodes[-1][0] == "equal":
+        previous = opcodes[-1]
+        opcodes[-1] = ("equal", previous[1], opcode[2], previous[3], opcode[4])
+    else:
+        opcodes.append(opcode)
+
+
+def get_edit_blocks(index, edits, margin=SPAN_MARGIN_LINES):
+    """
+    Gather edits in blocks of lines.
+
+    Edited lines and their surrounding margin lines are gathered in blocks, blocks
+    which overlap or are adjacent are merged.
+
+    Arguments:
+        index (chalumo.lines.LineIndex): Line index of original source content.
+        edits (list): List of tuple ``(start, end, replacement)`` ordered by position.
+
+    Keyword Arguments:
+        margin (integer): Number of unchanged lines around edited lines.
+
+    Returns:
+        list: List of tuple ``(first, last, new_lines)`` for the index of first and
+        last original lines of each block and the modified lines of the block.
+    """
+    source = index.content
+    line_count = len(index)
+
+    # Each block is [first line, last line, new content pieces, last edit end]
+    blocks = []
+    current = None
+
+    for start, end, replacement in edits:
+        first = max(0, index.get_line_number(start) - margin)
+        last = min(
+            line_count - 1,
+            index.get_line_number(max(end - 1, start)) + margin,
+        )
+
+        if current is not None and first <= current[1] + 1:
+            current[2].append(source[current[3]:start])
+            current[2].append(replacement)
+            current[1] = max(current[1], last)
+            current[3] = end
+        else:
+            if current is not None:
+                blocks.append(current)
+            current = [
+                first,
+                last,
+                [source[index.get_line_start(first):start], replacement],
+                end,
+            ]
+
+    if current is not None:
+        blocks.append(current)
+
+    return [
+        (
+            first,
+            last,
+            "".join(pieces + [source[end:index.get_line_end(last)]]).splitlines(
+                keepends=True
+            ),
+        )
+        for first, last, pieces, end in blocks
+    ]
+
+
+def get_aligned_opcodes(index, blocks):
+    """
+    Build the line opcodes when every changed line is replaced by a single line which
+    can not be matched elsewhere.
+
+    In this case the matching of ``difflib.SequenceMatcher`` only keeps every
+    unchanged line in place, so opcodes are directly built from changed lines without
+    any comparison.
+
+    Arguments:
+        index (chalumo.lines.LineIndex): Line index of original source content.
+        blocks (list): Edit blocks as returned from ``get_edit_blocks``.
+
+    Returns:
+        list: Opcodes list, ``None`` if edits are not in this case.
+    """
+    changed = []
+
+    for first, last, new_lines in blocks:
+        if len(new_lines) != last - first + 1:
+            return None
+
+        for position, old_line, new_line in zip(
+            range(first, last + 1), index.lines[first:last + 1], new_lines
+        ):
+            if old_line != new_line:
+                changed.append((position, old_line, new_line))
+
+    old_lines = collections.Counter(index.lines)
+    removed = collections.Counter([old_line for _, old_line, _ in changed])
+
+    # A removed line must not be left elsewhere and an added line must be new
+    for old_line, count in removed.items():
+        if old_lines[old_line] != count:
+            return None
+
+    for _, _, new_line in changed:
+        if new_line in old_lines:
+            return None
+
+    opcodes = []
+    position = 0
+
+    for line, _, _ in changed:
+        # Consecutive changed lines are a single replacement
+        if opcodes and opcodes[-1][0] == "replace" and opcodes[-1][2] == line:
+            replaced = opcodes[-1][1]
+            opcodes[-1] = ("replace", replaced, line + 1, replaced, line + 1)
+        else:
+            if line > position:
+                opcodes.append(("equal", position, line, position, line))
+            opcodes.append(("replace", line, line + 1, line, line + 1))
+
+        position = line + 1
+
+    if position < len(index) or not opcodes:
+        opcodes.append(("equal", position, len(index), position, len(index)))
+
+    return opcodes
+
+
+def get_span_opcodes(index, blocks, popular=None):
+    """
+    Build the line opcodes of a source modification from its edit blocks.
+
+    Only the lines of edit blocks are compared with ``difflib.SequenceMatcher``,
+    lines between blocks are equal.
+
+    Arguments:
+        index (chalumo.lines.LineIndex): Line index of original source content.
+        blocks (list): Edit blocks as returned from ``get_edit_blocks``.
+
+    Keyword Arguments:
+        popular (set): Popular lines as returned from ``get_popular_blocks``, they
+            are not used to align edited lines.
+
+    Returns:
+        tuple: A tuple of opcodes list as returned from
+        ``difflib.SequenceMatcher.get_opcodes`` and the dictionnary of every
+        modified lines indexed on their position.
+    """
+    line_count = len(index)
+
+    # Aligned opcodes keep every unchanged line in place, this is not sure anymore
+    # when some lines are popular
+    aligned = None if popular else get_aligned_opcodes(index, blocks)
+    opcodes = []
+    modified = {}
+    a_position = b_position = 0
+
+    for first, last, new_lines in blocks:
+        if first > a_position:
+            append_opcode(opcodes, (
+                "equal", a_position, first,
+                b_position, b_position + first - a_position,
+            ))
+            b_position += first - a_position
+
+        if aligned is None:
+            matcher = difflib.SequenceMatcher(
+                None, index.lines[first:last + 1], new_lines, autojunk=False
+            )
+            # Block is too short for autojunk so popular lines are removed like
+            # difflib does on the whole content
+            for line in popular or ():
+                matcher.b2j.pop(line, None)
+
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                append_opcode(opcodes, (
+                    tag, first + i1, first + i2, b_position + j1, b_position + j2,
+                ))
+
+        for i, line in enumerate(new_lines):
+            modified[b_position + i] = line
+
+        a_position = last + 1
+        b_position += len(new_lines)
+
+    if aligned is not None:
+        return aligned, modified
+
+    if a_position < line_count or not opcodes:
+        append_opcode(opcodes, (
+            "equal", a_position, line_count,
+            b_position, b_position + line_count - a_position,
+        ))
+
+    return opcodes, modified
+
+
+def group_opcodes(opcodes, n=3):
+    """
+    Isolate change clusters by eliminating ranges with no changes.
+
+    This is the same than ``difflib.SequenceMatcher.get_grouped_opcodes``.
+
+    Arguments:
+        opcodes (list): Opcodes list.
+
+    Keyword Arguments:
+        n (integer): Number of context lines.
+
+    Returns:
+        generator: Groups of up to ``n`` lines of context.
+    """
+    codes = list(opcodes)
+
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    nn = n + n
+    group = []
+
+    for tag, i1, i2, j1, j2 in codes:
+        # End the current group and start a new one whenever there is a large range
+        # with no changes
+        if tag == "equal" and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+
+        group.append((tag, i1, i2, j1, j2))
+
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def format_range(start, stop):
+    """
+    Convert a range to the unified diff range format.
+
+    Arguments:
+        start (integer): Start line index.
+        stop (integer): Stop line index.
+
+    Returns:
+        string: Range in unified format.
+    """
+    # Per the diff spec at http://www.unix.org/single_unix_specification/
+    beginning = start + 1
+    length = stop - start
+
+    if length == 1:
+        return "{}".format(beginning)
+
+    # Empty ranges begin at line just before the range
+    if not length:
+        beginning -= 1
+
+    return "{},{}".format(beginning, length)
+
+
+def span_unified_diff(source, edits, fromfile="", tofile="", n=3):
+    """
+    Produce an unified diff from source edits.
+
+    Arguments:
+        source (string): Original source content.
+        edits (list): List of tuple ``(start, end, replacement)`` ordered by position.
+
+    Keyword Arguments:
+        fromfile (string): Original file name for diff header.
+        tofile (string): Modified file name for diff header.
+        n (integer): Number of context lines.
+
+    Returns:
+        generator: A generator to produce a list of diff output lines with the same
+        format than ``difflib.unified_diff``.
+    """
+    if not edits:
+        return
+
+    index = LineIndex(source)
+    popular, blocks = get_popular_blocks(
+        index, get_edit_blocks(index, edits, margin=0)
+    )
+
+    if blocks is None:
+        yield from difflib.unified_diff(
+            index.lines, apply_edits(source, edits).splitlines(keepends=True),
+            fromfile, tofile, n=n,
+        )
+        return
+
+    # Without popular lines, margin lines are compared to align edited lines like
+    # difflib does when they are equal to a neighbour line
+    if not popular:
+        blocks = get_edit_blocks(index, edits)
+
+    opcodes, modified = get_span_opcodes(index, blocks, popular)
+
+    started = False
+    for group in group_opcodes(opcodes, n):
+        if not started:
+            started = True
+            yield "--- {}\n".format(fromfile)
+            yield "+++ {}\n".format(tofile)
+
+        first, last = group[0], group[-1]
+        yield "@@ -{} +{} @@\n".format(
+            format_range(first[1], last[2]),
+            format_range(first[3], last[4]),
+        )
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in index.lines[i1:i2]:
+                    yield " " + line
+                continue
+
+            if tag in {"replace", "delete"}:
+                for line in index.lines[i1:i2]:
+                    yield "-" + line
+
+            if tag in {"replace", "insert"}:
+                for j in range(j1, j2):
+                    yield "+" + modified[j]
 
 
 class SourceDiff(SourceFixer, SourceDiscovery):
@@ -18,23 +518,44 @@ class SourceDiff(SourceFixer, SourceDiscovery):
 
     Keywords Arguments:
         diff_context (integer): The number of context lines to output. Default to 4.
+        diff_engine (string): The diff engine name from ``DIFF_ENGINES``. Default to
+            ``spans``.
         output_callable (callable): Function to use to output diff lines. Default to
             ``print`` function.
     """
     DIFF_CONTEXT_LINES = 4
+    DIFF_ENGINE = "spans"
 
     def __init__(self, *args, **kwargs):
         self.diff_context = self.DIFF_CONTEXT_LINES
         if "diff_context" in kwargs:
             self.diff_context = kwargs.pop("diff_context")
 
+        self.diff_engine = self.DIFF_ENGINE
+        if "diff_engine" in kwargs:
+            self.diff_engine = kwargs.pop("diff_engine")
+
+        if self.diff_engine not in DIFF_ENGINES:
+            raise HtmlLinterException(
+                "Unknown diff engine: {}".format(self.diff_engine)
+            )
+
         self.echo = print
         if "output_callable" in kwargs:
             self.echo = kwargs.pop("output_callable")
 
         super().__init__(*args, **kwargs)
 
-    def diff_source(self, filepath, from_source, to_source):
+    def __getstate__(self):
+        """
+        Output callable is only used from main process, it is removed from state.
+        """
+        state = super().__getstate__()
+        state["echo"] = None
+
+        return state
+
+    def diff_source(self, filepath, from_source, to_source, edits=None):
         """
         Produce an unified diff of source changes.
 
@@ -43,17 +564,88 @@ class SourceDiff(SourceFixer, SourceDiscovery):
             from_source (string): Original source content.
             to_source (string): Modified source content with applied fixes.
 
+        Keyword Arguments:
+            edits (list): Edits made on original source to get the modified source.
+                If given and the engine is ``spans``, the diff is built from them
+                instead of comparing the whole contents.
+
         Returns:
             generator: A generator to produce a list of diff output lines.
         """
+        if self.diff_engine == "spans" and edits is not None:
+            return self.diff_edits(filepath, from_source, edits)
+
         return difflib.unified_diff(
             from_source.splitlines(keepends=True),
             to_source.splitlines(keepends=True),
             str(filepath),
             str(filepath),
-            n=self.DIFF_CONTEXT_LINES,
+            n=self.diff_context,
+        )
+
+    def diff_edits(self, filepath, source, edits):
+        """
+        Produce an unified diff of source changes from its edits only.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+            source (string): Original source content.
+            edits (list): Edits made on original source.
+
+        Returns:
+            generator: A generator to produce a list of diff output lines.
+        """
+        return span_unified_diff(
+            source,
+            edits,
+            str(filepath),
+            str(filepath),
+            n=self.diff_context,
         )
 
+    def diff_result(self, result):
+        """
+        Produce an unified diff of a processed source.
+
+        The modified content is only rendered if the diff can not be built from the
+        edits.
+
+        Arguments:
+            result (chalumo.parser.ProcessedSource): Processed source.
+
+        Returns:
+            generator: A generator to produce a list of diff output lines.
+        """
+        if self.diff_engine == "spans" and result.edits is not None:
+            return self.diff_edits(result.filepath, result.source, result.edits)
+
+        return self.diff_source(result.filepath, result.source, result.fixed)
+
+    def diff_file(self, filepath):
+        """
+        Produce the diff output for a single file.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+
+        Returns:
+            string: The diff output, empty if there is no change. ``None`` if file is
+            not elligible.
+        """
+        result = self.fix_source(filepath)
+
+        if result is None:
+            return None
+
+        if not result.changed:
+            return ""
+
+        started = self.stats.start()
+        output = "".join(self.diff_result(result))
+        self.stats.stop("diff", started)
+
+        return output
+
     def run(self, basepath):
         """
         Output a diff of cleaning operations for all discovered files from given
@@ -62,10 +654,21 @@ class SourceDiff(SourceFixer, SourceDiscovery):
         Arguments:
             basepath (pathlib.Path): Base path where to search for sources.
         """
-        for filepath, from_source, to_source in self.apply_fixes(basepath):
-            diff_lines = list(
-                self.diff_source(filepath, from_source, to_source)
-            )
+        self.run_files(self.get_source_files(basepath))
+
+    def run_files(self, filepaths):
+        """
+        Output a diff of cleaning operations for given files.
+
+        This is used to process again only the changed files in watch mode.
+
+        Arguments:
+            filepaths (iterable): Source file paths.
+        """
+        outputs = self.map_sources("diff_file", filepaths)
+
+        for output in outputs:
+            if output:
+                self.echo(output)
 
-            if len(diff_lines) > 0:
-                self.echo("".join(diff_lines))
+        self.finish()
@@ -8,6 +8,8 @@ This implement everything to search for elligible HTML files.
 import os
 
 from .logger import BaseLogger
+from .stats import NULL_STATS
+from .walker import DEFAULT_EXCLUDES, FileWalker
 
 
 class SourceDiscovery(BaseLogger):
@@ -20,11 +22,22 @@ class SourceDiscovery(BaseLogger):
             should always use something neutral like a comment tag. In Django
             template a good choice would be ``{# djlint:on #}`` (so it will work in
             combination with djLint).
-        file_search_pattern (string): A glob pattern to use to search for files. Default
-            to ``**/*.html`` to only match HTML files. Use ``**/*.*`` if you want to
-            match many other file extensions.
+        file_search_pattern (string or list): A glob pattern or a list of glob
+            patterns to use to search for files. Default to ``**/*.html`` to only
+            match HTML files. Use ``**/*.*`` if you want to match many other file
+            extensions.
+        excludes (list): Glob patterns of files and directories to exclude from
+            search, excluded directories are never walked. They are added to the
+            default exclusions.
+        default_excludes (boolean): Enable the default exclusions from
+            ``chalumo.walker.DEFAULT_EXCLUDES``. Default to True.
+
+    Attributes:
+        stats (chalumo.stats.NullStats): Statistics to record discovery and reading
+            phases. Default to ``chalumo.stats.NULL_STATS`` which records nothing.
     """
     DEFAULT_PRAGMA_TAG = None
+    stats = NULL_STATS
     DEFAULT_FILE_SEARCH_PATTERN = "**/*.html"
 
     def __init__(self, *args, **kwargs):
@@ -32,9 +45,19 @@ class SourceDiscovery(BaseLogger):
         if "pragma_tag" in kwargs:
             self.pragma_tag = kwargs.pop("pragma_tag")
 
-        self.file_search_pattern = (
+        patterns = (
             kwargs.pop("file_search_pattern", None) or self.DEFAULT_FILE_SEARCH_PATTERN
         )
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.file_search_patterns = list(patterns)
+
+        self.excludes = []
+        if kwargs.pop("default_excludes", True):
+            self.excludes.extend(DEFAULT_EXCLUDES)
+        self.excludes.extend(kwargs.pop("excludes", None) or [])
+
+        self.walker = FileWalker(self.file_search_patterns, excludes=self.excludes)
 
         super().__init__(*args, **kwargs)
 
@@ -42,48 +65,77 @@ class SourceDiscovery(BaseLogger):
         """
         Get source file paths into given base path.
 
+        Discovered paths are yielded in a sorted order so every run processes files
+        in the same order.
+
         Arguments:
             basepath (pathlib.Path): A Path object to get files. If it's a directory,
-                the glob pattern will be used to discover files. If it's a file, the
-                glob pattern is not used.
+                the glob patterns will be used to discover files. If it's a file, the
+                glob patterns and exclusions are not used.
 
         Returns:
-            list: List of found files.
+            iterator: Iterator of found files.
         """
         if basepath.is_file():
-            return [basepath]
+            return iter([basepath])
 
-        return basepath.glob(self.file_search_pattern)
+        return self.stats.timed("discovery", self.walker.walk(basepath))
 
-    def get_source_contents(self, sources):
+    def read_source(self, source):
         """
-        Get content from allowed files.
+        Read content from a file if it is elligible.
 
         If pragma tag have been given, only files starting with it are elligible. Else
         all given files are elligible.
 
+        Arguments:
+            source (pathlib.Path): File path to read.
+
+        Returns:
+            string: The file content if elligible, else ``None``.
+        """
+        started = self.stats.start()
+
+        with source.open() as f:
+            # If pragma tag is enabled we sniff the file start for expected tag. The
+            # tag must be exactly at the very start of content, nothing before.
+            intro = None
+            if self.pragma_tag:
+                intro = os.pread(f.fileno(), len(self.pragma_tag), 0)
+
+            # Only read source with the starting pragma tag if any is defined,
+            # else every source are read
+            if not intro or intro.decode("utf-8") == self.pragma_tag:
+                content = f.read()
+
+                if self.stats.enabled:
+                    self.stats.stop("read", started)
+                    self.stats.count("bytes", os.fstat(f.fileno()).st_size)
+
+                return content
+
+        return None
+
+    def get_source_contents(self, sources):
+        """
+        Get content from allowed files.
+
+        Contents are read lazily, one file at a time, so only the file currently
+        consumed is held in memory.
+
         Allowed files must starts the possible pragma tag if defined else all given
         files are validated as elligible.
 
         Arguments:
-            sources (list): A list of Path objects for files to validate eligibility.
+            sources (iterable): An iterable of Path objects for files to validate
+                eligibility.
 
-        Returns:
-            list: List of elligible files.
+        Yields:
+            tuple: For each elligible file, a tuple of its path (``pathlib.Path``) and
+            its content (``string``).
         """
-        elligible_files = {}
-
         for source in sources:
-            with source.open() as f:
-                # If pragma tag is enabled we sniff the file start for expected tag. The
-                # tag must be exactly at the very start of content, nothing before.
-                intro = None
-                if self.pragma_tag:
-                    intro = os.pread(f.fileno(), len(self.pragma_tag), 0)
-
-                # Only collect source with the starting pragma tag if any is defined,
-                # else every source are collected
-                if not intro or intro.decode("utf-8") == self.pragma_tag:
-                    elligible_files[source] = f.read()
-
-        return elligible_files
+            content = self.read_source(source)
+
+            if content is not None:
+                yield source, content
@@ -23,6 +23,13 @@ class ParserError(HtmlLinterException):
     pass
 
 
+class RuleError(HtmlLinterException):
+    """
+    Exception to raise on rule registration or compilation.
+    """
+    pass
+
+
 class PreProcessorError(HtmlLinterException):
     """
     Exception to raise on pre processor operation.
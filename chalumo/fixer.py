@@ -5,49 +5,327 @@ Fixer
 Implement application of rules on source contents.
 
 """
+import functools
+
+from .cache import ResultCache, get_fingerprint
 from .parser import HtmlAttributeParser
+from .pool import create_executor, get_jobs_count, ordered_map
+from .rules import compile_rules
+from .stats import NULL_STATS
 
 
 class SourceFixer(HtmlAttributeParser):
     """
     Apply the parser rules on source contents.
 
+    Enabled rules are compiled once into a single normalization function.
+
     Keyword Arguments:
-        enabled_rules (list): List of parser rule names to enable for fixes. Default to
-            all available parser rules.
+        enabled_rules (list): List of rule codes to enable for fixes, they must be
+            registered in ``chalumo.rules.RULES``. Default to builtin rules.
+        jobs (integer): Number of processes to use to process files. Default to ``1``
+            which processes files in the current process. ``0`` means as many
+            processes as available CPUs. Whatever is the number of processes, results
+            are always returned in the discovery order.
+        cache_dir (pathlib.Path): Directory of the result cache. When given, the
+            sources known to be already clean are skipped. Default to ``None`` which
+            disables the cache.
+        cache_max_entries (integer): Maximum number of entries to keep in result
+            cache. Default to ``ResultCache.DEFAULT_MAX_ENTRIES``.
+        memo_size (integer): Maximum number of attribute values to keep in the
+            normalization memo which is shared by all processed files. ``0`` disables
+            the memo. Default to ``DEFAULT_MEMO_SIZE``.
+        stats (chalumo.stats.Stats): Statistics to record processing phases and
+            counters. With many jobs, statistics from worker processes are merged
+            in it. Default to ``None`` which disables statistics.
+        keep_pool (boolean): If True, the pool of processes is started on first run
+            and reused for next runs until ``close`` is called. Default to False
+            which starts a pool for each run.
     """
     DEFAULT_ENABLED_RULES = ("H050", "H051")
+    DEFAULT_MEMO_SIZE = 4096
 
     def __init__(self, *args, **kwargs):
         self.enabled_rules = self.DEFAULT_ENABLED_RULES
         if "enabled_rules" in kwargs:
             self.enabled_rules = kwargs.pop("enabled_rules")
 
+        self.jobs = get_jobs_count(kwargs.pop("jobs", None))
+
+        self.stats = kwargs.pop("stats", None) or NULL_STATS
+
+        self.keep_pool = kwargs.pop("keep_pool", False)
+        self.executor = None
+
+        self.normalizer = compile_rules(self.enabled_rules)
+
+        self.memo_size = kwargs.pop("memo_size", self.DEFAULT_MEMO_SIZE)
+        self.normalize_value = self.get_memo()
+
+        cache_dir = kwargs.pop("cache_dir", None)
+        cache_max_entries = kwargs.pop("cache_max_entries", None)
+
         super().__init__(*args, **kwargs)
 
-    def get_attribute_value(self, matchobj):
+        # Cache is initialized once every options are set since they are involved in
+        # fingerprint
+        self.cache = None
+        if cache_dir:
+            self.cache = ResultCache(
+                cache_dir,
+                get_fingerprint(self.get_fingerprint_options()),
+                max_entries=cache_max_entries,
+            )
+
+    def __getstate__(self):
+        """
+        Compiled rules, memo and pool can not be pickled, they are removed from state
+        for a copy in a worker process.
+        """
+        state = self.__dict__.copy()
+        del state["normalizer"]
+        del state["normalize_value"]
+        state["executor"] = None
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore state with compiled rules and a new empty memo.
+        """
+        self.__dict__.update(state)
+        self.normalizer = compile_rules(self.enabled_rules)
+        self.normalize_value = self.get_memo()
+
+    def get_memo(self):
+        """
+        Build the memoized normalization function.
+
+        Returns:
+            functools._lru_cache_wrapper: The compiled rules function wrapped in a
+            least recently used cache.
+        """
+        return functools.lru_cache(maxsize=self.memo_size)(self.normalizer)
+
+    def normalize(self, value):
+        """
+        Apply enabled rule changes on an attribute value.
+
+        Arguments:
+            value (string): Attribute value.
+
+        Returns:
+            string: Normalized attribute value.
+        """
+        return self.normalizer(value)
+
+    def clean_value(self, value):
         """
         Return attribute value with applyed enabled rule changes.
 
+        Normalized values are memoized so a value repeated in many files is
+        normalized only once.
+
         Arguments:
-            matchobj (re.MatchObject): The match object to get the attribute value.
-                Expect a single match group, its content must starts and ends with
-                expected attribute syntax.
+            value (string): Attribute value.
 
         Returns:
-            string: Attribute value without its leading and trailing syntax.
+            string: Normalized attribute value.
         """
-        value = super().get_attribute_value(matchobj)
+        return self.normalize_value(value)
 
-        if "H050" in self.enabled_rules:
-            items = self.apply_rule_H050(value)
-        else:
-            items = self.apply_default_split(value)
+    def get_fingerprint_options(self):
+        """
+        Return the options which have an effect on fix results.
 
-        if "H051" in self.enabled_rules:
-            items = self.apply_rule_H051(items)
+        Returns:
+            dict: Options used to compute the result cache fingerprint.
+        """
+        from . import __version__
+
+        return {
+            "version": __version__,
+            "attribute_name": self.attribute_name,
+            "enabled_rules": sorted(self.enabled_rules),
+            "compatibility": self.compatibility,
+        }
+
+    def fix_source(self, filepath):
+        """
+        Read and process a single source file.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+
+        Returns:
+            tuple: The tuple for path, original and modified content as returned from
+            ``HtmlAttributeParser.process_source`` or ``None`` if the file is not
+            elligible or known as clean from cache.
+        """
+        source = self.read_source(filepath)
+
+        if source is None or self.is_cached(filepath, source):
+            return None
+
+        return self.fix_content(filepath, source)
+
+    def is_cached(self, filepath, source):
+        """
+        Check if a source content is known as clean from cache.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+            source (string): Source content.
+
+        Returns:
+            boolean: True if content is known as clean.
+        """
+        if self.cache and self.cache.is_clean(source):
+            self.log.debug("💤 Clean from cache: {}".format(filepath))
+            return True
 
-        return " ".join(items)
+        return False
+
+    def fix_content(self, filepath, source):
+        """
+        Process a source content and remember it in cache if it is clean.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+            source (string): Source content.
+
+        Returns:
+            chalumo.parser.ProcessedSource: Processed source.
+        """
+        result = self.process_source(filepath, source)
+
+        if self.cache and not result.changed:
+            self.cache.set_clean(source)
+
+        return result
+
+    def log_memo_stats(self):
+        """
+        Output normalization memo statistics in debug log.
+
+        With many jobs, each worker process has its own memo and they are not
+        reported.
+        """
+        info = self.normalize_value.cache_info()
+        lookups = info.hits + info.misses
+
+        if lookups:
+            self.log.debug((
+                "🧠 Normalization memo: {} hits on {} lookups ({:.1%}), "
+                "{}/{} entries"
+            ).format(
+                info.hits, lookups, info.hits / lookups, info.currsize, info.maxsize
+            ))
+
+    def log_processing_paths(self):
+        """
+        Output the number of processed documents for each processing path in debug
+        log.
+        """
+        if self.processing_paths:
+            self.log.debug("🔀 Processing paths: {}".format(", ".join([
+                "{} {}".format(count, name)
+                for name, count in sorted(self.processing_paths.items())
+            ])))
+
+    def finish(self):
+        """
+        Perform ending operations once every files of a run have been processed.
+
+        Least recently used cache entries are evicted if cache is enabled and full,
+        memo statistics and processing path counters are logged.
+        """
+        if self.cache:
+            removed = self.cache.prune_if_full()
+            if removed:
+                self.log.debug("🧹 Pruned cache entries: {}".format(removed))
+
+        self.log_memo_stats()
+        self.log_processing_paths()
+
+    def collect_stats(self, job):
+        """
+        Call a per file method and collect statistics and processing path counters
+        recorded meanwhile.
+
+        This is used in worker processes to send their statistics and counters along
+        results.
+
+        Arguments:
+            job (tuple): Method name and file path to give to the method.
+
+        Returns:
+            tuple: Method result, statistics values as returned by
+            ``chalumo.stats.Stats.pop`` and processing path counters as returned by
+            ``pop_processing_paths``.
+        """
+        method_name, filepath = job
+        result = getattr(self, method_name)(filepath)
+
+        return result, self.stats.pop(), self.pop_processing_paths()
+
+    def get_executor(self):
+        """
+        Return the kept pool of processes, it is started on first call.
+
+        Worker processes receive a copy of this instance at their start, so options
+        must not be changed while the pool is kept.
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: The kept pool. ``None`` if pool
+            is not kept, then a pool is started for each run.
+        """
+        if not self.keep_pool:
+            return None
+
+        if self.executor is None:
+            self.executor = create_executor(self, self.jobs)
+
+        return self.executor
+
+    def close(self):
+        """
+        Shut down the kept pool of processes if any.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def map_sources(self, method_name, filepaths):
+        """
+        Call a per file method on every given file path.
+
+        When there is more than one job, the calls are distributed over a pool of
+        processes, each one working on its own copy of this instance.
+
+        Arguments:
+            method_name (string): Name of the method to call, it must accept a single
+                file path argument.
+            filepaths (iterable): File paths to give to the method.
+
+        Yields:
+            object: Method result for each file, in the same order than file paths.
+        """
+        if self.jobs > 1:
+            for result, values, paths in ordered_map(
+                self,
+                "collect_stats",
+                ((method_name, filepath) for filepath in filepaths),
+                self.jobs,
+                executor=self.get_executor(),
+            ):
+                self.stats.merge(values)
+                self.processing_paths.update(paths)
+                yield result
+        else:
+            method = getattr(self, method_name)
+            for filepath in filepaths:
+                yield method(filepath)
 
     def apply_fixes(self, basepath):
         """
@@ -58,11 +336,15 @@ class SourceFixer(HtmlAttributeParser):
             basepath (pathlib.Path): Base path where to search for sources.
 
         Returns:
-            list: List of tuple (for path, original and modified content) as returned
-                from ``HtmlAttributeParser.process_source``
+            iterator: Lazy iterator of tuple (for path, original and modified content)
+            as returned from ``HtmlAttributeParser.process_source``. Nothing is read
+            or processed until the iterator is consumed.
         """
-        return self.parse_sources(
-            self.get_source_contents(
+        return (
+            result
+            for result in self.map_sources(
+                "fix_source",
                 self.get_source_files(basepath)
             )
+            if result is not None
         )
@@ -0,0 +1,102 @@
+"""
+Line index
+==========
+
+An index of lines and their start offsets to resolve positions in a content.
+
+Line boundaries are the same than ``str.splitlines``.
+
+"""
+import bisect
+import itertools
+
+
+class LineIndex:
+    """
+    Index of line start offsets in a content.
+
+    Arguments:
+        content (string): Content to index.
+
+    Attributes:
+        lines (list): Every line with its line break.
+        offsets (list): Start offset of every line.
+    """
+    __slots__ = ("content", "lines", "offsets")
+
+    def __init__(self, content):
+        self.content = content
+        self.lines = content.splitlines(keepends=True)
+
+        self.offsets = [0]
+        self.offsets.extend(itertools.accumulate(map(len, self.lines)))
+        # The last offset is the content end
+        self.offsets.pop()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_line_number(self, offset):
+        """
+        Return the index of line which contains an offset.
+
+        Arguments:
+            offset (integer): Position in content.
+
+        Returns:
+            integer: Line index, starting from zero.
+        """
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def get_position(self, offset):
+        """
+        Return the human readable position of an offset.
+
+        Arguments:
+            offset (integer): Position in content.
+
+        Returns:
+            tuple: Line and column numbers, both starting from one.
+        """
+        line = self.get_line_number(offset)
+
+        return line + 1, offset - self.offsets[line] + 1
+
+    def get_line_start(self, line):
+        """
+        Return the start offset of a line.
+
+        Arguments:
+            line (integer): Line index.
+
+        Returns:
+            integer: Offset of line start.
+        """
+        return self.offsets[line]
+
+    def get_line_end(self, line):
+        """
+        Return the end offset of a line, including its line break.
+
+        Arguments:
+            line (integer): Line index.
+
+        Returns:
+            integer: Offset of line end.
+        """
+        if line + 1 < len(self.offsets):
+            return self.offsets[line + 1]
+
+        return len(self.content)
+
+    def get_line(self, line):
+        """
+        Return a line content with its line break.
+
+        Arguments:
+            line (integer): Line index.
+
+        Returns:
+            string: Line content.
+        """
+        return self.lines[line]
@@ -4,8 +4,6 @@ Logging
 """
 import logging
 
-import colorlog
-
 from . import __pkgname__
 
 
@@ -33,6 +31,8 @@ def init_logger(name, level, printout=True):
         handler = logging.StreamHandler(dummystream)
     # Standard output with colored messages
     else:
+        import colorlog
+
         handler = logging.StreamHandler()
         handler.setFormatter(
             colorlog.ColoredFormatter(
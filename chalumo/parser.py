@@ -8,11 +8,122 @@ anything in content, the parser contains everything to apply lint rules.
 Parser always expect attribute to be quoted with ``"`` since it is the way.
 
 """
-import re
-
 from .exceptions import ParserError
 from .logger import BaseLogger
 from .processors import ProcessorManager
+from .rules import RuleH050, RuleH051, default_split
+from .scanner import get_attribute_engine
+from .stats import NULL_STATS
+
+
+def apply_edits(content, edits):
+    """
+    Apply edits on a content.
+
+    Arguments:
+        content (string): Content to edit.
+        edits (list): List of tuple ``(start, end, replacement)`` ordered by
+            position.
+
+    Returns:
+        string: Edited content. If there is no edit, this is the given content
+        object.
+    """
+    if not edits:
+        return content
+
+    pieces = []
+    position = 0
+
+    for start, end, replacement in edits:
+        pieces.append(content[position:start])
+        pieces.append(replacement)
+        position = end
+
+    pieces.append(content[position:])
+
+    return "".join(pieces)
+
+
+class ProcessedSource:
+    """
+    Result of a processed source.
+
+    It stores the original content and the edits made on it, the processed content
+    is only rendered from edits when it is requested.
+
+    For compatibility a result behaves like a tuple of path, original content and
+    processed content, so it can be unpacked or indexed. Unlike a tuple it is not
+    hashable.
+
+    Arguments:
+        filepath (pathlib.Path): Source file path.
+        source (string): Original source content.
+
+    Keyword Arguments:
+        fixed (string): Processed source content. Required when edits are not given
+            else it is rendered from edits.
+        edits (list): List of tuple ``(start, end, replacement)`` for every edit made
+            on original content, ordered by position. ``None`` if edit positions are
+            not known.
+        changed (boolean): True if processed content is different from original
+            content. Default to ``None`` which means it is determined from edits or
+            from contents comparison when there is no edits.
+    """
+    __slots__ = ("filepath", "source", "edits", "changed", "_fixed")
+    # Attribute names of tuple items
+    _fields = ("filepath", "source", "fixed")
+
+    def __init__(self, filepath, source, fixed=None, edits=None, changed=None):
+        if fixed is None and edits is None:
+            raise ParserError("A processed source requires content or edits.")
+
+        self.filepath = filepath
+        self.source = source
+        self.edits = edits
+        self._fixed = fixed
+
+        if changed is None:
+            changed = bool(edits) if fixed is None else fixed != source
+
+        self.changed = changed
+
+    @property
+    def fixed(self):
+        """
+        Processed source content, rendered from edits on first access.
+
+        Returns:
+            string: Processed source content. If nothing has changed, this is the
+            original source content object.
+        """
+        if self._fixed is None:
+            self._fixed = apply_edits(self.source, self.edits)
+
+        return self._fixed
+
+    def __iter__(self):
+        return iter((self.filepath, self.source, self.fixed))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        # Only requested items are read so processed content is not rendered for
+        # path or original content
+        if isinstance(index, slice):
+            return tuple([getattr(self, name) for name in self._fields[index]])
+
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (ProcessedSource, tuple)):
+            return tuple(self) == tuple(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return "<ProcessedSource {} changed={}>".format(self.filepath, self.changed)
 
 
 class HtmlAttributeParser(ProcessorManager, BaseLogger):
@@ -22,20 +133,26 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
     Keyword Arguments:
         attribute_name (string): The attribute name to search for. Default to
             ``class``.
+        engine (string): Name of the engine to search for attributes. Default to
+            ``scanner`` which runs in linear time. ``regex`` is the reference engine.
+
+    Attributes:
+        stats (chalumo.stats.NullStats): Statistics to record processing phases.
+            Default to ``chalumo.stats.NULL_STATS`` which records nothing.
     """
+    DEFAULT_ENGINE = "scanner"
+    stats = NULL_STATS
+
     def __init__(self, *args, **kwargs):
         # Attribute name to search for in HTML, default to ``class``.
         self.attribute_name = kwargs.pop("attribute_name", None) or "class"
 
-        # Build regex for targeted attribute
-        self.attribute_pattern = r"{}=\"(?:[^\"]*)(?![^\" ])[^\"]*\"".format(
-            self.attribute_name,
-        )
         self.attribute_start = '{}="'.format(self.attribute_name)
         self.attribute_end = '"'
 
-        # Compile attribute matching regex
-        self.attribute_regex = re.compile(self.attribute_pattern)
+        # Build engine for targeted attribute
+        self.engine = kwargs.pop("engine", None) or self.DEFAULT_ENGINE
+        self.attribute_engine = get_attribute_engine(self.engine, self.attribute_name)
 
         super().__init__(*args, **kwargs)
 
@@ -54,7 +171,7 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
             list: List of splitted items from given content with all whitespace keeped
             in place.
         """
-        return content.split(" ")
+        return default_split(content)
 
     def apply_rule_H050(self, content):
         """
@@ -69,7 +186,7 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
             list: List of splitted items from given content with all whitespaces
             removed.
         """
-        return content.split()
+        return RuleH050().split(content)
 
     def apply_rule_H051(self, items):
         """
@@ -82,15 +199,7 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
         Returns:
             list: List of unique keywords.
         """
-        value = []
-
-        for item in items:
-            # Only first occurence of same keyword, empty strings and whitespaces are
-            # keeped.
-            if item == "" or item.isspace() or item not in value:
-                value.append(item)
-
-        return value
+        return RuleH051().apply(items)
 
     def get_attribute_value(self, matchobj):
         """
@@ -121,12 +230,25 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
 
         return matchobj.group(0)[len(self.attribute_start):-len(self.attribute_end)]
 
-    def attribute_cleaner(self, matchobj):
+    def clean_value(self, value):
         """
-        Return HTML attribute composed from value surrounded by attribute syntax.
+        Return a cleaned attribute value.
 
         This base method does not apply any rule on value.
 
+        Arguments:
+            value (string): Attribute value.
+
+        Returns:
+            string: Cleaned attribute value.
+        """
+        return value
+
+    def attribute_cleaner(self, matchobj):
+        """
+        Return HTML attribute composed from cleaned value surrounded by attribute
+        syntax.
+
         Arguments:
             matchobj (re.Match): The match object to get the attribute value.
 
@@ -135,10 +257,120 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
         """
         return (
             self.attribute_start +
-            self.get_attribute_value(matchobj) +
+            self.clean_value(self.get_attribute_value(matchobj)) +
             self.attribute_end
         )
 
+    def find_attributes(self, content):
+        """
+        Search for every attribute in content.
+
+        Engines only match complete attributes so the value is sliced from match
+        positions without any further check.
+
+        Arguments:
+            content (string): Content to search.
+
+        Returns:
+            list: List of tuple ``(start, end, value)`` for every attribute, ordered
+            by position.
+        """
+        head = len(self.attribute_start)
+        tail = len(self.attribute_end)
+
+        return [
+            (start, end, content[start + head:end - tail])
+            for start, end in (
+                matchobj.span()
+                for matchobj in self.attribute_engine.finditer(content)
+            )
+        ]
+
+    def clean_values(self, values):
+        """
+        Clean distinct attribute values.
+
+        Arguments:
+            values (iterable): Attribute values, possibly with duplicates.
+
+        Returns:
+            dict: Cleaned values indexed on their original value. Only the values
+            which have changed are included.
+        """
+        cleaned = {}
+
+        for value in set(values):
+            new = self.clean_value(value)
+            if new != value:
+                cleaned[value] = new
+
+        return cleaned
+
+    def clean_attributes(self, content):
+        """
+        Find and clean every attribute of a content.
+
+        Every distinct value is cleaned once with ``clean_value`` which is the hook
+        to implement cleaning. A subclass which overrides ``attribute_cleaner`` or
+        ``get_attribute_value`` has them called on every attribute match instead,
+        like it was before values were cleaned once.
+
+        Arguments:
+            content (string): Content to clean.
+
+        Returns:
+            tuple: Number of found attributes and list of tuple
+            ``(start, end, replacement)`` for every changed attribute, ordered by
+            position. Replacement includes attribute syntax.
+        """
+        overridden = [
+            getattr(type(self), name) is not getattr(HtmlAttributeParser, name)
+            for name in ("attribute_cleaner", "get_attribute_value")
+        ]
+
+        if any(overridden):
+            count = 0
+            changes = []
+
+            for matchobj in self.attribute_engine.finditer(content):
+                count += 1
+                replacement = self.attribute_cleaner(matchobj)
+                if replacement != matchobj.group(0):
+                    changes.append((matchobj.start(), matchobj.end(), replacement))
+
+            return count, changes
+
+        attributes = self.find_attributes(content)
+        cleaned = self.clean_values([value for start, end, value in attributes])
+
+        if not cleaned:
+            return len(attributes), []
+
+        replacements = {
+            value: self.attribute_start + new + self.attribute_end
+            for value, new in cleaned.items()
+        }
+
+        return len(attributes), [
+            (start, end, replacements[value])
+            for start, end, value in attributes
+            if value in replacements
+        ]
+
+    def apply_edits(self, content, edits):
+        """
+        Apply edits on a content.
+
+        Arguments:
+            content (string): Content to edit.
+            edits (list): List of tuple ``(start, end, replacement)`` ordered by
+                position.
+
+        Returns:
+            string: Edited content.
+        """
+        return apply_edits(content, edits)
+
     def process_source(self, filepath, source):
         """
         Parse a source for attribute value.
@@ -148,37 +380,80 @@ class HtmlAttributeParser(ProcessorManager, BaseLogger):
             source (string): Source content.
 
         Returns:
-            tuple: A tuple for processed source where
+            ProcessedSource: The processed source which can be unpacked as a tuple
+            where
 
             - First item is the source file path (``pathlib.Path``);
             - Second item is the original source content (``string``);
             - Third item is the result of processed content (``string``).
 
+            Its ``edits`` attribute holds every changed attribute span if the pre
+            processor preserves positions, else it is ``None``. Its ``changed``
+            attribute is False when there is no edit. When nothing has changed, the
+            processed content is the original source object.
+
         """
         self.log.info("🚀 Processing: {}".format(filepath))
 
-        return (
-            filepath,
-            source,
-            self.post_processor.render(
-                self.attribute_regex.sub(
-                    self.attribute_cleaner,
-                    self.pre_processor.render(source)
-                ),
-                self.pre_processor.payload
-            )
-        )
+        stats = self.stats
+
+        # Every document state lives in its context which is thrown away at the end
+        started = stats.start()
+        context = self.pre_processor.get_context(source)
+        stats.stop("preprocess", started)
+
+        self.count_processing_path(context)
+        content = context.content
+        preserves_offsets = self.pre_processor.preserves_offsets
+
+        # Every distinct value is cleaned once, then only changed ones are edited
+        started = stats.start()
+        count, edits = self.clean_attributes(content)
+        stats.stop("substitute", started)
+
+        started = stats.start()
+
+        # Replacements can be directly applied on source once restored
+        if preserves_offsets and edits:
+            edits = [
+                (
+                    start,
+                    end,
+                    self.post_processor.restore(replacement, start, end, context),
+                )
+                for start, end, replacement in edits
+            ]
+
+        stats.count("files")
+        stats.count("attributes", count)
+        stats.count("changed", len(edits))
+
+        # Processed content is rendered from edits only when requested
+        if preserves_offsets:
+            stats.stop("postprocess", started)
+            return ProcessedSource(filepath, source, edits=edits)
+
+        fixed = self.post_processor.render(self.apply_edits(content, edits), context)
+        stats.stop("postprocess", started)
+
+        return ProcessedSource(filepath, source, fixed, changed=bool(edits))
 
     def parse_sources(self, sources):
         """
-        Batch cleaning process on all given source contents.
+        Lazy cleaning process on all given source contents.
+
+        Each source is processed only when the next result is requested, so a
+        consumer can output or write a result and release it before the next source
+        is processed.
 
         Arguments:
-            sources (list): List of tuple for source to parse. The first tuple item is
-                the source filepath (``pathlib.Path``) and the second item is the source
-                content (``string``).
+            sources (iterable): Iterable of tuple for source to parse. The first tuple
+                item is the source filepath (``pathlib.Path``) and the second item is
+                the source content (``string``).
 
-        Returns:
-            list: Parsed and processed contents.
+        Yields:
+            tuple: Parsed and processed contents as returned from
+            ``HtmlAttributeParser.process_source``.
         """
-        return [self.process_source(k, v) for k, v in sources.items()]
+        for filepath, source in sources:
+            yield self.process_source(filepath, source)
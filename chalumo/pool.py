@@ -0,0 +1,141 @@
+"""
+Process pool
+============
+
+Implement the parallel execution of per file jobs in a pool of processes.
+
+Each worker process receives a copy of the configured instance once at its start, then
+only file paths are sent to workers and only job results are sent back.
+
+The instance is always pickled for workers, even when processes are forked, so a
+worker copy is the same whatever is the process start method and never inherits the
+state changed by the main process meanwhile.
+
+A pool is started for each run by default. A long running process can start a pool
+once with ``create_executor`` and reuse it for every run of the same instance.
+
+"""
+import collections
+import os
+import pickle
+
+
+# The instance copy owned by a worker process
+_WORKER_INSTANCE = None
+
+
+def _init_worker(payload):
+    """
+    Store the instance to use for jobs in the current worker process.
+
+    Arguments:
+        payload (bytes): The pickled configured instance to run jobs with.
+    """
+    global _WORKER_INSTANCE
+    _WORKER_INSTANCE = pickle.loads(payload)
+
+
+def _run_job(method_name, item):
+    """
+    Run a job in the current worker process.
+
+    Arguments:
+        method_name (string): Name of the instance method to call.
+        item (object): Argument given to the method.
+
+    Returns:
+        object: The method result.
+    """
+    return getattr(_WORKER_INSTANCE, method_name)(item)
+
+
+def get_jobs_count(jobs):
+    """
+    Resolve the number of jobs to use.
+
+    Arguments:
+        jobs (integer): Requested number of jobs. ``0`` means as many jobs as there are
+            available CPUs. ``None`` means a single job.
+
+    Returns:
+        integer: Number of jobs, always at least ``1``.
+    """
+    if jobs is None:
+        return 1
+
+    if jobs == 0:
+        return os.cpu_count() or 1
+
+    return max(1, jobs)
+
+
+def create_executor(instance, jobs):
+    """
+    Start a pool of processes with a copy of an instance in every worker.
+
+    Arguments:
+        instance (object): Configured instance copied in every worker process. It must
+            be picklable.
+        jobs (integer): Number of worker processes.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: The pool executor.
+    """
+    # Imported only when required since it is costly at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(pickle.dumps(instance),),
+    )
+
+
+def ordered_map(instance, method_name, items, jobs, backlog=4, executor=None):
+    """
+    Call an instance method on every item through a pool of processes and yield the
+    results in the same order than items.
+
+    Items are submitted lazily so that there is never more than ``jobs * backlog``
+    pending jobs, so memory is not bounded to the number of items.
+
+    Arguments:
+        instance (object): Configured instance copied in every worker process. It must
+            be picklable.
+        method_name (string): Name of the instance method to call on each item.
+        items (iterable): Items to give to the method.
+        jobs (integer): Number of worker processes.
+
+    Keyword Arguments:
+        backlog (integer): Number of pending jobs allowed per worker.
+        executor (concurrent.futures.ProcessPoolExecutor): A pool which has been
+            started with ``create_executor`` for the same instance. It is reused and
+            left running once done. Default to ``None`` which starts a new pool and
+            shuts it down once done.
+
+    Yields:
+        object: Method result for each item.
+    """
+    pending = collections.deque()
+    limit = jobs * backlog
+
+    owned = executor is None
+    if owned:
+        executor = create_executor(instance, jobs)
+
+    try:
+        for item in items:
+            pending.append(executor.submit(_run_job, method_name, item))
+
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Consumer may stop before the end, remaining jobs are useless
+        for future in pending:
+            future.cancel()
+
+        if owned:
+            executor.shutdown(wait=True)
@@ -12,12 +12,47 @@ HTML
     it's the default format.
 
 Django
-    Implement a pre processor to isolate every template tag and post processor to
+    Implement a pre processor to mask every template tag and post processor to
     restore them.
 
 """
+import collections
+
 from ..logger import BaseLogger
-from .django import DjangoPreProcessor, DjangoPostProcessor
+
+
+# Processing path names of a document
+PLAIN_PATH = "plain"
+TEMPLATE_PATH = "template"
+
+
+class DocumentContext:
+    """
+    Processing state of a single document.
+
+    A context is created by a pre processor for each document and given to the post
+    processor, then it is thrown away. Processors never keep any document state
+    themselves, so a processor can process many documents at the same time.
+
+    Arguments:
+        source (string): Original source content.
+        content (string): Content rendered by pre processor.
+
+    Keyword Arguments:
+        payload (object): Any data the pre processor needs to give to the post
+            processor.
+        path (string): Name of the processing path the document took, either
+            ``PLAIN_PATH`` when the document has been processed as plain HTML or
+            ``TEMPLATE_PATH`` when template syntax has been processed. Default to
+            ``PLAIN_PATH``.
+    """
+    __slots__ = ("source", "content", "payload", "path")
+
+    def __init__(self, source, content, payload=None, path=PLAIN_PATH):
+        self.source = source
+        self.content = content
+        self.payload = payload
+        self.path = path
 
 
 class DummyProcessor:
@@ -29,9 +64,28 @@ class DummyProcessor:
 
     It is also an example of exact signature a processor must implement and is expected
     from parser.
+
+    Attributes:
+        preserves_offsets (boolean): True if rendered content keeps every character
+            at the same position than in the source. In this case the post processor
+            must implement a ``restore`` method which restores a source range.
     """
+    preserves_offsets = True
+
     def __init__(self, *args, **kwargs):
-        self.payload = None
+        pass
+
+    def get_context(self, source):
+        """
+        Create the processing context of a document.
+
+        Arguments:
+            source (string): Source content.
+
+        Returns:
+            DocumentContext: Context with unchanged source content.
+        """
+        return DocumentContext(source, source)
 
     def render(self, source):
         """
@@ -43,13 +97,28 @@ class DummyProcessor:
         Returns:
             string: Unchanged source content.
         """
-        return source
+        return self.get_context(source).content
 
 
 class DummyPostProcessor:
-    def render(self, source, payload):
+    def restore(self, content, start, end, context):
         """
-        Alike DummyProcessor.render but with expected additional ``payload`` argument.
+        Return the modified content of a source range unchanged.
+
+        Arguments:
+            content (string): Modified content of source range.
+            start (integer): Source range start.
+            end (integer): Source range end.
+            context (DocumentContext): Document context from pre processor.
+
+        Returns:
+            string: Unchanged content.
+        """
+        return content
+
+    def render(self, source, context):
+        """
+        Alike DummyProcessor.render but with expected additional ``context`` argument.
         """
         return source
 
@@ -57,6 +126,11 @@ class DummyPostProcessor:
 class ProcessorManager(BaseLogger):
     """
     Implement management of pre and post processors for content.
+
+    Attributes:
+        processing_paths (collections.Counter): Number of processed documents for
+            each processing path name. With many jobs, worker processes send their
+            counters along their results, see ``pop_processing_paths``.
     """
     def __init__(self, *args, **kwargs):
         # Enable compatibility to play with a specific format.
@@ -66,17 +140,44 @@ class ProcessorManager(BaseLogger):
 
         self.set_processors(self.compatibility)
 
+        self.processing_paths = collections.Counter()
+
         super().__init__(*args, **kwargs)
 
     def set_processors(self, compatibility):
         """
         Set the right processors for enabled compatibility.
+
+        Processors for a specific format are only imported when enabled since they
+        may rely on heavy libraries.
         """
         self.pre_processor = DummyProcessor()
         self.post_processor = DummyPostProcessor()
 
         if self.compatibility == "django":
+            from .django import DjangoPreProcessor, DjangoPostProcessor
+
             self.pre_processor = DjangoPreProcessor()
-            self.post_processor = DjangoPostProcessor(
-                self.pre_processor.reference_syntax
-            )
+            self.post_processor = DjangoPostProcessor()
+
+    def count_processing_path(self, context):
+        """
+        Count the processing path taken by a document.
+
+        Arguments:
+            context (DocumentContext): Document context from pre processor.
+        """
+        self.processing_paths[context.path] += 1
+
+    def pop_processing_paths(self):
+        """
+        Return processing path counters and reset them.
+
+        Returns:
+            collections.Counter: Number of processed documents for each processing
+            path name since the last call.
+        """
+        paths = self.processing_paths
+        self.processing_paths = collections.Counter()
+
+        return paths
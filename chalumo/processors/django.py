@@ -5,150 +5,138 @@ Django processors
 These processors are required to correctly parse Django templates that contain template
 tags which may include double quotes that will disturb parser to get attribute.
 
-Django template pre-processor turns every non text parts into internal references
-so their content never provoke invalid attribute parsing from parser regex.
+Django template pre-processor masks every non text parts so their content never
+provoke invalid attribute parsing from parser regex.
 
-By "non text part" we are describing a token that is not a ``TokenType.TEXT``, this
-means template tags (both opener and closer), variable and comment (short format).
+By "non text part" we are describing a token that is not a ``TEXT`` token from
+template tokenizer, this means template tags (both opener and closer), variable and
+comment (short format). Tokenizer is the native one from
+``chalumo.processors.tokenizer`` which does not import Django.
 
-Pre processor store original replaced contents into references which can be used
-next by a Post processor to restore original contents in place.
+Each non text part is replaced with a filler of the same length, so every position in
+masked content is the same than in the source. A filler is a single character repeated
+which is never a quote or a whitespace, so a masked part is always a single word for
+the rules. Filler characters are taken from an Unicode private use area and change for
+each part, so even identical parts are never duplicates of each others.
 
-The technique here stands on substitution of original part with a tag which is a
-combination of unusual unicode characters and an identifier. Because of this, it is
-not totally safe since the unicode characters may be used in some document. However
-the used characters combination should make it almost safe.
+Since positions are preserved, the post processor restores original contents by
+copying back the original spans of source in place of their filler. Masked spans are
+stored in the document context, so processors never keep any document state.
+
+A source which already contains characters from the filler private use area can not
+be masked safely and raises an error.
+
+A source without any template tag opening delimiter can not contain any template
+syntax, so it is not tokenized at all and goes down the plain HTML path.
 """
-import uuid
+import bisect
 import re
 
-from django.template.base import (
-    Lexer, BLOCK_TAG_START, BLOCK_TAG_END, VARIABLE_TAG_START, VARIABLE_TAG_END,
-    COMMENT_TAG_START, COMMENT_TAG_END
-)
-
 from ..exceptions import PreProcessorError, PostProcessorError
+from . import DocumentContext, PLAIN_PATH, TEMPLATE_PATH
+from .tokenizer import TEXT, get_tokenizer
 
 
-class DjangoPreProcessor:
-    """
-    Store original replaced contents into references which can be used next by a post
-    processor to restore original contents in place.
-    """
-    REFERENCE_SYNTAX = ("⸦⸨⸠", "⸡⸩⸧")
+# First character of filler private use area (Supplementary Private Use Area-A)
+MASK_BASE = 0xF0000
 
-    def __init__(self):
-        self.reference_syntax = self.REFERENCE_SYNTAX
-        self.payload = {}
+# Number of available filler characters
+MASK_SIZE = 0xFFFE
 
-    def _get_unique_key(self):
-        """
-        Return an unique key built from UUID4
+MASK_CHARACTERS_REGEX = re.compile("[\U000F0000-\U000FFFFD]")
 
-        This is a convenience method mostly for tests which can monkeypatch it to
-        avoid playing with real unique random uuids.
+# Opening delimiters of variable, block and comment tags
+TEMPLATE_SYNTAX_REGEX = re.compile(r"{[%{#]")
 
-        Returns:
-            string: Unique key.
-        """
-        return str(uuid.uuid4())
-
-    def _rebuild_token_content(self, token):
-        """
-        Rebuild token content to its original form.
-
-        Django template lexer is stripping leading and trailing tag syntax, so we need
-        to add them again before to store it.
 
-        Arguments:
-            token (django.template.base.Token): Token to isolate.
+def get_mask(index, length):
+    """
+    Return the filler for a masked part.
 
-        Returns:
-            string: Rebuilded content.
-        """
-        if token.token_type.name == "VAR":
-            leading, trailing = VARIABLE_TAG_START, VARIABLE_TAG_END
-        elif token.token_type.name == "BLOCK":
-            leading, trailing = BLOCK_TAG_START, BLOCK_TAG_END
-        elif token.token_type.name == "COMMENT":
-            leading, trailing = COMMENT_TAG_START, COMMENT_TAG_END
-        else:
-            raise PreProcessorError(
-                "Unsupported token type: {}".format(token.token_type.name)
-            )
+    Arguments:
+        index (integer): Index of masked part in source.
+        length (integer): Length of masked part.
 
-        # NOTE: This does not restore the real original tag form, since it always add
-        # space between tag brackets and its content. However it's not really a real
-        # drawback since this is the way tag should be writted.
-        return leading + " " + token.contents + " " + trailing
+    Returns:
+        string: Filler.
+    """
+    return chr(MASK_BASE + index % MASK_SIZE) * length
 
-    def _isolate(self, token):
-        """
-        Isolate a non text token, aka a tag token (variable, template tag or comment).
 
-        Each isolated token content is referenced in instance attribute
-        ``DjangoPreProcessor.payload``.
+class MaskPayload:
+    """
+    Masked parts of a source.
 
-        Arguments:
-            token (django.template.base.Token): Token to isolate.
+    Arguments:
+        spans (list): List of tuple ``(start, end)`` for every masked part in source,
+            ordered by position.
 
-        Returns:
-            string: The reference tag which will replace the original content.
-        """
-        # Create unique tag identifier
-        tag_id = self._get_unique_key()
+    Attributes:
+        starts (list): Start position of every masked part, used to search for masked
+            parts in a range.
+    """
+    __slots__ = ("spans", "starts")
 
-        # Store content as a reference indexed by its tag
-        self.payload[tag_id] = self._rebuild_token_content(token)
+    def __init__(self, spans):
+        self.spans = spans
+        self.starts = [start for start, end in spans]
 
-        # Return the reference tag
-        return (
-            self.reference_syntax[0] +
-            tag_id +
-            self.reference_syntax[1]
-        )
 
-    def _resolve_item(self, token):
-        """
-        Resolve token to a simple string.
+class DjangoPreProcessor:
+    """
+    Mask non text parts with fillers of the same length.
 
-        If token is not a text token type, content will be isolated then replaced by
-        a reference tag.
+    Masked parts are stored in the document context so a pre processor does not keep
+    any state.
 
-        Arguments:
-            token (django.template.base.Token): Token to resolve to text.
-
-        Returns:
-            string: Resolved token text content.
-        """
-        if token.token_type.name == "TEXT":
-            return token.contents
+    Keyword Arguments:
+        tokenizer (string): Tokenizer name from
+            ``chalumo.processors.tokenizer.TOKENIZERS``. Default to ``native`` which
+            does not need Django.
+    """
+    preserves_offsets = True
+    TOKENIZER = "native"
 
-        return self._isolate(token)
+    def __init__(self, *args, **kwargs):
+        self.tokenizer = get_tokenizer(kwargs.pop("tokenizer", self.TOKENIZER))
 
-    def process(self, source):
+    def get_context(self, source):
         """
-        Process to non text parts isolation.
-
-        Don't try to use ``render`` method after this one since the reference ids will
-        never be the same twice.
+        Create the processing context of a document with non text parts masked.
 
         Arguments:
             source (string): Source content to process.
 
         Returns:
-            list: List of resolved token as strings.
+            chalumo.processors.DocumentContext: Context with masked content and a
+            ``MaskPayload`` payload. A source without template syntax is returned
+            unchanged with an empty payload.
         """
-        tokens = Lexer(source).tokenize()
+        if not TEMPLATE_SYNTAX_REGEX.search(source):
+            return DocumentContext(source, source, MaskPayload([]), path=PLAIN_PATH)
+
+        if MASK_CHARACTERS_REGEX.search(source):
+            raise PreProcessorError(
+                "Source contains characters reserved to mask template tags."
+            )
+
+        spans = []
+        parts = []
 
-        return [self._resolve_item(token) for token in tokens]
+        for token_type, start, end in self.tokenizer.tokenize(source):
+            if token_type == TEXT:
+                parts.append(source[start:end])
+            else:
+                parts.append(get_mask(len(spans), end - start))
+                spans.append((start, end))
+
+        return DocumentContext(
+            source, "".join(parts), MaskPayload(spans), path=TEMPLATE_PATH
+        )
 
     def render(self, source):
         """
-        Render processed content with isolated parts.
-
-        Don't try to use ``process`` method after this one since the reference ids will
-        never be the same twice.
+        Render content with masked parts.
 
         Arguments:
             source (string): Source content to process.
@@ -156,56 +144,73 @@ class DjangoPreProcessor:
         Returns:
             string: Rendered content.
         """
-        return "".join(self.process(source))
+        return self.get_context(source).content
 
 
 class DjangoPostProcessor:
     """
-    Restore original isolated content in place of their reference.
+    Restore original content in place of masked parts.
     """
-    def __init__(self, reference_syntax):
-        self.payload = None
-        self.reference_syntax = reference_syntax
-        self.reference_pattern = r"({start}).+?({end})".format(
-            start=self.reference_syntax[0],
-            end=self.reference_syntax[1],
-        )
-        self.reference_regex = re.compile(self.reference_pattern)
+    def __init__(self, *args, **kwargs):
+        pass
 
-    def _reference_restorer(self, matchobj):
+    def restore(self, content, start, end, context):
         """
-        Return isolated reference content.
+        Restore masked parts of a source range in its modified content.
+
+        Masked parts are searched in their order, each one from the end of the previous
+        one.
 
         Arguments:
-            matchobj (re.Match): The match object to get the reference ID to get
-                its content from store in ``payload`` attribute.
+            content (string): Modified content of source range.
+            start (integer): Source range start.
+            end (integer): Source range end.
+            context (chalumo.processors.DocumentContext): Document context as created
+                from pre processor.
 
         Returns:
-            string: Reference content.
+            string: Content with original parts restored.
         """
-        # Remove tag syntax from matched content
-        tag_id = matchobj.group(0)
-        tag_id = tag_id[len(self.reference_syntax[0]):-len(self.reference_syntax[1])]
-
-        if tag_id not in self.payload:
-            # Better exception with a message
-            raise PostProcessorError(
-                "Found unknow reference identifier: {}".format(tag_id)
-            )
+        payload = context.payload
+        first = bisect.bisect_left(payload.starts, start)
+        last = bisect.bisect_left(payload.starts, end)
+
+        if first == last:
+            return content
+
+        parts = []
+        position = 0
+
+        for index in range(first, last):
+            span_start, span_end = payload.spans[index]
+            mask = get_mask(index, span_end - span_start)
+
+            found = content.find(mask, position)
+            if found == -1:
+                raise PostProcessorError(
+                    "Unable to find masked content at position {}: {}".format(
+                        span_start, context.source[span_start:span_end],
+                    )
+                )
+
+            parts.append(content[position:found])
+            parts.append(context.source[span_start:span_end])
+            position = found + len(mask)
+
+        parts.append(content[position:])
 
-        return self.payload[tag_id]
+        return "".join(parts)
 
-    def render(self, source, payload):
+    def render(self, source, context):
         """
-        Render processed content with isolated parts.
+        Render processed content with masked parts restored.
 
         Arguments:
             source (string): Source content to process.
-            payload (dict): Reference store as created in ``DjangoPreProcessor``
-                instance attribute.
+            context (chalumo.processors.DocumentContext): Document context as created
+                from pre processor.
 
         Returns:
             string: Rendered content.
         """
-        self.payload = payload
-        return self.reference_regex.sub(self._reference_restorer, source)
+        return self.restore(source, 0, len(context.source), context)
@@ -0,0 +1,133 @@
+"""
+Template tokenizers
+===================
+
+Tokenizers split a Django template into text and non text tokens. Only the tag
+boundaries are searched, tag contents are never parsed.
+
+Each tokenizer implements the same interface, a ``tokenize`` method which yields a
+tuple ``(token_type, start, end)`` for every token where ``token_type`` is one of
+``TEXT``, ``VAR``, ``BLOCK`` or ``COMMENT``.
+
+native
+    The default tokenizer which does not depend on Django. It produces the same
+    segmentation than the Django lexer, including verbatim blocks whose content is
+    text.
+
+django
+    The reference tokenizer using the Django template lexer. It requires Django
+    which is only imported when used.
+
+"""
+import re
+
+from ..exceptions import PreProcessorError
+
+
+# Token types with the same names than "django.template.base.TokenType"
+TEXT = "TEXT"
+VAR = "VAR"
+BLOCK = "BLOCK"
+COMMENT = "COMMENT"
+
+# Same pattern than the Django template lexer, a tag never spans many lines
+TAG_REGEX = re.compile(r"{%.*?%}|{{.*?}}|{#.*?#}")
+
+
+class TemplateTokenizer:
+    """
+    Tokenize a template without Django.
+    """
+    def tokenize(self, source):
+        """
+        Split a template into tokens.
+
+        Consecutive text parts are yielded as a single text token.
+
+        Arguments:
+            source (string): Template content.
+
+        Yields:
+            tuple: Token type, start and end positions.
+        """
+        position = 0
+        verbatim = None
+
+        for matchobj in TAG_REGEX.finditer(source):
+            tag = matchobj.group(0)
+            kind = tag[1]
+
+            if kind == "%":
+                content = tag[2:-2].strip()
+
+                # Every tag is text in a verbatim block until its closing tag
+                if verbatim:
+                    if content != verbatim:
+                        continue
+                    verbatim = None
+                elif content[:9] in ("verbatim", "verbatim "):
+                    verbatim = "end" + content
+
+                token_type = BLOCK
+            elif verbatim:
+                continue
+            elif kind == "{":
+                token_type = VAR
+            else:
+                token_type = COMMENT
+
+            start, end = matchobj.span()
+
+            if start > position:
+                yield TEXT, position, start
+
+            yield token_type, start, end
+            position = end
+
+        if position < len(source):
+            yield TEXT, position, len(source)
+
+
+class DjangoLexerTokenizer:
+    """
+    Tokenize a template with the Django template lexer.
+    """
+    def tokenize(self, source):
+        """
+        Split a template into tokens.
+
+        Arguments:
+            source (string): Template content.
+
+        Yields:
+            tuple: Token type, start and end positions.
+        """
+        # Imported only when required since it loads a lot of Django
+        from django.template.base import DebugLexer
+
+        for token in DebugLexer(source).tokenize():
+            start, end = token.position
+            yield token.token_type.name, start, end
+
+
+# Available tokenizers indexed on their name
+TOKENIZERS = {
+    "native": TemplateTokenizer,
+    "django": DjangoLexerTokenizer,
+}
+
+
+def get_tokenizer(name):
+    """
+    Build a tokenizer.
+
+    Arguments:
+        name (string): Tokenizer name from ``TOKENIZERS``.
+
+    Returns:
+        object: Tokenizer instance.
+    """
+    if name not in TOKENIZERS:
+        raise PreProcessorError("Unknown template tokenizer: {}".format(name))
+
+    return TOKENIZERS[name]()
@@ -4,7 +4,17 @@ Reformat
 
 Implement rewriting source content with rules applications.
 
+Only changed sources are rewritten. A source is written to a temporary file in the
+same directory which is then renamed to the source path, so a source is never left
+partially written. A source which has been modified since it has been read is not
+rewritten, this is detected from its modification time, size and inode without
+reading it again.
+
 """
+import os
+import stat
+import tempfile
+
 from .discovery import SourceDiscovery
 from .fixer import SourceFixer
 
@@ -14,15 +24,112 @@ class SourceWriter(SourceFixer, SourceDiscovery):
     Rewrite sources with applyed rules fixes.
     """
 
-    def run(self, basepath):
+    def get_file_state(self, filepath):
+        """
+        Return the state of a file which changes when it is written or replaced.
+
+        Arguments:
+            filepath (pathlib.Path): File path.
+
+        Returns:
+            tuple: Modification time in nanoseconds, size and inode number.
+        """
+        stat_result = os.stat(filepath)
+
+        return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+    def is_modified(self, filepath, state):
+        """
+        Check if a file has been modified since its state has been taken.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+            state (tuple): File state as returned by ``get_file_state`` when it has
+                been read.
+
+        Returns:
+            boolean: True if file has changed or does not exist anymore.
+        """
+        try:
+            return self.get_file_state(filepath) != state
+        except FileNotFoundError:
+            return True
+
+    def write_atomic(self, filepath, content):
+        """
+        Write content to a file through a temporary file renamed into place.
+
+        The file permissions are keeped. A symbolic link is kept too, its target
+        file is written instead.
+
+        Arguments:
+            filepath (pathlib.Path): File path to write.
+            content (string): Content to write.
         """
-        Produce a diff of cleaning operation for all allowed files in given basepath.
+        filepath = filepath.resolve()
+        mode = stat.S_IMODE(filepath.stat().st_mode)
+
+        fd, temporary = tempfile.mkstemp(
+            dir=str(filepath.parent),
+            prefix=".{}.".format(filepath.name),
+            suffix=".tmp",
+        )
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
 
-        Diff output mentions file paths as relative to the basepath.
+            os.chmod(temporary, mode)
+            os.replace(temporary, str(filepath))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def write_file(self, filepath):
+        """
+        Rewrite a single file with applied rules fixes.
+
+        Arguments:
+            filepath (pathlib.Path): Source file path.
+
+        Returns:
+            pathlib.Path: The rewritten file path or ``None`` if file is not
+            elligible, unchanged or has been modified since it has been read.
+        """
+        # State is taken before reading so a change made while reading is detected
+        state = self.get_file_state(filepath)
+        source = self.read_source(filepath)
+
+        if source is None or self.is_cached(filepath, source):
+            return None
+
+        result = self.fix_content(filepath, source)
+
+        if not result.changed:
+            self.log.debug("💤 Unchanged: {}".format(filepath))
+            return None
+
+        if self.is_modified(filepath, state):
+            self.log.warning(
+                "⚠️ Skipped file modified since it has been read: {}".format(filepath)
+            )
+            return None
+
+        self.log.debug("🚀 Write reformating: {}".format(filepath))
+        started = self.stats.start()
+        self.write_atomic(filepath, result.fixed)
+        self.stats.stop("write", started)
+
+        return filepath
+
+    def run(self, basepath):
+        """
+        Rewrite all allowed files in given basepath.
 
         Arguments:
             basepath (pathlib.Path): Base path where to search for sources.
         """
-        for filepath, from_source, to_source in self.apply_fixes(basepath):
-            self.log.debug("🚀 Write reformating: {}".format(filepath))
-            filepath.write_text(to_source)
+        for filepath in self.map_sources("write_file", self.get_source_files(basepath)):
+            pass
+
+        self.finish()
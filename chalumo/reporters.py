@@ -0,0 +1,261 @@
+"""
+Reporters
+=========
+
+Reporters stream machine readable records of checked files as soon as each file
+has been checked, so nothing has to be parsed back from the human readable output.
+
+Every reporter writes to a text stream, like an opened file or the standard output,
+and relies on its buffering.
+
+jsonl
+    JSON Lines, one ``violation`` record per violation followed by one ``file``
+    record per checked file, then a ``summary`` record at the end.
+
+sarif
+    A SARIF 2.1.0 document with a single run. Results are written one at a time as
+    they come, checked files are listed as artifacts with their counts and timings.
+
+"""
+import json
+
+from .exceptions import HtmlLinterException
+from .rules import RULES
+
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+class FileReport:
+    """
+    Report of a checked file.
+
+    Arguments:
+        filepath (pathlib.Path): Source file path.
+        violations (list): List of ``chalumo.check.Violation`` objects.
+        size (integer): Source size in bytes.
+        duration (float): Time spent to check the file in seconds.
+
+    Keyword Arguments:
+        cached (boolean): True if file has not been checked because its content is
+            known as clean from cache. Default to False.
+    """
+    __slots__ = ("filepath", "violations", "size", "duration", "cached")
+
+    def __init__(self, filepath, violations, size, duration, cached=False):
+        self.filepath = filepath
+        self.violations = violations
+        self.size = size
+        self.duration = duration
+        self.cached = cached
+
+
+class BaseReporter:
+    """
+    Base reporter which counts reported files and violations.
+
+    Arguments:
+        stream (io.TextIOBase): Stream to write records to.
+
+    Keyword Arguments:
+        rules (list): Enabled rule codes. Default to every registered rule.
+
+    Attributes:
+        files (integer): Number of reported files.
+        violations (integer): Number of reported violations.
+        size (integer): Total size of reported files in bytes.
+        duration (float): Total time spent to check reported files in seconds.
+    """
+    def __init__(self, stream, rules=None):
+        self.stream = stream
+        self.rules = rules or list(RULES)
+        self.files = 0
+        self.violations = 0
+        self.size = 0
+        self.duration = 0.0
+
+    def start(self):
+        """
+        Write what comes before any file record.
+        """
+        pass
+
+    def report_file(self, report):
+        """
+        Count a file report.
+
+        Arguments:
+            report (FileReport): Report of a checked file.
+        """
+        self.files += 1
+        self.violations += len(report.violations)
+        self.size += report.size
+        self.duration += report.duration
+
+    def finish(self):
+        """
+        Write what comes after every file records and flush stream.
+        """
+        self.stream.flush()
+
+
+class JsonLinesReporter(BaseReporter):
+    """
+    Write records as JSON Lines.
+    """
+    def write_record(self, record):
+        """
+        Write a record on its own line.
+
+        Arguments:
+            record (dict): Record to write.
+        """
+        self.stream.write(json.dumps(record))
+        self.stream.write("\n")
+
+    def report_file(self, report):
+        super().report_file(report)
+
+        path = str(report.filepath)
+
+        for violation in report.violations:
+            self.write_record({
+                "type": "violation",
+                "path": path,
+                "line": violation.line,
+                "column": violation.column,
+                "code": violation.code,
+                "message": RULES[violation.code].description,
+            })
+
+        self.write_record({
+            "type": "file",
+            "path": path,
+            "violations": len(report.violations),
+            "size": report.size,
+            "duration": report.duration,
+            "cached": report.cached,
+        })
+
+    def finish(self):
+        self.write_record({
+            "type": "summary",
+            "files": self.files,
+            "violations": self.violations,
+            "size": self.size,
+            "duration": self.duration,
+        })
+
+        super().finish()
+
+
+class SarifReporter(BaseReporter):
+    """
+    Write a SARIF document.
+
+    The document is written in pieces, its results array is opened at start and
+    closed at finish. Artifacts are only a few fields per file, they are keeped until
+    finish to be written after results. Enabled rules are described in tool.
+    """
+    def __init__(self, *args, **kwargs):
+        self.artifacts = []
+        self.separator = ""
+
+        super().__init__(*args, **kwargs)
+
+    def start(self):
+        from . import __version__
+
+        driver = {
+            "name": "chalumo",
+            "version": __version__,
+            "informationUri": "https://github.com/sveetch/chalumo",
+            "rules": [
+                {
+                    "id": code,
+                    "shortDescription": {"text": RULES[code].description},
+                }
+                for code in self.rules
+            ],
+        }
+
+        self.stream.write(
+            '{{"version": "2.1.0", "$schema": {}, "runs": [{{"tool": {{"driver": '
+            '{}}}, "columnKind": "unicodeCodePoints", "results": ['.format(
+                json.dumps(SARIF_SCHEMA), json.dumps(driver),
+            )
+        )
+
+    def report_file(self, report):
+        uri = report.filepath.as_posix()
+
+        for violation in report.violations:
+            self.stream.write(self.separator)
+            self.separator = ", "
+
+            self.stream.write(json.dumps({
+                "ruleId": violation.code,
+                "level": "error",
+                "message": {"text": RULES[violation.code].description},
+                "locations": [{
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": uri},
+                        "region": {
+                            "startLine": violation.line,
+                            "startColumn": violation.column,
+                        },
+                    },
+                }],
+            }))
+
+        self.artifacts.append({
+            "location": {"uri": uri},
+            "length": report.size,
+            "properties": {
+                "violations": len(report.violations),
+                "duration": report.duration,
+                "cached": report.cached,
+            },
+        })
+
+        super().report_file(report)
+
+    def finish(self):
+        self.stream.write('], "artifacts": {}, "properties": {}}}]}}\n'.format(
+            json.dumps(self.artifacts),
+            json.dumps({
+                "files": self.files,
+                "violations": self.violations,
+                "size": self.size,
+                "duration": self.duration,
+            }),
+        ))
+
+        super().finish()
+
+
+# Available reporters indexed on their format name
+REPORTERS = {
+    "jsonl": JsonLinesReporter,
+    "sarif": SarifReporter,
+}
+
+
+def get_reporter(name, stream, **kwargs):
+    """
+    Build a reporter.
+
+    Arguments:
+        name (string): Reporter format name from ``REPORTERS``.
+        stream (io.TextIOBase): Stream to write records to.
+
+    Keyword Arguments:
+        **kwargs: Other arguments given to the reporter class.
+
+    Returns:
+        BaseReporter: Reporter instance.
+    """
+    if name not in REPORTERS:
+        raise HtmlLinterException("Unknown report format: {}".format(name))
+
+    return REPORTERS[name](stream, **kwargs)
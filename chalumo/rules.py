@@ -0,0 +1,394 @@
+"""
+Rules
+=====
+
+Lint rules are declared in a registry so the parser does not have to know about them,
+every registered rule can be enabled from its code.
+
+There is currently two available rules:
+
+H050
+    Only a single whitespace separator and no leading or trailing whitespace. Also
+    whitespace separator is allways a single space, not a linebreak, tabulation or
+    other ones.
+H051
+    No duplicate keyword is allowed.
+
+A rule is either a *splitter* which defines how a value is split into items, or a
+*filter* which changes the list of items. When no splitter rule is enabled, values are
+split on single spaces so every whitespace is keeped in place.
+
+Enabled rules are compiled once into a single normalization function. When every
+enabled rule implements a validator, a value which is already canonical is returned
+as it is without being rebuilt. Enabled rules can also be compiled into a checker
+function which tells which rules a value violates.
+
+Third party rules can be registered with the ``register_rule`` decorator: ::
+
+    from chalumo.rules import BaseRule, register_rule
+
+    @register_rule
+    class Sorted(BaseRule):
+        code = "X001"
+        description = "Keywords are sorted."
+
+        def apply(self, items):
+            return sorted(items)
+
+Then they can be enabled from their code like builtin rules.
+"""
+import hashlib
+import json
+import re
+
+from .exceptions import RuleError
+
+
+# Registered rule classes indexed on their code, registration order is the
+# order in which filter rules are applied
+RULES = {}
+
+
+def register_rule(rule_class):
+    """
+    Register a rule class.
+
+    This can be used as a class decorator. Registering a rule with an already
+    registered code replaces the previous one.
+
+    Arguments:
+        rule_class (BaseRule): Rule class to register.
+
+    Returns:
+        BaseRule: The given rule class unchanged.
+    """
+    if not rule_class.code:
+        raise RuleError(
+            "Rule class must define a code: {}".format(rule_class.__name__)
+        )
+
+    RULES[rule_class.code] = rule_class
+
+    return rule_class
+
+
+def default_split(value):
+    """
+    Split value on single spaces but don't remove duplicate, leading and trailing
+    whitespaces.
+
+    This is the fallback when no splitter rule is enabled.
+
+    Arguments:
+        value (string): Attribute value.
+
+    Returns:
+        list: List of splitted items from given value with all whitespace keeped in
+        place.
+    """
+    return value.split(" ")
+
+
+class BaseRule:
+    """
+    Base rule which does not change anything.
+
+    Attributes:
+        code (string): Unique rule code used to enable it.
+        description (string): Short rule description.
+        splitter (boolean): If True the rule defines how to split a value with its
+            ``split`` method, else the rule changes items with its ``apply`` method.
+        validator (boolean): If True the rule implements the ``validate`` method to
+            check a value is already canonical.
+    """
+    code = None
+    description = ""
+    splitter = False
+    validator = False
+
+    def split(self, value):
+        """
+        Split a value into items.
+
+        Arguments:
+            value (string): Attribute value.
+
+        Returns:
+            list: List of items.
+        """
+        return default_split(value)
+
+    def apply(self, items):
+        """
+        Apply rule on items.
+
+        Arguments:
+            items (list): List of splitted items from attribute value.
+
+        Returns:
+            list: List of items.
+        """
+        return items
+
+    def validate(self, value, items):
+        """
+        Check if a value is canonical, meaning the rule would not change it.
+
+        Arguments:
+            value (string): Attribute value.
+            items (list): List of splitted items from attribute value with the
+                enabled splitter. A splitter rule is validated before value is
+                split so it always gets ``None``.
+
+        Returns:
+            boolean: True if value is canonical.
+        """
+        return False
+
+
+@register_rule
+class RuleH050(BaseRule):
+    code = "H050"
+    description = (
+        "Only a single whitespace separator and no leading or trailing whitespace."
+    )
+    splitter = True
+    validator = True
+    # Items without any whitespace separated by single spaces
+    canonical = re.compile(r"(?:\S+(?: \S+)*)?")
+
+    def split(self, value):
+        """
+        Split on any whitespace and remove them.
+
+        Arguments:
+            value (string): Attribute value.
+
+        Returns:
+            list: List of splitted items from given value with all whitespaces
+            removed.
+        """
+        return value.split()
+
+    def validate(self, value, items):
+        """
+        Check value items are only separated by single spaces.
+
+        Value is checked without being split. Every whitespace except the space is
+        a non printable character, so for a printable value it is enough to look
+        for consecutive spaces or leading and trailing space.
+
+        Arguments:
+            value (string): Attribute value.
+            items (list): Not used since a splitter rule is validated before value
+                is split, it is always ``None``.
+
+        Returns:
+            boolean: True if value is canonical.
+        """
+        if value.isprintable():
+            return "  " not in value and value[:1] != " " and value[-1:] != " "
+
+        return self.canonical.fullmatch(value) is not None
+
+
+@register_rule
+class RuleH051(BaseRule):
+    code = "H051"
+    description = "No duplicate keyword is allowed."
+    validator = True
+
+    def apply(self, items):
+        """
+        Remove duplicate keywords in a single pass, keeping the first occurence of
+        each keyword in place. Empty strings and whitespaces are always keeped.
+
+        Arguments:
+            items (list): List of splitted items from attribute value.
+
+        Returns:
+            list: List of unique keywords.
+        """
+        seen = set()
+        value = []
+
+        for item in items:
+            if item == "" or item.isspace():
+                value.append(item)
+            elif item not in seen:
+                seen.add(item)
+                value.append(item)
+
+        return value
+
+    def validate(self, value, items):
+        """
+        Check there is no duplicate keyword.
+
+        Arguments:
+            value (string): Attribute value.
+            items (list): List of splitted items from attribute value.
+
+        Returns:
+            boolean: True if value is canonical.
+        """
+        if len(set(items)) == len(items):
+            return True
+
+        # Only empty strings and whitespaces are allowed to be repeated
+        keywords = [item for item in items if item and not item.isspace()]
+
+        return len(set(keywords)) == len(keywords)
+
+
+def get_rules(codes):
+    """
+    Get rule instances for given codes in registration order.
+
+    Arguments:
+        codes (iterable): Rule codes.
+
+    Returns:
+        list: List of rule instances.
+    """
+    codes = set(codes)
+
+    unknown = codes.difference(RULES)
+    if unknown:
+        raise RuleError("Unknown rule codes: {}".format(", ".join(sorted(unknown))))
+
+    return [
+        rule_class()
+        for code, rule_class in RULES.items()
+        if code in codes
+    ]
+
+
+def get_rules_fingerprint():
+    """
+    Compute a fingerprint of registered rules.
+
+    Two processes with the same fingerprint have registered the same rule classes in
+    the same order.
+
+    Returns:
+        string: Hexadecimal digest of registered rule codes and classes.
+    """
+    registry = [
+        [code, rule_class.__module__, rule_class.__qualname__]
+        for code, rule_class in RULES.items()
+    ]
+
+    return hashlib.sha256(json.dumps(registry).encode("utf-8")).hexdigest()
+
+
+def get_splitter(rules):
+    """
+    Get the splitter rule from rule instances.
+
+    Arguments:
+        rules (list): List of rule instances.
+
+    Returns:
+        BaseRule: The splitter rule instance or ``None`` if there is none.
+    """
+    splitters = [rule for rule in rules if rule.splitter]
+    if len(splitters) > 1:
+        raise RuleError(
+            "Only one splitter rule can be enabled: {}".format(
+                ", ".join([rule.code for rule in splitters])
+            )
+        )
+
+    return splitters[0] if splitters else None
+
+
+def compile_rules(codes):
+    """
+    Compile enabled rules into a single normalization function.
+
+    When every enabled rule is a validator, a canonical value is returned as it is.
+
+    Arguments:
+        codes (iterable): Enabled rule codes.
+
+    Returns:
+        callable: A function which takes an attribute value and returns the
+        normalized value.
+    """
+    rules = get_rules(codes)
+    splitter = get_splitter(rules)
+
+    split = splitter.split if splitter else default_split
+    filters = tuple([rule.apply for rule in rules if not rule.splitter])
+
+    def rebuild(items):
+        for apply in filters:
+            items = apply(items)
+        return " ".join(items)
+
+    if any([not rule.validator for rule in rules]):
+        def normalize(value):
+            return rebuild(split(value))
+
+        return normalize
+
+    validators = tuple([rule.validate for rule in rules if not rule.splitter])
+    # Splitter is validated on value alone so value is only split when it is not
+    # canonical or when a filter rule needs the items to be validated
+    validate_split = splitter.validate if splitter else None
+
+    def normalize(value):
+        if validate_split is not None and not validate_split(value, None):
+            return rebuild(split(value))
+
+        if validators:
+            items = split(value)
+            for validate in validators:
+                if not validate(value, items):
+                    return rebuild(items)
+
+        return value
+
+    return normalize
+
+
+def compile_checker(codes):
+    """
+    Compile enabled rules into a single function which tells which rules a value
+    violates.
+
+    Rules are checked in the same order than they are applied to normalize a value,
+    a rule is violated if it changes the value or the items left by previous rules.
+
+    Arguments:
+        codes (iterable): Enabled rule codes.
+
+    Returns:
+        callable: A function which takes an attribute value and returns the list of
+        violated rule codes.
+    """
+    rules = get_rules(codes)
+    splitter = get_splitter(rules)
+
+    split = splitter.split if splitter else default_split
+    filters = tuple([
+        (rule.code, rule.apply) for rule in rules if not rule.splitter
+    ])
+
+    def check(value):
+        violations = []
+        items = split(value)
+
+        if splitter and " ".join(items) != value:
+            violations.append(splitter.code)
+
+        for code, apply in filters:
+            applied = apply(items)
+            if applied != items:
+                violations.append(code)
+            items = applied
+
+        return violations
+
+    return check
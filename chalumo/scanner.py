@@ -0,0 +1,105 @@
+"""
+Attribute scanners
+==================
+
+Scanner engines search for attributes in a content. Each engine implements the same
+interface, a ``finditer`` method which yields ``re.Match`` objects and a ``sub`` method
+which returns a content where every match has been replaced.
+
+regex
+    The reference engine which is a regular expression. Its pattern can backtrack
+    badly when an attribute quote is never closed, making it quadratic on such
+    content.
+
+scanner
+    The default engine which runs in linear time and produces exactly the same matches
+    than the reference engine.
+
+"""
+import re
+
+from .exceptions import ParserError
+
+
+class RegexAttributeEngine:
+    """
+    The reference engine using a regular expression.
+
+    Arguments:
+        attribute_name (string): The attribute name to search for.
+    """
+    def __init__(self, attribute_name):
+        self.attribute_pattern = r"{}=\"(?:[^\"]*)(?![^\" ])[^\"]*\"".format(
+            attribute_name,
+        )
+        self.attribute_regex = re.compile(self.attribute_pattern)
+
+    def finditer(self, source):
+        """
+        Search for attributes in content.
+
+        Arguments:
+            source (string): Content to search.
+
+        Returns:
+            iterator: Match objects for every found attribute.
+        """
+        return self.attribute_regex.finditer(source)
+
+    def sub(self, repl, source):
+        """
+        Replace every found attribute in content.
+
+        Arguments:
+            repl (callable): Function which receives a match object and returns its
+                replacement.
+            source (string): Content to search.
+
+        Returns:
+            string: Content with replaced attributes.
+        """
+        return self.attribute_regex.sub(repl, source)
+
+
+class ScannerAttributeEngine(RegexAttributeEngine):
+    """
+    An engine running in linear time whatever is the content.
+
+    An attribute starts with its name followed by ``="`` and ends with the next double
+    quote. This is scanned with a single greedy character class and no lookahead, so
+    an attempt never backtracks more than the characters it consumed. Also once an
+    attribute start has no closing quote there is no closing quote at all in the
+    remaining content, so there is at most one failed attempt on a content.
+
+    The attribute name is escaped so it is always matched literally.
+
+    Arguments:
+        attribute_name (string): The attribute name to search for.
+    """
+    def __init__(self, attribute_name):
+        self.attribute_pattern = r"{}=\"[^\"]*\"".format(re.escape(attribute_name))
+        self.attribute_regex = re.compile(self.attribute_pattern)
+
+
+# Available engines indexed on their name
+ATTRIBUTE_ENGINES = {
+    "regex": RegexAttributeEngine,
+    "scanner": ScannerAttributeEngine,
+}
+
+
+def get_attribute_engine(name, attribute_name):
+    """
+    Build an attribute engine.
+
+    Arguments:
+        name (string): Engine name from ``ATTRIBUTE_ENGINES``.
+        attribute_name (string): The attribute name to search for.
+
+    Returns:
+        object: Engine instance.
+    """
+    if name not in ATTRIBUTE_ENGINES:
+        raise ParserError("Unknown attribute engine: {}".format(name))
+
+    return ATTRIBUTE_ENGINES[name](attribute_name)
@@ -0,0 +1,392 @@
+"""
+Daemon server
+=============
+
+Implement a long running process which runs commands for clients over a local Unix
+socket, so a command run does not pay interpreter startup, imports and rules
+compilation each time.
+
+Configured instances are kept warm between runs with their normalization memo,
+result cache and pool of processes. An instance is built for each distinct set of
+options, the least recently used one is closed once there are too many of them.
+
+Requests are served one at a time. Relative paths from a request are resolved from
+the client working directory, never from the daemon one since worker processes of a
+kept pool are shared by every client, so file paths are absolute in outputs. Log
+records of a run are sent to the client with the client verbosity,
+except those from worker processes of a pool. Protocol is described in
+``chalumo.client``.
+
+A request from a client which does not have the same version or the same registered
+rules is refused, the client then runs the command itself.
+
+"""
+import collections
+import contextlib
+import json
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+
+from . import __version__
+
+from .check import SourceChecker
+from .client import connect
+from .diff import SourceDiff
+from .exceptions import HtmlLinterException
+from .logger import BaseLogger
+from .reformat import SourceWriter
+from .reporters import get_reporter
+from .rules import get_rules_fingerprint
+from .stats import Stats
+
+
+class OutputStream:
+    """
+    Text stream which sends written text to the client.
+
+    Written text is buffered and sent as ``output`` messages.
+
+    Arguments:
+        send (callable): Function to send a message to the client.
+
+    Keyword Arguments:
+        buffer_size (integer): Number of characters to buffer before sending them.
+    """
+    def __init__(self, send, buffer_size=65536):
+        self.send = send
+        self.buffer_size = buffer_size
+        self.chunks = []
+        self.size = 0
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.size += len(text)
+
+        if self.size >= self.buffer_size:
+            self.flush()
+
+        return len(text)
+
+    def writeline(self, text):
+        """
+        Write a text followed by a line break, like ``click.echo`` does.
+
+        Arguments:
+            text (string): Text to write.
+        """
+        self.write(text + "\n")
+
+    def flush(self):
+        if self.chunks:
+            self.send({"type": "output", "text": "".join(self.chunks)})
+            self.chunks = []
+            self.size = 0
+
+
+class LogForwarder(logging.Handler):
+    """
+    Log handler which sends log records to the client.
+
+    Pending output is sent before each record so outputs and logs come in the same
+    order than from a run in the client. Only the records from the thread which
+    runs the request are sent.
+
+    Arguments:
+        stream (OutputStream): Stream to the client.
+    """
+    def __init__(self, stream, *args, **kwargs):
+        self.stream = stream
+        self.thread = threading.get_ident()
+
+        super().__init__(*args, **kwargs)
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+
+        self.stream.flush()
+        self.stream.send({
+            "type": "log",
+            "level": record.levelno,
+            "message": record.getMessage(),
+        })
+
+
+class DaemonServer(BaseLogger):
+    """
+    Serve command runs over a Unix socket.
+
+    Arguments:
+        socket_path (pathlib.Path): Path of the socket to listen on.
+
+    Keyword Arguments:
+        max_instances (integer): Maximum number of configured instances to keep.
+            Default to ``DEFAULT_MAX_INSTANCES``.
+
+    Attributes:
+        instances (collections.OrderedDict): Configured instances indexed on their
+            command and options, from the least to the most recently used.
+        running (boolean): Server stops once the current request is served when this
+            is False.
+    """
+    COMMANDS = {
+        "check": SourceChecker,
+        "diff": SourceDiff,
+        "reformat": SourceWriter,
+    }
+    DEFAULT_MAX_INSTANCES = 8
+
+    def __init__(self, socket_path, *args, **kwargs):
+        self.socket_path = Path(socket_path)
+        self.max_instances = (
+            kwargs.pop("max_instances", None) or self.DEFAULT_MAX_INSTANCES
+        )
+        self.instances = collections.OrderedDict()
+        self.running = False
+
+        super().__init__(*args, **kwargs)
+
+    def get_instance(self, command, options, stats=False):
+        """
+        Return a configured instance for a command, it is built on first request.
+
+        Arguments:
+            command (string): Command name from ``COMMANDS``.
+            options (dict): Options given to the command class, with paths as
+                absolute strings.
+
+        Keyword Arguments:
+            stats (boolean): If True, return an instance which records statistics.
+                Worker processes of a kept pool keep the statistics setting they
+                started with, so this is part of the instance key.
+
+        Returns:
+            chalumo.fixer.SourceFixer: Configured instance.
+        """
+        if command not in self.COMMANDS:
+            raise HtmlLinterException("Unknown daemon command: {}".format(command))
+
+        key = json.dumps([command, options, bool(stats)], sort_keys=True)
+
+        if key in self.instances:
+            self.instances.move_to_end(key)
+            return self.instances[key]
+
+        options = dict(options)
+        if options.get("cache_dir"):
+            options["cache_dir"] = Path(options["cache_dir"])
+
+        self.log.debug("🔥 New instance for command: {}".format(command))
+        instance = self.COMMANDS[command](
+            keep_pool=True,
+            stats=Stats() if stats else None,
+            **options
+        )
+        self.instances[key] = instance
+
+        while len(self.instances) > self.max_instances:
+            key, evicted = self.instances.popitem(last=False)
+            evicted.close()
+
+        return instance
+
+    def run_check(self, instance, basepath, request, stream):
+        """
+        Run a check on an instance with the requested report.
+
+        Arguments:
+            instance (chalumo.check.SourceChecker): Configured instance.
+            basepath (pathlib.Path): Base path where to search for sources.
+            request (dict): Client request, it may have a report ``format`` and an
+                ``output`` file path.
+            stream (OutputStream): Stream to the client.
+
+        Returns:
+            integer: Command exit code.
+        """
+        report_format = request.get("format") or "text"
+        output = request.get("output")
+
+        with contextlib.ExitStack() as stack:
+            if output:
+                stream = stack.enter_context(
+                    open(output, "w", buffering=65536)
+                )
+
+            instance.echo = lambda line: stream.write(line + "\n")
+            instance.reporter = None
+            if report_format != "text":
+                instance.reporter = get_reporter(
+                    report_format, stream, rules=list(instance.enabled_rules)
+                )
+
+            try:
+                count = instance.run(basepath)
+            finally:
+                instance.reporter = None
+
+        return 1 if count else 0
+
+    def run_request(self, request, stream):
+        """
+        Run a command request.
+
+        Arguments:
+            request (dict): Client request.
+            stream (OutputStream): Stream to the client.
+
+        Returns:
+            tuple: Command exit code and statistics as text, or ``None`` if they have
+            not been requested.
+        """
+        command = request["command"]
+        stats_format = request.get("stats")
+        cwd = Path(request["cwd"])
+
+        options = dict(request.get("options") or {})
+        if options.get("cache_dir"):
+            options["cache_dir"] = str(cwd / options["cache_dir"])
+
+        instance = self.get_instance(command, options, stats=bool(stats_format))
+        basepath = cwd / request["basepath"]
+        if request.get("output"):
+            request = dict(request, output=str(cwd / request["output"]))
+
+        # Per run state is reset, warm state like memo and cache is kept
+        instance.processing_paths.clear()
+        if stats_format:
+            instance.stats = Stats()
+
+        self.log.info("📂 Running {} on: {}".format(command, basepath))
+
+        # Records are produced down to the client verbosity during the run, daemon
+        # handlers still get them but only the forwarder filters on client level
+        level = self.log.level
+        forwarder = LogForwarder(stream, request.get("log_level") or logging.WARNING)
+        self.log.setLevel(min(self.log.getEffectiveLevel(), forwarder.level))
+        self.log.addHandler(forwarder)
+
+        try:
+            if command == "check":
+                code = self.run_check(instance, basepath, request, stream)
+            else:
+                if command == "diff":
+                    instance.echo = stream.writeline
+                instance.run(basepath)
+                code = 0
+        finally:
+            self.log.removeHandler(forwarder)
+            self.log.setLevel(level)
+
+        stats = None
+        if stats_format == "json":
+            stats = instance.stats.to_json()
+        elif stats_format:
+            stats = instance.stats.to_table()
+
+        return code, stats
+
+    def handle(self, connection):
+        """
+        Serve a client connection.
+
+        Arguments:
+            connection (socket.socket): Client connection.
+        """
+        with connection.makefile("rw", encoding="utf-8") as channel:
+            line = channel.readline()
+            if not line:
+                return
+
+            def send(message):
+                channel.write(json.dumps(message) + "\n")
+                channel.flush()
+
+            request = json.loads(line)
+
+            if request.get("command") == "shutdown":
+                self.log.info("🛑 Shutdown requested")
+                self.running = False
+                send({"type": "exit", "code": 0})
+                return
+
+            if (
+                request.get("version") != __version__ or
+                request.get("rules") != get_rules_fingerprint()
+            ):
+                self.log.warning(
+                    "🚫 Refused request from a client with another version or rules"
+                )
+                send({
+                    "type": "refused",
+                    "message": "Daemon does not have the same version or rules.",
+                })
+                return
+
+            send({"type": "accepted"})
+
+            stream = OutputStream(send)
+            stats = None
+            try:
+                code, stats = self.run_request(request, stream)
+            # A failed run must not stop the daemon
+            except Exception as e:
+                self.log.error("💥 {}".format(e))
+                stream.flush()
+                send({"type": "error", "message": str(e)})
+                code = 1
+            else:
+                stream.flush()
+
+            send({"type": "exit", "code": code, "stats": stats})
+
+    def serve(self):
+        """
+        Listen on socket and serve requests until a shutdown is requested.
+
+        A socket file left by a daemon which has not been stopped properly is
+        replaced.
+        """
+        client = connect(self.socket_path)
+        if client is not None:
+            client.close()
+            raise HtmlLinterException(
+                "A daemon is already listening on: {}".format(self.socket_path)
+            )
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(self.socket_path))
+            os.chmod(self.socket_path, 0o600)
+            server.listen()
+
+            self.log.info("👂 Listening on: {}".format(self.socket_path))
+            self.running = True
+
+            while self.running:
+                connection, address = server.accept()
+                with connection:
+                    try:
+                        self.handle(connection)
+                    except (BrokenPipeError, ConnectionResetError):
+                        self.log.warning("🔌 Client disconnected before the end")
+        finally:
+            server.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            self.close()
+
+    def close(self):
+        """
+        Close every kept instance, this shuts down their pools.
+        """
+        while self.instances:
+            key, instance = self.instances.popitem()
+            instance.close()
@@ -0,0 +1,275 @@
+"""
+Statistics
+==========
+
+Implement the instrumentation of processing phases.
+
+A phase is timed with a ``start`` call which returns a start time and a ``stop``
+call which adds the elapsed time to the phase. Counters are increased with
+``count``.
+
+When statistics are disabled the ``NULL_STATS`` instance is used instead, its
+methods do nothing at all so instrumented code has almost no overhead.
+
+Phases are recorded in their pipeline order:
+
+discovery
+    Walking directories to find files.
+read
+    Reading file contents.
+preprocess
+    Pre processor rendering of a source.
+substitute
+    Searching for attributes and cleaning their values.
+postprocess
+    Restoring edits to source positions.
+diff
+    Building the diff output.
+write
+    Writing changed sources.
+check
+    Finding rule violations from edits.
+
+"""
+import json
+import time
+
+
+# Phase names in pipeline order
+PHASES = [
+    "discovery",
+    "read",
+    "preprocess",
+    "substitute",
+    "postprocess",
+    "diff",
+    "write",
+    "check",
+]
+
+# Counter names
+COUNTERS = [
+    "files",
+    "bytes",
+    "attributes",
+    "changed",
+]
+
+
+class NullStats:
+    """
+    Statistics which are disabled, every method does nothing and ``timed`` returns
+    the given iterable unchanged.
+    """
+    enabled = False
+
+    def start(self):
+        return None
+
+    def stop(self, phase, started):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def timed(self, phase, iterable):
+        return iterable
+
+    def pop(self):
+        return None
+
+    def merge(self, values):
+        pass
+
+
+class Stats(NullStats):
+    """
+    Record time spent in each phase and counters.
+
+    Attributes:
+        phases (dict): Total time in seconds spent in each phase, indexed on phase
+            name.
+        calls (dict): Number of times each phase has been timed.
+        counters (dict): Counter values indexed on counter name.
+        started (float): Time when statistics have been created, to compute the
+            elapsed time.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.started = time.perf_counter()
+
+    def start(self):
+        """
+        Return the start time of a phase.
+
+        Returns:
+            float: Current performance counter time.
+        """
+        return time.perf_counter()
+
+    def stop(self, phase, started):
+        """
+        Add the time elapsed since start time to a phase.
+
+        Arguments:
+            phase (string): Phase name.
+            started (float): Phase start time as returned by ``start``.
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + (
+            time.perf_counter() - started
+        )
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+    def count(self, name, value=1):
+        """
+        Increase a counter.
+
+        Arguments:
+            name (string): Counter name.
+
+        Keyword Arguments:
+            value (integer): Value to add to counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timed(self, phase, iterable):
+        """
+        Time the production of every item from an iterable.
+
+        Arguments:
+            phase (string): Phase name.
+            iterable (iterable): Iterable to time.
+
+        Yields:
+            object: Items from iterable.
+        """
+        iterator = iter(iterable)
+
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.stop(phase, started)
+                return
+            self.stop(phase, started)
+
+            yield item
+
+    def __reduce__(self):
+        """
+        A copy for a worker process always starts with empty statistics.
+        """
+        return (self.__class__, ())
+
+    def pop(self):
+        """
+        Return recorded values and reset them.
+
+        This is used to send statistics from a worker process to the main process.
+
+        Returns:
+            tuple: Phase times, phase calls and counters.
+        """
+        values = (self.phases, self.calls, self.counters)
+
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+        return values
+
+    def merge(self, values):
+        """
+        Add recorded values from other statistics.
+
+        Arguments:
+            values (tuple): Values as returned by ``pop``.
+        """
+        phases, calls, counters = values
+
+        for name, value in phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + value
+
+        for name, value in calls.items():
+            self.calls[name] = self.calls.get(name, 0) + value
+
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        """
+        Return statistics as a serializable dictionnary.
+
+        Phase times are summed over every process, so with many jobs their total can
+        be greater than elapsed time.
+
+        Returns:
+            dict: Statistics.
+        """
+        elapsed = time.perf_counter() - self.started
+
+        return {
+            "elapsed": elapsed,
+            "phases": {
+                name: {"time": self.phases[name], "calls": self.calls[name]}
+                for name in self.phases
+            },
+            "counters": dict(self.counters),
+            "throughput": {
+                "files": self.counters.get("files", 0) / elapsed if elapsed else 0,
+                "bytes": self.counters.get("bytes", 0) / elapsed if elapsed else 0,
+            },
+        }
+
+    def to_json(self):
+        """
+        Return statistics as JSON.
+
+        Returns:
+            string: JSON statistics.
+        """
+        return json.dumps(self.as_dict(), indent=4)
+
+    def to_table(self):
+        """
+        Return statistics as a text table.
+
+        Returns:
+            string: Statistics table.
+        """
+        data = self.as_dict()
+        total = sum([phase["time"] for phase in data["phases"].values()]) or 1
+
+        lines = ["{:<12} {:>8} {:>10} {:>6}".format("Phase", "Calls", "Time", "Share")]
+
+        for name, phase in data["phases"].items():
+            if not phase["calls"]:
+                continue
+
+            lines.append("{:<12} {:>8} {:>9.3f}s {:>6.1%}".format(
+                name, phase["calls"], phase["time"], phase["time"] / total,
+            ))
+
+        lines.append("")
+        lines.append("{:<12} {:>8}".format("Counter", "Value"))
+
+        for name, value in data["counters"].items():
+            lines.append("{:<12} {:>8}".format(name, value))
+
+        lines.append("")
+        lines.append("Elapsed {:.3f}s, {:.1f} files/s, {:.2f} MB/s".format(
+            data["elapsed"],
+            data["throughput"]["files"],
+            data["throughput"]["bytes"] / 1000000,
+        ))
+
+        return "\n".join(lines)
+
+
+# Shared instance for disabled statistics
+NULL_STATS = NullStats()
@@ -0,0 +1,281 @@
+"""
+File walker
+===========
+
+A recursive file walker which prunes excluded directories before descending into them.
+
+Include and exclude patterns are glob patterns:
+
+* ``*`` matches anything except a path separator;
+* ``?`` matches a single character except a path separator;
+* ``[seq]`` matches any character in ``seq`` and ``[!seq]`` any character not in
+  ``seq``;
+* ``**/`` matches zero or more directories.
+
+Include patterns are matched against the file path relative to the base directory, so
+``*.html`` only matches files at the top level of the base directory where
+``**/*.html`` matches them at any level.
+
+Exclude patterns without path separator are matched against the name of every file
+and directory so they apply at any level. Exclude patterns with a path separator are
+matched against the path relative to the base directory.
+
+"""
+import os
+import re
+from pathlib import Path
+
+
+# Directories which never contain sources to lint
+DEFAULT_EXCLUDES = [
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    "*.egg-info",
+    ".mypy_cache",
+    ".pytest_cache",
+]
+
+
+def translate_pattern(pattern):
+    """
+    Translate a glob pattern to a regular expression pattern.
+
+    Arguments:
+        pattern (string): Glob pattern with ``/`` as path separator.
+
+    Returns:
+        string: Regular expression pattern which matches the whole path.
+    """
+    parts = []
+    i = 0
+    length = len(pattern)
+
+    while i < length:
+        char = pattern[i]
+
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+
+        if pattern.startswith("**", i) and i + 2 == length and (
+            i == 0 or pattern[i - 1] == "/"
+        ):
+            parts.append(".*")
+            i += 2
+            continue
+
+        i += 1
+
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1 if pattern[i:i + 1] in ("!", "]") else i)
+
+            # An unclosed bracket is a literal character
+            if end == -1:
+                parts.append(re.escape(char))
+                continue
+
+            content = pattern[i:end].replace("\\", "\\\\")
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            elif content.startswith("^"):
+                content = "\\" + content
+
+            parts.append("[{}]".format(content))
+            i = end + 1
+        else:
+            parts.append(re.escape(char))
+
+    return "(?s:{})\\Z".format("".join(parts))
+
+
+def compile_patterns(patterns):
+    """
+    Compile glob patterns into a single regular expression.
+
+    Arguments:
+        patterns (list): List of glob patterns.
+
+    Returns:
+        re.Pattern: Compiled regular expression which matches any of the patterns.
+        ``None`` if there is no pattern.
+    """
+    if not patterns:
+        return None
+
+    return re.compile("|".join([translate_pattern(item) for item in patterns]))
+
+
+class FileWalker:
+    """
+    Recursively walk a directory to find files matching include patterns.
+
+    Files are yielded in sorted order, every entry of a directory being sorted on its
+    name, so the order is the same than sorting all paths.
+
+    Symbolic links to directories are not followed.
+
+    Arguments:
+        patterns (list): Glob patterns of files to include.
+
+    Keyword Arguments:
+        excludes (list): Glob patterns of files and directories to exclude.
+    """
+    def __init__(self, patterns, excludes=None):
+        self.patterns = list(patterns)
+        self.excludes = list(excludes or [])
+
+        self.include_regex = compile_patterns(self.patterns)
+        self.exclude_name_regex = compile_patterns(
+            [item for item in self.excludes if "/" not in item]
+        )
+        self.exclude_path_regex = compile_patterns(
+            [item.strip("/") for item in self.excludes if "/" in item]
+        )
+
+    def is_excluded(self, name, path):
+        """
+        Check if an entry is excluded.
+
+        Arguments:
+            name (string): Entry name.
+            path (string): Entry path relative to the base directory.
+
+        Returns:
+            boolean: True if entry is excluded.
+        """
+        if self.exclude_name_regex and self.exclude_name_regex.match(name):
+            return True
+
+        if self.exclude_path_regex and self.exclude_path_regex.match(path):
+            return True
+
+        return False
+
+    def match(self, path):
+        """
+        Check if a file would be found by ``walk``.
+
+        Arguments:
+            path (string): File path relative to the base directory, with ``/`` as
+                path separator.
+
+        Returns:
+            boolean: True if file is included and neither it or any of its parent
+            directories is excluded.
+        """
+        if self.include_regex is None:
+            return False
+
+        parts = path.split("/")
+        for i, name in enumerate(parts):
+            if self.is_excluded(name, "/".join(parts[:i + 1])):
+                return False
+
+        return bool(self.include_regex.match(path))
+
+    def walk_directories(self, basepath):
+        """
+        Find every directory which is walked to find files, excluded directories and
+        their children are not.
+
+        Arguments:
+            basepath (pathlib.Path): Directory to walk.
+
+        Yields:
+            pathlib.Path: Directory paths, starting with base directory itself.
+        """
+        yield basepath
+
+        stack = [(self.scan(str(basepath)), "")]
+
+        while stack:
+            entries, relative = stack[-1]
+            entry = next(entries, None)
+
+            if entry is None:
+                stack.pop()
+                continue
+
+            path = relative + entry.name
+
+            if self.is_excluded(entry.name, path):
+                continue
+
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield Path(entry.path)
+                    stack.append((self.scan(entry.path), path + "/"))
+            except OSError:
+                continue
+
+    def scan(self, directory):
+        """
+        List directory entries sorted on their name.
+
+        Arguments:
+            directory (string): Directory path.
+
+        Returns:
+            iterator: Iterator on ``os.DirEntry`` objects. Unreadable directory has no
+            entry.
+        """
+        try:
+            with os.scandir(directory) as iterator:
+                return iter(sorted(iterator, key=lambda entry: entry.name))
+        except OSError:
+            return iter([])
+
+    def walk(self, basepath):
+        """
+        Find every included file in a directory.
+
+        Arguments:
+            basepath (pathlib.Path): Directory to walk.
+
+        Yields:
+            pathlib.Path: Included file paths.
+        """
+        if self.include_regex is None:
+            return
+
+        # Stack of directories being walked, each item is a tuple of an iterator on
+        # sorted directory entries and the directory path relative to the base one
+        stack = [(self.scan(str(basepath)), "")]
+
+        while stack:
+            entries, relative = stack[-1]
+            entry = next(entries, None)
+
+            if entry is None:
+                stack.pop()
+                continue
+
+            path = relative + entry.name
+
+            if self.is_excluded(entry.name, path):
+                continue
+
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((self.scan(entry.path), path + "/"))
+                    continue
+
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            if self.include_regex.match(path):
+                yield Path(entry.path)
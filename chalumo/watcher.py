@@ -0,0 +1,424 @@
+"""
+Watcher
+=======
+
+Implement the detection of changed source files for the watch mode.
+
+A watcher yields batches of changed files which would be discovered from a base path,
+so only modified or new files are processed again. Deleted files are ignored.
+
+Saving a file often makes many changes in a short time, like an editor which writes
+a temporary file then renames it. Changes are collected until there has been none
+during the debounce delay, then they are yielded at once.
+
+inotify
+    Linux kernel notifications through ``ctypes``, every walked directory is
+    watched and new directories are watched as soon as they are created.
+polling
+    Modification times and sizes of discovered files are compared on each poll, it
+    works everywhere but walks the whole base path on each poll.
+
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from . import __pkgname__
+
+
+# inotify event masks, from "sys/inotify.h"
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+# Event header is watch descriptor, mask, cookie and name length
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class BaseWatcher:
+    """
+    Base watcher which debounces and filters changes.
+
+    It never detects any change, a watcher implements the ``wait`` method.
+
+    Arguments:
+        discoverer (chalumo.discovery.SourceDiscovery): Configured instance which
+            discovers sources, its walker patterns and exclusions are used to filter
+            changed files.
+        basepath (pathlib.Path): Base path to watch, either a directory or a single
+            file.
+
+    Keyword Arguments:
+        debounce (float): Delay in seconds without any change to wait before yielding
+            changes.
+    """
+    DEFAULT_DEBOUNCE = 0.2
+
+    def __init__(self, discoverer, basepath, debounce=None):
+        self.discoverer = discoverer
+        self.basepath = basepath
+        self.debounce = self.DEFAULT_DEBOUNCE if debounce is None else debounce
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes.
+
+        This is the method a watcher must implement, this base one returns no
+        change.
+
+        Keyword Arguments:
+            timeout (float): Maximum time to wait in seconds. ``None`` waits until
+                there is a change.
+
+        Returns:
+            set: Changed paths, they may be any kind of files. Empty if there was no
+            change before timeout.
+        """
+        return set()
+
+    def is_source(self, path):
+        """
+        Check if a changed path is a source which would be discovered.
+
+        Arguments:
+            path (pathlib.Path): Changed path.
+
+        Returns:
+            boolean: True if path is an existing discoverable file.
+        """
+        if not path.is_file():
+            return False
+
+        if self.basepath.is_file():
+            return path == self.basepath
+
+        try:
+            relative = path.relative_to(self.basepath)
+        except ValueError:
+            return False
+
+        return self.discoverer.walker.match(relative.as_posix())
+
+    def watch(self):
+        """
+        Wait for changes and yield them once a burst of changes is over.
+
+        Yields:
+            list: Sorted paths of changed sources.
+        """
+        while True:
+            changed = self.wait()
+
+            while True:
+                more = self.wait(self.debounce)
+                if not more:
+                    break
+                changed.update(more)
+
+            sources = sorted([path for path in changed if self.is_source(path)])
+
+            if sources:
+                yield sources
+
+    def close(self):
+        """
+        Release resources used to watch.
+        """
+        pass
+
+
+class PollingWatcher(BaseWatcher):
+    """
+    Watcher which compares modification times and sizes of discovered files.
+
+    Keyword Arguments:
+        interval (float): Delay between polls in seconds.
+    """
+    DEFAULT_INTERVAL = 0.5
+
+    def __init__(self, *args, **kwargs):
+        self.interval = kwargs.pop("interval", None) or self.DEFAULT_INTERVAL
+
+        super().__init__(*args, **kwargs)
+
+        self.snapshot = self.get_snapshot()
+
+    def get_snapshot(self):
+        """
+        Get the state of every discovered file.
+
+        Returns:
+            dict: Tuple of modification time in nanoseconds and size indexed on path.
+        """
+        snapshot = {}
+
+        for path in self.discoverer.get_source_files(self.basepath):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+        return snapshot
+
+    def poll(self):
+        """
+        Compare discovered files with the previous poll.
+
+        Returns:
+            set: Modified or new file paths.
+        """
+        snapshot = self.get_snapshot()
+        changed = {
+            path for path, state in snapshot.items()
+            if self.snapshot.get(path) != state
+        }
+        self.snapshot = snapshot
+
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            time.sleep(
+                self.interval if remaining is None else
+                max(0, min(self.interval, remaining))
+            )
+
+            changed = self.poll()
+
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+
+class InotifyWatcher(BaseWatcher):
+    """
+    Watcher which receives Linux kernel notifications.
+
+    Every directory which is walked for discovery is watched. A created directory is
+    watched at once and its sources are reported as changed since they may have been
+    written before the directory was watched.
+
+    When kernel event queue overflows, every discovered file is reported as changed.
+    """
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.libc = self.get_libc()
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        self.directories = {}
+
+        try:
+            if self.basepath.is_file():
+                self.add_watch(self.basepath.parent)
+            else:
+                for directory in self.discoverer.walker.walk_directories(
+                    self.basepath
+                ):
+                    self.add_watch(directory)
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def get_libc():
+        """
+        Load C library with inotify functions.
+
+        Returns:
+            ctypes.CDLL: C library. ``None`` if platform does not support inotify.
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+
+        try:
+            libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+        except OSError:
+            return None
+
+        if not hasattr(libc, "inotify_init1"):
+            return None
+
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32,
+        ]
+
+        return libc
+
+    @classmethod
+    def is_available(cls):
+        """
+        Check if platform supports inotify.
+
+        Returns:
+            boolean: True if inotify can be used.
+        """
+        return cls.get_libc() is not None
+
+    def add_watch(self, directory):
+        """
+        Watch a directory.
+
+        Arguments:
+            directory (pathlib.Path): Directory to watch.
+
+        Raises:
+            OSError: If directory can not be watched, like when the limit of
+                watches is reached. A directory which has been removed meanwhile
+                is ignored.
+        """
+        descriptor = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(str(directory)), self.MASK
+        )
+
+        if descriptor < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOENT:
+                return
+            raise OSError(code, os.strerror(code), str(directory))
+
+        self.directories[descriptor] = directory
+
+    def read_events(self):
+        """
+        Read pending events.
+
+        Returns:
+            set: Changed paths.
+        """
+        data = os.read(self.fd, 65536)
+        changed = set()
+        offset = 0
+
+        while offset < len(data):
+            descriptor, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.discoverer.get_source_files(self.basepath))
+                continue
+
+            if mask & IN_IGNORED:
+                self.directories.pop(descriptor, None)
+                continue
+
+            directory = self.directories.get(descriptor)
+            if directory is None or not name:
+                continue
+
+            path = directory / name
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.add_tree(path))
+                continue
+
+            # A created file is reported once written
+            if mask & IN_CREATE:
+                continue
+
+            changed.add(path)
+
+        return changed
+
+    def add_tree(self, directory):
+        """
+        Watch a new directory and its sub directories if they are not excluded.
+
+        Arguments:
+            directory (pathlib.Path): New directory.
+
+        Returns:
+            set: Files in new directory and its sub directories.
+        """
+        try:
+            relative = directory.relative_to(self.basepath).as_posix()
+        except ValueError:
+            return set()
+
+        parts = relative.split("/")
+        for i, name in enumerate(parts):
+            if self.discoverer.walker.is_excluded(name, "/".join(parts[:i + 1])):
+                return set()
+
+        files = set()
+
+        for path in self.discoverer.walker.walk_directories(directory):
+            self.add_watch(path)
+
+            try:
+                with os.scandir(path) as entries:
+                    files.update([
+                        path / entry.name for entry in entries
+                        if entry.is_file(follow_symlinks=False)
+                    ])
+            except OSError:
+                continue
+
+        return files
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+
+        if not ready:
+            return set()
+
+        return self.read_events()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def get_watcher(discoverer, basepath, polling=False, **kwargs):
+    """
+    Build the best watcher available on platform.
+
+    Polling watcher is used when inotify fails, like when the limit of instances or
+    watches is reached.
+
+    Arguments:
+        discoverer (chalumo.discovery.SourceDiscovery): Configured instance which
+            discovers sources.
+        basepath (pathlib.Path): Base path to watch.
+
+    Keyword Arguments:
+        polling (boolean): If True, always use the polling watcher.
+        **kwargs: Other arguments given to the watcher class.
+
+    Returns:
+        BaseWatcher: Watcher instance.
+    """
+    if not polling and InotifyWatcher.is_available():
+        try:
+            return InotifyWatcher(discoverer, basepath, **kwargs)
+        except OSError as e:
+            logging.getLogger(__pkgname__).warning(
+                "⚠️ Unable to watch with inotify, fallback to polling: {}".format(e)
+            )
+
+    return PollingWatcher(discoverer, basepath, **kwargs)
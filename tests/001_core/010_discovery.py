@@ -90,7 +90,7 @@ def test_get_source_contents_pragma(settings):
 
     sources = sorted([
         str(filepath.relative_to(basepath))
-        for filepath, content in discoverer.get_source_contents(found).items()
+        for filepath, content in discoverer.get_source_contents(found)
     ])
 
     # print(json.dumps(sources, indent=4))
@@ -117,7 +117,7 @@ def test_get_source_contents_nopragma(settings):
 
     sources = sorted([
         str(filepath.relative_to(basepath))
-        for filepath, content in discoverer.get_source_contents(found).items()
+        for filepath, content in discoverer.get_source_contents(found)
     ])
 
     # print(json.dumps(sources, indent=4))
@@ -132,3 +132,69 @@ def test_get_source_contents_nopragma(settings):
         "subdir_2/notag_zip.html",
         "subdir_2/subdir_2_1/zap.html"
     ]
+
+
+def test_get_source_contents_lazy(settings, tmp_path):
+    """
+    Contents should be read only when they are consumed, one file at a time.
+    """
+    discoverer = SourceDiscovery()
+
+    first = tmp_path / "first.html"
+    first.write_text("first")
+    second = tmp_path / "second.html"
+    second.write_text("second")
+
+    contents = discoverer.get_source_contents(discoverer.get_source_files(tmp_path))
+
+    assert next(contents) == (first, "first")
+
+    # Second source has not been read yet so its change is seen
+    second.write_text("changed")
+    assert list(contents) == [(second, "changed")]
+
+
+def test_get_source_files_many_patterns(settings):
+    """
+    Files matching any of given patterns should be discovered.
+    """
+    discoverer = SourceDiscovery(file_search_pattern=["*.html", "**/*.txt"])
+
+    basepath = settings.fixtures_path / "sample_structure"
+
+    sources = [
+        str(item.relative_to(basepath))
+        for item in discoverer.get_source_files(basepath)
+    ]
+
+    assert sources == [
+        "basic.html",
+        "empty.html",
+        "no_content.html",
+        "not_html.txt",
+        "subdir_2/not_html.txt",
+    ]
+
+
+def test_get_source_files_excludes(settings, tmp_path):
+    """
+    Excluded paths and default excluded directories should not be discovered.
+    """
+    for path in ["index.html", "node_modules/foo.html", "pages/foo.html"]:
+        path = tmp_path / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+    def discover(**kwargs):
+        return [
+            str(item.relative_to(tmp_path))
+            for item in SourceDiscovery(**kwargs).get_source_files(tmp_path)
+        ]
+
+    assert discover() == ["index.html", "pages/foo.html"]
+    assert discover(excludes=["pages"]) == ["index.html"]
+    assert discover(default_excludes=False) == [
+        "index.html",
+        "node_modules/foo.html",
+        "pages/foo.html",
+    ]
@@ -1,7 +1,9 @@
+import pickle
+
 import pytest
 
 from chalumo.exceptions import ParserError
-from chalumo.parser import HtmlAttributeParser
+from chalumo.parser import HtmlAttributeParser, ProcessedSource
 
 
 class MatchObject:
@@ -288,3 +290,145 @@ def test_apply_rule_H051(content, expected):
     result = parser.apply_rule_H051(splitted)
 
     assert result == expected
+
+
+def test_process_source_edits():
+    """
+    Processed source should carry every edit made on original content.
+    """
+    parser = MockedHtmlAttributeParser()
+
+    content = '<p class=" foo">Foo</p>\n<i class="a  b"></i>'
+    result = parser.process_source("/foo", content)
+
+    assert result.edits == [
+        (3, 15, 'class="[ foo]"'),
+        (27, 39, 'class="[a  b]"'),
+    ]
+
+    # Applying edits on original content gives the modified content
+    fixed = content
+    for start, end, replacement in reversed(result.edits):
+        fixed = fixed[:start] + replacement + fixed[end:]
+
+    assert fixed == result[2]
+    assert result.changed is True
+
+    # Unchanged attributes are not edits
+    result = HtmlAttributeParser().process_source("/foo", content)
+
+    assert result.edits == []
+    assert result[2] == content
+    # An unchanged source is returned as the same object
+    assert result[2] is content
+    assert result.changed is False
+
+
+def test_find_attributes():
+    """
+    Every attribute should be found with its positions and value.
+    """
+    parser = HtmlAttributeParser()
+
+    content = '<p class=" foo">Foo</p>\n<i class=""></i><b class="a  b"></b>'
+
+    assert parser.find_attributes(content) == [
+        (3, 15, " foo"),
+        (27, 35, ""),
+        (43, 55, "a  b"),
+    ]
+
+
+def test_clean_values():
+    """
+    Only changed distinct values should be returned, each one cleaned once.
+    """
+    class CountingParser(HtmlAttributeParser):
+        cleaned = []
+
+        def clean_value(self, value):
+            self.cleaned.append(value)
+            return "[" + value + "]" if value else value
+
+    parser = CountingParser()
+
+    assert parser.clean_values(["a", "", "b", "a", ""]) == {"a": "[a]", "b": "[b]"}
+    assert sorted(parser.cleaned) == ["", "a", "b"]
+
+
+def test_clean_value_attribute_cleaner():
+    """
+    Overriding either "clean_value" or "attribute_cleaner" should give the same
+    result, "attribute_cleaner" is called for every attribute.
+    """
+    class ValueParser(HtmlAttributeParser):
+        def clean_value(self, value):
+            return "[" + value + "]"
+
+    class CountingParser(MockedHtmlAttributeParser):
+        matched = []
+
+        def attribute_cleaner(self, matchobj):
+            self.matched.append(matchobj.group(0))
+            return super().attribute_cleaner(matchobj)
+
+    content = '<p class="foo">A</p><p class="foo">B</p><p class="">C</p>'
+    expected = '<p class="[foo]">A</p><p class="[foo]">B</p><p class="[]">C</p>'
+
+    assert ValueParser().process_source("/foo", content)[2] == expected
+
+    result = CountingParser().process_source("/foo", content)
+
+    assert result[2] == expected
+    assert result.edits == [
+        (3, 14, 'class="[foo]"'),
+        (23, 34, 'class="[foo]"'),
+        (43, 51, 'class="[]"'),
+    ]
+    assert CountingParser.matched == ['class="foo"', 'class="foo"', 'class=""']
+
+
+def test_processed_source():
+    """
+    Processed source should render its content from edits only when requested and
+    behave like a tuple.
+    """
+    source = '<p class=" foo">Foo</p>'
+    result = ProcessedSource("/foo", source, edits=[(3, 15, 'class="foo"')])
+
+    assert not hasattr(result, "__dict__")
+    assert result.changed is True
+    assert result._fixed is None
+
+    # Path and original content are read without rendering processed content
+    assert result[0] == "/foo"
+    assert result[1] is source
+    assert result[:2] == ("/foo", source)
+    assert result[-3] == "/foo"
+    assert result._fixed is None
+
+    assert result.fixed == '<p class="foo">Foo</p>'
+    assert result[2] is result.fixed
+    assert result[-1] is result.fixed
+    assert result[1:] == (source, result.fixed)
+
+    with pytest.raises(IndexError):
+        result[3]
+
+    with pytest.raises(TypeError):
+        hash(result)
+
+    filepath, original, fixed = result
+    assert (filepath, original, fixed) == result
+    assert len(result) == 3
+    assert result == ("/foo", source, '<p class="foo">Foo</p>')
+
+    assert pickle.loads(pickle.dumps(result)) == result
+
+    # Without edits the content is required
+    result = ProcessedSource("/foo", source, source)
+    assert result.changed is False
+    assert result.edits is None
+
+    with pytest.raises(ParserError):
+        ProcessedSource("/foo", source)
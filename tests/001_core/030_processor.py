@@ -1,8 +1,14 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
+from chalumo.exceptions import PostProcessorError, PreProcessorError
+from chalumo.fixer import SourceFixer
 from chalumo.parser import HtmlAttributeParser
+from chalumo.processors import PLAIN_PATH, TEMPLATE_PATH
 from chalumo.processors.django import (
-    DjangoPreProcessor, DjangoPostProcessor,
+    MASK_BASE, DjangoPreProcessor, DjangoPostProcessor,
 )
 
 from django.template.base import Lexer, TokenType
@@ -23,18 +29,16 @@ class MockedHtmlAttributeParser(HtmlAttributeParser):
         )
 
 
-class MockedDjangoPreProcessor(DjangoPreProcessor):
+def readable(content):
     """
-    Override the get_unique_key method to use dummy counter instead so it shoud be
-    safe to test.
+    Replace every filler in masked content with its index between angle brackets so
+    it can be easily checked.
     """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.test_key_counter = 0
-
-    def _get_unique_key(self):
-        self.test_key_counter += 1
-        return str(self.test_key_counter).zfill(3)
+    return re.sub(
+        "([\U000F0000-\U000FFFFD])\\1*",
+        lambda matchobj: "<{}>".format(ord(matchobj.group(1)) - MASK_BASE),
+        content,
+    )
 
 
 def test_django_template_parser():
@@ -75,123 +79,179 @@ def test_django_template_parser():
     assert len([item for item in tokens if (item.token_type == TokenType.COMMENT)]) == 1
 
 
-@pytest.mark.parametrize("source, expected, isolated", [
+@pytest.mark.parametrize("source, expected, masked", [
     (
         '<div class="foo bar-{% cycle "1" "2" "3" %}">Lorem ipsum</div>',
-        '<div class="foo bar-⸦⸨⸠001⸡⸩⸧">Lorem ipsum</div>',
-        {
-            "001": '{% cycle "1" "2" "3" %}',
-        }
+        '<div class="foo bar-<0>">Lorem ipsum</div>',
+        ['{% cycle "1" "2" "3" %}'],
     ),
     (
         '{% if foo %} bar{% endif %} {% if plip %} {{plip}}{% endif %} {{ ping }}',
-        '⸦⸨⸠001⸡⸩⸧ bar⸦⸨⸠002⸡⸩⸧ ⸦⸨⸠003⸡⸩⸧ ⸦⸨⸠004⸡⸩⸧⸦⸨⸠005⸡⸩⸧ ⸦⸨⸠006⸡⸩⸧',
-        {
-            "001": "{% if foo %}",
-            "002": "{% endif %}",
-            "003": "{% if plip %}",
-            "004": "{{ plip }}",
-            "005": "{% endif %}",
-            "006": "{{ ping }}",
-        },
+        '<0> bar<1> <2> <3><4> <5>',
+        [
+            "{% if foo %}",
+            "{% endif %}",
+            "{% if plip %}",
+            "{{plip}}",
+            "{% endif %}",
+            "{{ ping }}",
+        ],
     ),
     (
-        ' {% if foo %} bar {% endif %}  {% if plip %} {{plip }}{% endif %} {{ ping }}',
-        ' ⸦⸨⸠001⸡⸩⸧ bar ⸦⸨⸠002⸡⸩⸧  ⸦⸨⸠003⸡⸩⸧ ⸦⸨⸠004⸡⸩⸧⸦⸨⸠005⸡⸩⸧ ⸦⸨⸠006⸡⸩⸧',
-        {
-            "001": "{% if foo %}",
-            "002": "{% endif %}",
-            "003": "{% if plip %}",
-            "004": "{{ plip }}",
-            "005": "{% endif %}",
-            "006": "{{ ping }}",
-        },
+        '<p>{% verbatim %}{{ "foo" }}{% endverbatim %}{# nope #}</p>',
+        '<p><0>{{ "foo" }}<1><2></p>',
+        ["{% verbatim %}", "{% endverbatim %}", "{# nope #}"],
     ),
 ])
-def test_django_preprocessor(source, expected, isolated):
+def test_django_preprocessor(source, expected, masked):
     """
-    Pre-processor should correctly isolate every non text part and store original
-    references.
+    Pre-processor should mask every non text part with a filler of the same length
+    and store their original spans.
     """
-    preprocessor = MockedDjangoPreProcessor()
+    preprocessor = DjangoPreProcessor()
 
-    rendered = preprocessor.render(source)
+    context = preprocessor.get_context(source)
+
+    assert context.source == source
+    assert len(context.content) == len(source)
+    assert readable(context.content) == expected
+    assert preprocessor.render(source) == context.content
+
+    assert [
+        source[start:end] for start, end in context.payload.spans
+    ] == masked
+
+
+def test_django_preprocessor_reserved_characters():
+    """
+    Pre-processor should refuse a source which contains filler characters.
+    """
+    with pytest.raises(PreProcessorError):
+        DjangoPreProcessor().render(
+            "<p>{}{{{{ foo }}}}</p>".format(chr(MASK_BASE + 42))
+        )
+
+
+@pytest.mark.parametrize("source, path", [
+    ('<p class="foo">Hello { world }</p>', PLAIN_PATH),
+    ("", PLAIN_PATH),
+    ("<p>{}</p>".format(chr(MASK_BASE + 42)), PLAIN_PATH),
+    ('<p class="foo">{{ world }}</p>', TEMPLATE_PATH),
+    ('<p class="foo">{% now %}</p>', TEMPLATE_PATH),
+    ('<p class="foo">{# nope</p>', TEMPLATE_PATH),
+])
+def test_django_preprocessor_paths(source, path):
+    """
+    Pre-processor should not tokenize a source without any template syntax.
+    """
+    context = DjangoPreProcessor().get_context(source)
 
-    assert rendered == expected
+    assert context.path == path
 
-    assert preprocessor.payload == isolated
+    if path == PLAIN_PATH:
+        assert context.content == source
+        assert context.payload.spans == []
+
+
+def test_django_processing_paths_counters():
+    """
+    Parser should count the processed documents for each processing path and give
+    the same results on both paths.
+    """
+    parser = MockedHtmlAttributeParser(compatibility="django")
+
+    sources = [
+        '<p class="foo">Plain</p>',
+        '<p class="foo">{{ bar }}</p>',
+        '<p class="foo">Plain again</p>',
+    ]
+
+    for source in sources:
+        filepath, original, modified = parser.process_source("/foo", source)
+        assert modified == source.replace('"foo"', '"[foo]"')
+
+    assert parser.processing_paths == {PLAIN_PATH: 2, TEMPLATE_PATH: 1}
+
+    # Dummy processor always take the plain path
+    parser = MockedHtmlAttributeParser()
+    parser.process_source("/foo", sources[1])
+
+    assert parser.processing_paths == {PLAIN_PATH: 1}
 
 
 @pytest.mark.parametrize("source, expected", [
     (
         'foo bar-{% cycle "1" "2" "3" %}',
-        'foo bar-⸦⸨⸠001⸡⸩⸧',
+        'foo bar-<0>',
     ),
     (
         '<div class="foo bar-{% cycle "1" "2" "3" %}">Lorem ipsum</div>',
-        '<div class="[foo bar-⸦⸨⸠001⸡⸩⸧]">Lorem ipsum</div>',
+        '<div class="[foo bar-<0>]">Lorem ipsum</div>',
     ),
     (
         (
             '<div {% if foo %}class="foo {% cycle "1" "2" "3" %}"{% else %} '
             'class="nope"{% endif %}>Lorem ipsum</div>'
         ),
-        (
-            '<div ⸦⸨⸠001⸡⸩⸧class="[foo ⸦⸨⸠002⸡⸩⸧]"⸦⸨⸠003⸡⸩⸧ class="[nope]"⸦⸨⸠004⸡⸩⸧>'
-            'Lorem ipsum</div>'
-        ),
+        '<div <0>class="[foo <1>]"<2> class="[nope]"<3>>Lorem ipsum</div>',
     ),
 ])
 def test_django_preprocessed_parser(source, expected):
     """
     Check if pre processor technique does not break the parser.
     """
-    preprocessor = MockedDjangoPreProcessor()
+    preprocessor = DjangoPreProcessor()
     rendered = preprocessor.render(source)
 
     parser = MockedHtmlAttributeParser()
     filepath, original, modified = parser.process_source("/foo", rendered)
 
-    print(modified)
-
     assert filepath == "/foo"
-    assert modified == expected
+    assert readable(modified) == expected
 
 
-@pytest.mark.parametrize("source, expected, references", [
-    (
-        '<div class="foo bar-⸦⸨⸠001⸡⸩⸧">Lorem ipsum</div>',
-        '<div class="foo bar-{% cycle "1" "2" "3" %}">Lorem ipsum</div>',
-        {
-            "001": '{% cycle "1" "2" "3" %}',
-        }
-    ),
+@pytest.mark.parametrize("source", [
+    '<div class="foo bar-{% cycle "1" "2" "3" %}">Lorem ipsum</div>',
     (
-        (
-            '<div ⸦⸨⸠001⸡⸩⸧class="foo ⸦⸨⸠002⸡⸩⸧"\n⸦⸨⸠003⸡⸩⸧ \n    '
-            'class="nope"⸦⸨⸠004⸡⸩⸧>Lorem ipsum</div>'
-        ),
-        (
-            '<div {% if foo %}class="foo {% cycle "1" "2" "3" %}"\n{% else %} \n    '
-            'class="nope"{% endif %}>Lorem ipsum</div>'
-        ),
-        {
-            "001": '{% if foo %}',
-            "002": '{% cycle "1" "2" "3" %}',
-            "003": '{% else %}',
-            "004": '{% endif %}',
-        }
+        '<div {% if foo %}class="foo {% cycle "1" "2" "3" %}"\n{%else%} \n    '
+        'class="nope"{{x}}>Lorem ipsum</div>'
     ),
 ])
-def test_django_postprocessor(source, expected, references):
+def test_django_postprocessor(source):
     """
-    Post-processor should correctly restore isolated content in the right place.
+    Post-processor should restore every original part exactly as it was.
     """
-    postprocessor = DjangoPostProcessor(DjangoPreProcessor.REFERENCE_SYNTAX)
+    context = DjangoPreProcessor().get_context(source)
 
-    rendered = postprocessor.render(source, references)
+    postprocessor = DjangoPostProcessor()
 
-    assert rendered == expected
+    assert postprocessor.render(context.content, context) == source
+
+
+def test_django_postprocessor_restore():
+    """
+    Post-processor should restore masked parts in the modified content of a source
+    range and fail if a masked part is missing.
+    """
+    source = '<b>{{ a }}</b><i class=" {{ b }}  {% if c %}d{% endif %} ">'
+    context = DjangoPreProcessor().get_context(source)
+
+    postprocessor = DjangoPostProcessor()
+
+    # Fillers of masked parts from the attribute
+    b, if_c, endif = [
+        context.content[start:end] for start, end in context.payload.spans[1:]
+    ]
+
+    start = source.index("class=")
+    end = len(source) - 1
+
+    assert postprocessor.restore(
+        'class="{} {}d{}"'.format(b, if_c, endif), start, end, context
+    ) == 'class="{{ b }} {% if c %}d{% endif %}"'
+
+    with pytest.raises(PostProcessorError):
+        postprocessor.restore('class="{} d"'.format(b), start, end, context)
 
 
 @pytest.mark.parametrize("source, expected", [
@@ -216,12 +276,12 @@ def test_django_postprocessor(source, expected, references):
     (
         (
             '<div class="foo{% if foo == "" %} plop{% if bar == "" %} '
-            'plop{% endif %}{%else%} {{ foo }} {{ bar }}{% include "something.html" %}'
+            'plop{% endif %}{%else%} {{foo}} {{ bar }}{% include "something.html" %}'
             '{# nope #}{% endif %}">Lorem ipsum</div>'
         ),
         (
             '<div class="[foo{% if foo == "" %} plop{% if bar == "" %} plop{% endif %}'
-            '{% else %} {{ foo }} {{ bar }}{% include "something.html" %}{# nope #}'
+            '{%else%} {{foo}} {{ bar }}{% include "something.html" %}{# nope #}'
             '{% endif %}]">Lorem ipsum</div>'
         ),
     ),
@@ -231,15 +291,14 @@ def test_django_process_combination(source, expected):
     Combine usage of pre processor, parser and post processor to check the full
     technique flow.
     """
-    preprocessor = DjangoPreProcessor()
-    pre_rendered = preprocessor.render(source)
+    context = DjangoPreProcessor().get_context(source)
 
     # Use the parser without Django compatibility enabled so we can manually use them
     parser = MockedHtmlAttributeParser()
-    filepath, original, modified = parser.process_source("/foo", pre_rendered)
+    filepath, original, modified = parser.process_source("/foo", context.content)
 
-    postprocessor = DjangoPostProcessor(preprocessor.reference_syntax)
-    post_rendered = postprocessor.render(modified, preprocessor.payload)
+    postprocessor = DjangoPostProcessor()
+    post_rendered = postprocessor.render(modified, context)
 
     assert filepath == "/foo"
     assert post_rendered == expected
@@ -258,10 +317,10 @@ def test_django_process_combination(source, expected):
     ),
     (
         (
-            '<i class="{{ sample_icon }} icon-{{ k }}"></i>'
+            '<i class="{{sample_icon}} icon-{{ k }}"></i>'
         ),
         (
-            '<i class="[{{ sample_icon }} icon-{{ k }}]"></i>'
+            '<i class="[{{sample_icon}} icon-{{ k }}]"></i>'
         ),
     ),
     (
@@ -278,7 +337,62 @@ def test_django_full_process(source, expected):
     Use the parser with processor management.
     """
     parser = MockedHtmlAttributeParser(compatibility="django")
-    filepath, original, modified = parser.process_source("/foo", source)
+    result = parser.process_source("/foo", source)
+    filepath, original, modified = result
 
     assert filepath == "/foo"
     assert modified == expected
+
+    # Edits are made on source positions
+    assert parser.apply_edits(source, result.edits) == modified
+
+
+def test_django_full_process_rules():
+    """
+    Identical template tags should never be removed as duplicates.
+    """
+    fixer = SourceFixer(compatibility="django", cache_dir=None)
+
+    source = (
+        '<p class=" {% if a %}foo {% endif %} {% if b %}bar {% endif %}  foo">'
+        '{{x}}</p>'
+    )
+
+    filepath, original, modified = fixer.process_source("/foo", source)
+
+    assert modified == (
+        '<p class="{% if a %}foo {% endif %} {% if b %}bar {% endif %} foo">'
+        '{{x}}</p>'
+    )
+
+
+def test_django_concurrent_process():
+    """
+    A single parser should process documents from many threads at the same time
+    without keeping any document state.
+    """
+    parser = SourceFixer(compatibility="django", cache_dir=None)
+
+    sources = [
+        (
+            '<p class=" foo{} {{% if a %}}  bar {{% endif %}} foo">{{{{ x }}}}</p>\n'
+        ).format(i) * (i % 7 + 1)
+        for i in range(200)
+    ]
+
+    expected = [parser.process_source("/foo", source) for source in sources]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda source: parser.process_source("/foo", source), sources
+        ))
+
+    assert results == expected
+    assert [result.edits for result in results] == [
+        result.edits for result in expected
+    ]
+
+    # Processors never keep anything from processed documents
+    assert list(vars(parser.pre_processor)) == ["tokenizer"]
+    assert vars(parser.pre_processor.tokenizer) == {}
+    assert vars(parser.post_processor) == {}
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from chalumo.exceptions import PreProcessorError
+from chalumo.processors.django import DjangoPreProcessor
+from chalumo.processors.tokenizer import (
+    DjangoLexerTokenizer, TemplateTokenizer, get_tokenizer,
+)
+
+
+def merged_tokens(tokens):
+    """
+    Merge consecutive text tokens since Django lexer may yield some inside verbatim
+    blocks.
+    """
+    merged = []
+
+    for token_type, start, end in tokens:
+        if merged and token_type == "TEXT" and merged[-1][0] == "TEXT":
+            merged[-1] = ("TEXT", merged[-1][1], end)
+        else:
+            merged.append((token_type, start, end))
+
+    return merged
+
+
+def assert_conformance(source):
+    """
+    Native tokenizer should produce the same segmentation than Django lexer.
+    """
+    expected = merged_tokens(DjangoLexerTokenizer().tokenize(source))
+
+    assert list(TemplateTokenizer().tokenize(source)) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "",
+    "Hello world",
+    "{{ foo }}",
+    '<div class="foo {% if a %}bar{% endif %}">{{ foo|default:"}}" }}</div>',
+    "{# comment #} {%else%}{{x}}",
+    "{% if a\n%} multiline {{ b\n}} is text",
+    "{% unclosed {{ foo {# bar",
+    "{%%}{{}}{##}",
+    "{{ {{ foo }} }}",
+    "{% verbatim %}{{ foo }}{% if %}{% endverbatim %}{{ bar }}",
+    (
+        "{% verbatim myblock %}{% endverbatim %}{{ foo }}"
+        "{% endverbatim myblock %}{{ bar }}"
+    ),
+    "{% verbatim %}{% verbatim %}{% endverbatim %}{% endverbatim %}",
+    "{% verbatimfoo %}{{ foo }}",
+    "{%  verbatim  %}{{ foo }}{%endverbatim%}",
+    "{% verbatim %}{{ never closed }}",
+])
+def test_tokenizer_conformance(source):
+    """
+    Native tokenizer should tokenize like Django lexer on edge cases.
+    """
+    assert_conformance(source)
+
+
+def test_tokenizer_conformance_fixtures(settings):
+    """
+    Native tokenizer should tokenize like Django lexer on every fixture.
+    """
+    for path in sorted(settings.fixtures_path.glob("**/*.*")):
+        assert_conformance(path.read_text())
+
+
+def test_tokenizer_conformance_fuzz():
+    """
+    Native tokenizer should tokenize like Django lexer on random contents.
+    """
+    randomizer = random.Random(42)
+    pieces = [
+        "{", "}", "%", "#", " ", "\n", "a", '"', "{%", "%}", "{{", "}}", "{#", "#}",
+        "verbatim", "endverbatim", "{% verbatim %}", "{% endverbatim %}",
+    ]
+
+    for i in range(2000):
+        assert_conformance("".join([
+            randomizer.choice(pieces) for j in range(randomizer.randint(0, 40))
+        ]))
+
+
+@pytest.mark.parametrize("name", ["native", "django"])
+def test_preprocessor_tokenizers(name):
+    """
+    Pre processor should mask the same parts whatever is the tokenizer.
+    """
+    source = (
+        '<p class="{% if a %}foo{% endif %} {{ b }}">{% verbatim %}{{ c }}'
+        '{% endverbatim %}</p>'
+    )
+
+    reference = DjangoPreProcessor(tokenizer="django").get_context(source)
+    context = DjangoPreProcessor(tokenizer=name).get_context(source)
+
+    assert context.content == reference.content
+    assert context.payload.spans == reference.payload.spans
+
+
+def test_unknown_tokenizer():
+    """
+    An unknown tokenizer name should raise an error.
+    """
+    with pytest.raises(PreProcessorError):
+        get_tokenizer("nope")
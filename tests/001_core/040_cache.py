@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from chalumo.cache import ResultCache, get_default_cache_dir, get_fingerprint
+
+
+def test_get_default_cache_dir(monkeypatch, tmp_path):
+    """
+    Default cache directory should follow the XDG cache directory.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    assert get_default_cache_dir() == tmp_path / "chalumo"
+
+
+def test_get_fingerprint():
+    """
+    Fingerprint should only depend from option values, not their order.
+    """
+    assert (
+        get_fingerprint({"a": 1, "b": ["x"]}) == get_fingerprint({"b": ["x"], "a": 1})
+    )
+    assert get_fingerprint({"a": 1}) != get_fingerprint({"a": 2})
+
+
+def test_cache_clean(tmp_path):
+    """
+    Only stored contents should be known as clean and only for the same fingerprint.
+    """
+    cache = ResultCache(tmp_path, "foo")
+    other = ResultCache(tmp_path, "bar")
+
+    assert cache.is_clean("<p>Hello</p>") is False
+
+    cache.set_clean("<p>Hello</p>")
+
+    assert cache.is_clean("<p>Hello</p>") is True
+    assert cache.is_clean("<p>World</p>") is False
+    assert other.is_clean("<p>Hello</p>") is False
+
+
+def test_cache_prune(tmp_path):
+    """
+    Pruning should remove the least recently used entries over the limit.
+    """
+    cache = ResultCache(tmp_path, "foo", max_entries=2)
+
+    for i, content in enumerate(["first", "second", "third"]):
+        cache.set_clean(content)
+        # Enforce distinct entry times since filesystem resolution may be too coarse
+        os.utime(cache.get_entry_path(cache.get_key(content)), ns=(i, i))
+
+    # A hit makes the first entry the most recently used one
+    assert cache.is_clean("first") is True
+
+    assert cache.prune() == 1
+    assert len(cache.get_entries()) == 2
+
+    assert cache.is_clean("first") is True
+    assert cache.is_clean("second") is False
+    assert cache.is_clean("third") is True
+
+    assert cache.prune() == 0
+
+
+def test_cache_estimate_entries(tmp_path):
+    """
+    Entries should be counted from a sample of sub directories once there are
+    enough of them.
+    """
+    cache = ResultCache(tmp_path, "foo")
+
+    assert cache.estimate_entries() == 0
+
+    for i in range(10):
+        cache.set_clean(str(i))
+
+    # A small cache is entirely counted
+    assert cache.estimate_entries() == 10
+
+    cache.SAMPLE_ENTRIES = 100
+    for i in range(10, 1200):
+        cache.set_clean(str(i))
+
+    assert 900 < cache.estimate_entries() < 1500
+
+
+def test_cache_prune_if_full(tmp_path, monkeypatch):
+    """
+    Cache should only be listed to be pruned when it is estimated as full, then it
+    should be pruned under the limit.
+    """
+    cache = ResultCache(tmp_path, "foo", max_entries=10)
+
+    for i in range(10):
+        cache.set_clean(str(i))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, "get_entries", lambda: pytest.fail("Listed entries"))
+        assert cache.prune_if_full() == 0
+
+    cache.set_clean("10")
+
+    assert cache.prune_if_full() == 2
+    assert len(cache.get_entries()) == 9
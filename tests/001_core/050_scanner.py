@@ -0,0 +1,107 @@
+import random
+import time
+
+import pytest
+
+from chalumo.exceptions import ParserError
+from chalumo.parser import HtmlAttributeParser
+from chalumo.scanner import (
+    RegexAttributeEngine, ScannerAttributeEngine, get_attribute_engine,
+)
+
+
+def get_spans(engine, source):
+    return [match.span() for match in engine.finditer(source)]
+
+
+@pytest.mark.parametrize("source", [
+    "",
+    "class=",
+    'class="',
+    'class=""',
+    'class="foo"',
+    'class="foo',
+    'class="foo bar"class="ping"',
+    '<p class="foo bar"">Lorem</p>',
+    '<p class="foo" data-class="bar">Lorem</p>',
+    '<p class="foo\nbar \t">Lorem</p><i class=" unclosed>',
+    '<p class="class="foo"">Lorem</p>',
+    '<div class="foo bar>ping <p class="bim">pong</p></div>',
+])
+def test_scanner_conformance(source):
+    """
+    Scanner should find exactly the same matches than the reference regex.
+    """
+    regex = RegexAttributeEngine("class")
+    scanner = ScannerAttributeEngine("class")
+
+    assert get_spans(scanner, source) == get_spans(regex, source)
+    assert [m.group(0) for m in scanner.finditer(source)] == [
+        m.group(0) for m in regex.finditer(source)
+    ]
+
+
+def test_scanner_conformance_fuzzy():
+    """
+    Scanner should find the same matches than the reference regex on random contents
+    built from meaningful pieces.
+    """
+    regex = RegexAttributeEngine("class")
+    scanner = ScannerAttributeEngine("class")
+
+    pieces = ['class="', 'class=', "class", '"', " ", "\n", "foo", "=", "<p ", ">"]
+    randomizer = random.Random(42)
+
+    for i in range(2000):
+        source = "".join([
+            randomizer.choice(pieces)
+            for j in range(randomizer.randint(0, 20))
+        ])
+
+        assert get_spans(scanner, source) == get_spans(regex, source), source
+
+
+def test_scanner_sub():
+    """
+    Scanner substitution should replace every match.
+    """
+    scanner = ScannerAttributeEngine("class")
+    source = '<p class="foo">Lorem</p><p class="bar">Ipsum</p>'
+
+    assert scanner.sub(lambda m: "X", source) == "<p X>Lorem</p><p X>Ipsum</p>"
+
+
+def test_scanner_adversarial():
+    """
+    Scanner should stay fast on a huge unterminated attribute with many spaces which
+    makes the reference regex backtrack.
+    """
+    scanner = ScannerAttributeEngine("class")
+    source = ('<p class="foo">Lorem</p>' * 1000) + '<div class="' + ("foo " * 1000000)
+
+    start = time.perf_counter()
+    assert len(get_spans(scanner, source)) == 1000
+    assert time.perf_counter() - start < 0.5
+
+
+def test_get_attribute_engine():
+    """
+    Engine should be built from its name and an unknown name should raise an error.
+    """
+    assert isinstance(get_attribute_engine("regex", "class"), RegexAttributeEngine)
+
+    with pytest.raises(ParserError):
+        get_attribute_engine("nope", "class")
+
+
+@pytest.mark.parametrize("engine", ["regex", "scanner"])
+def test_parser_engine(engine):
+    """
+    Parser should produce the same result with any engine.
+    """
+    parser = HtmlAttributeParser(engine=engine)
+    source = '<p class="foo bar">Lorem</p><p class=" ping">Ipsum</p>'
+
+    filepath, original, modified = parser.process_source("/foo", source)
+
+    assert modified == source
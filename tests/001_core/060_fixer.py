@@ -0,0 +1,133 @@
+import logging
+import pickle
+
+import pytest
+
+from chalumo.diff import SourceDiff
+from chalumo.fixer import SourceFixer
+from chalumo.processors import PLAIN_PATH, TEMPLATE_PATH
+
+
+def test_normalize_memo():
+    """
+    Normalized values should be memoized across all processed sources.
+    """
+    fixer = SourceFixer()
+
+    fixer.process_source("/foo", '<p class="foo  bar">Lorem</p>')
+    fixer.process_source("/bar", '<p class="foo  bar">Lorem</p><p class="ping">X</p>')
+
+    info = fixer.normalize_value.cache_info()
+    assert info.hits == 1
+    assert info.misses == 2
+    assert info.currsize == 2
+
+
+def test_normalize_distinct_values():
+    """
+    Each distinct value of a source should be normalized only once.
+    """
+    fixer = SourceFixer(memo_size=0)
+
+    filepath, source, fixed = fixer.process_source(
+        "/foo",
+        '<p class="foo  bar">A</p><p class="ping">B</p><p class="foo  bar">C</p>',
+    )
+
+    assert fixed == (
+        '<p class="foo bar">A</p><p class="ping">B</p><p class="foo bar">C</p>'
+    )
+
+    info = fixer.normalize_value.cache_info()
+    assert info.misses == 2
+    assert info.hits == 0
+
+
+def test_normalize_memo_disabled():
+    """
+    Memo size of zero should never store any value.
+    """
+    fixer = SourceFixer(memo_size=0)
+
+    filepath, source, fixed = fixer.process_source(
+        "/foo", '<p class="foo  bar">Lorem</p><p class="foo  bar">Lorem</p>'
+    )
+
+    assert fixed == '<p class="foo bar">Lorem</p><p class="foo bar">Lorem</p>'
+    assert fixer.normalize_value.cache_info().currsize == 0
+
+
+def test_get_attribute_value_override():
+    """
+    A fixer which overrides "get_attribute_value" should have it called for every
+    attribute and its value cleaned with enabled rules.
+    """
+    class UpperFixer(SourceFixer):
+        def get_attribute_value(self, matchobj):
+            return super().get_attribute_value(matchobj).upper()
+
+    filepath, source, fixed = UpperFixer().process_source(
+        "/foo", '<p class="foo  foo bar">A</p><p class="ping">B</p>'
+    )
+
+    assert fixed == '<p class="FOO BAR">A</p><p class="PING">B</p>'
+
+
+def test_normalize_memo_pickle():
+    """
+    A pickled fixer should have a new empty and working memo.
+    """
+    fixer = SourceFixer()
+    fixer.process_source("/foo", '<p class="foo  bar">Lorem</p>')
+
+    copied = pickle.loads(pickle.dumps(fixer))
+
+    assert copied.normalize_value.cache_info().currsize == 0
+    assert copied.normalize_value("foo  bar") == "foo bar"
+
+
+def test_log_memo_stats(caplog):
+    """
+    Memo hit rate should be reported in debug log.
+    """
+    caplog.set_level(logging.DEBUG, logger="chalumo")
+
+    fixer = SourceFixer(memo_size=10)
+    fixer.process_source("/foo", '<p class="foo">A</p>')
+    fixer.process_source("/bar", '<p class="foo">B</p>')
+    caplog.clear()
+
+    fixer.log_memo_stats()
+
+    assert caplog.record_tuples == [
+        (
+            "chalumo",
+            logging.DEBUG,
+            "🧠 Normalization memo: 1 hits on 2 lookups (50.0%), 1/10 entries"
+        ),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_processing_paths_jobs(tmp_path, caplog, jobs):
+    """
+    Processing paths should be counted in main process whatever is the number of
+    jobs, with or without statistics.
+    """
+    caplog.set_level(logging.DEBUG, logger="chalumo")
+
+    (tmp_path / "plain.html").write_text('<p class="foo  bar">Plain</p>\n')
+    (tmp_path / "other.html").write_text('<p class="ping">Other</p>\n')
+    (tmp_path / "template.html").write_text('<p class="{{ foo }}  bar">Tag</p>\n')
+
+    differ = SourceDiff(
+        compatibility="django", jobs=jobs, cache_dir=None, output_callable=print,
+    )
+    differ.run(tmp_path)
+
+    assert differ.processing_paths == {PLAIN_PATH: 2, TEMPLATE_PATH: 1}
+    assert (
+        "chalumo",
+        logging.DEBUG,
+        "🔀 Processing paths: 2 plain, 1 template",
+    ) in caplog.record_tuples
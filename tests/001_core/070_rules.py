@@ -0,0 +1,172 @@
+import random
+import time
+
+import pytest
+
+from chalumo import rules
+from chalumo.exceptions import RuleError
+from chalumo.fixer import SourceFixer
+from chalumo.rules import BaseRule, compile_checker, compile_rules, register_rule
+
+
+@pytest.mark.parametrize("codes, content, expected", [
+    ([], " foo  bar foo ", " foo  bar foo "),
+    (["H050"], " foo  bar\n foo ", "foo bar foo"),
+    (["H051"], " foo  bar foo ", " foo  bar "),
+    (["H050", "H051"], " foo  bar\n foo ", "foo bar"),
+    (["H051", "H050"], " foo  bar\n foo ", "foo bar"),
+])
+def test_compile_rules(codes, content, expected):
+    """
+    Compiled rules should apply every enabled rules whatever is their order.
+    """
+    assert compile_rules(codes)(content) == expected
+
+
+@pytest.mark.parametrize("codes, content", [
+    ([], " foo  bar foo "),
+    (["H050"], "foo bar foo"),
+    (["H050"], ""),
+    (["H051"], " foo  bar "),
+    (["H051"], "foo\t \t bar"),
+    (["H050", "H051"], "foo bar"),
+])
+def test_compile_rules_canonical(codes, content):
+    """
+    A canonical value should be returned as it is.
+    """
+    assert compile_rules(codes)(content) is content
+
+
+@pytest.mark.parametrize("codes", [[], ["H050"], ["H051"], ["H050", "H051"]])
+def test_compile_rules_validators(monkeypatch, codes):
+    """
+    Rule validators should never accept a value which would be changed.
+    """
+    normalize = compile_rules(codes)
+
+    # Reference normalization always applies rules
+    monkeypatch.setattr(rules.RuleH050, "validator", False)
+    monkeypatch.setattr(rules.RuleH051, "validator", False)
+    reference = compile_rules(codes)
+
+    randomizer = random.Random(42)
+
+    for i in range(2000):
+        value = "".join(
+            randomizer.choices(["a", "b", " ", "  ", "\t", "\n", "\xa0"], k=8)
+        )
+        assert normalize(value) == reference(value)
+
+
+def test_compile_rules_validate_unsplit(monkeypatch):
+    """
+    A canonical value should not be split when only the splitter rule is enabled.
+    """
+    splitted = []
+
+    def split(self, value):
+        splitted.append(value)
+        return value.split()
+
+    monkeypatch.setattr(rules.RuleH050, "split", split)
+    normalize = compile_rules(["H050"])
+
+    assert normalize("foo bar") == "foo bar"
+    assert normalize("") == ""
+    assert splitted == []
+
+    assert normalize(" foo\tbar") == "foo bar"
+    assert splitted == [" foo\tbar"]
+
+
+def test_compile_rules_no_validator(monkeypatch):
+    """
+    A rule without validator should always be applied.
+    """
+    monkeypatch.setattr(rules, "RULES", dict(rules.RULES))
+
+    @register_rule
+    class Upper(BaseRule):
+        code = "X003"
+
+        def apply(self, items):
+            return [item.upper() for item in items]
+
+    assert compile_rules(["H050", "H051", "X003"])("foo bar") == "FOO BAR"
+
+
+@pytest.mark.parametrize("codes, content, expected", [
+    ([], " foo  foo ", []),
+    (["H050"], "foo bar", []),
+    (["H050"], " foo  bar foo ", ["H050"]),
+    (["H051"], " foo  bar foo ", ["H051"]),
+    (["H051"], " foo  bar ", []),
+    (["H050", "H051"], "foo\tbar", ["H050"]),
+    (["H050", "H051"], "foo bar foo", ["H051"]),
+    (["H050", "H051"], "foo\tbar foo", ["H050", "H051"]),
+])
+def test_compile_checker(codes, content, expected):
+    """
+    Compiled checker should return every violated rule code.
+    """
+    assert compile_checker(codes)(content) == expected
+
+
+def test_compile_rules_unknown():
+    """
+    Unknown rule codes should raise an error.
+    """
+    with pytest.raises(RuleError):
+        compile_rules(["H050", "NOPE"])
+
+
+def test_compile_rules_many_splitters(monkeypatch):
+    """
+    Only one splitter rule can be enabled.
+    """
+    monkeypatch.setattr(rules, "RULES", dict(rules.RULES))
+
+    @register_rule
+    class CommaSplitter(BaseRule):
+        code = "X002"
+        splitter = True
+
+    with pytest.raises(RuleError):
+        compile_rules(["H050", "X002"])
+
+
+def test_register_rule(monkeypatch):
+    """
+    A third party rule should be usable from its code once registered.
+    """
+    monkeypatch.setattr(rules, "RULES", dict(rules.RULES))
+
+    @register_rule
+    class Sorted(BaseRule):
+        code = "X001"
+
+        def apply(self, items):
+            return sorted(items)
+
+    fixer = SourceFixer(enabled_rules=["H050", "X001"])
+
+    filepath, source, fixed = fixer.process_source("/foo", '<p class="foo  bar">A</p>')
+
+    assert fixed == '<p class="bar foo">A</p>'
+
+    with pytest.raises(RuleError):
+        register_rule(type("Nope", (BaseRule,), {}))
+
+
+def test_rule_h051_linear():
+    """
+    Duplicate removal should stay fast on very long keyword lists.
+    """
+    items = ["item-{}".format(i % 50000) for i in range(200000)]
+
+    start = time.perf_counter()
+    result = rules.RuleH051().apply(items)
+
+    assert time.perf_counter() - start < 0.5
+    assert result == items[:50000]
@@ -0,0 +1,42 @@
+import pytest
+
+from chalumo.lines import LineIndex
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "\n",
+    "foo",
+    "foo\n",
+    "foo\nbar",
+    "foo\r\nbar\rping\n\npong\n",
+    "foo\x0bbar\x85ping pong",
+])
+def test_lineindex_lines(content):
+    """
+    Indexed lines should be the same than the ones from "str.splitlines" and their
+    offsets should point to their position in content.
+    """
+    index = LineIndex(content)
+
+    assert index.lines == content.splitlines(keepends=True)
+    assert len(index) == len(index.lines)
+
+    for i, line in enumerate(index.lines):
+        assert content[index.get_line_start(i):index.get_line_end(i)] == line
+        assert index.get_line(i) == line
+
+
+@pytest.mark.parametrize("content, offset, expected", [
+    ("foo", 0, (1, 1)),
+    ("foo", 2, (1, 3)),
+    ("foo\nbar", 3, (1, 4)),
+    ("foo\nbar", 4, (2, 1)),
+    ("foo\r\nbar\n", 6, (2, 2)),
+    ("foo\n\n\nbar", 6, (4, 1)),
+])
+def test_lineindex_position(content, offset, expected):
+    """
+    Position should be the line and column numbers of an offset.
+    """
+    assert LineIndex(content).get_position(offset) == expected
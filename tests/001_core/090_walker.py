@@ -0,0 +1,144 @@
+import os
+import re
+
+import pytest
+
+from chalumo.walker import DEFAULT_EXCLUDES, FileWalker, translate_pattern
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("*.html", "foo.html", True),
+    ("*.html", "foo/bar.html", False),
+    ("**/*.html", "foo.html", True),
+    ("**/*.html", "foo/bar/ping.html", True),
+    ("**/*.html", "foo/bar/ping.htm", False),
+    ("foo/**/*.html", "foo/ping.html", True),
+    ("foo/**/*.html", "foo/bar/ping.html", True),
+    ("foo/**/*.html", "bar/ping.html", False),
+    ("foo/**", "foo/bar/ping.html", True),
+    ("fo?/*.html", "foo/ping.html", True),
+    ("fo?/*.html", "fo/ping.html", False),
+    ("[fb]oo.html", "boo.html", True),
+    ("[!fb]oo.html", "boo.html", False),
+    ("[!fb]oo.html", "zoo.html", True),
+    ("[foo.html", "[foo.html", True),
+    ("foo+(1).html", "foo+(1).html", True),
+])
+def test_translate_pattern(pattern, path, expected):
+    """
+    Glob patterns should be translated to regular expressions matching whole paths.
+    """
+    assert (re.match(translate_pattern(pattern), path) is not None) is expected
+
+
+def build_tree(basepath, paths):
+    """
+    Create empty files for given relative paths.
+    """
+    for path in paths:
+        path = basepath / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+@pytest.mark.parametrize("patterns", [
+    ["**/*.html"],
+    ["*.html"],
+    ["**/*.*"],
+    ["**/*.html", "**/*.txt"],
+])
+def test_walker_order(settings, patterns):
+    """
+    Walker should find the same files than glob, in the sorted order.
+    """
+    basepath = settings.fixtures_path / "sample_structure"
+
+    expected = sorted(set([
+        path
+        for pattern in patterns
+        for path in basepath.glob(pattern)
+        if path.is_file()
+    ]))
+
+    assert list(FileWalker(patterns).walk(basepath)) == expected
+
+
+def test_walker_excludes(tmp_path, monkeypatch):
+    """
+    Excluded directories should never be walked and excluded files never be
+    yielded.
+    """
+    build_tree(tmp_path, [
+        "index.html",
+        "foo.egg-info/ping.html",
+        "node_modules/lib/ping.html",
+        "templates/node_modules/ping.html",
+        "templates/skip.html",
+        "templates/pages/home.html",
+        "templates/pages/skip.html",
+        "templates/static/pong.html",
+    ])
+
+    scanned = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(os.path.relpath(path, tmp_path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+
+    walker = FileWalker(
+        ["**/*.html"],
+        excludes=DEFAULT_EXCLUDES + ["skip.html", "templates/static"],
+    )
+
+    assert [
+        str(path.relative_to(tmp_path)) for path in walker.walk(tmp_path)
+    ] == [
+        "index.html",
+        "templates/pages/home.html",
+    ]
+
+    assert scanned == [".", "templates", "templates/pages"]
+
+
+def test_walker_symlink(tmp_path):
+    """
+    Symbolic links to directories should not be followed.
+    """
+    build_tree(tmp_path, ["templates/index.html"])
+    (tmp_path / "templates" / "loop").symlink_to(tmp_path / "templates")
+
+    assert list(FileWalker(["**/*.html"]).walk(tmp_path)) == [
+        tmp_path / "templates" / "index.html",
+    ]
+
+
+def test_walker_match_directories(tmp_path):
+    """
+    Matching a path should agree with walk and only walked directories should be
+    listed.
+    """
+    paths = [
+        "index.html",
+        "index.txt",
+        "node_modules/lib/ping.html",
+        "templates/skip.html",
+        "templates/pages/home.html",
+        "templates/static/pong.html",
+    ]
+    build_tree(tmp_path, paths)
+
+    walker = FileWalker(
+        ["**/*.html"],
+        excludes=DEFAULT_EXCLUDES + ["skip.html", "templates/static"],
+    )
+
+    assert [path for path in paths if walker.match(path)] == [
+        str(path.relative_to(tmp_path)) for path in walker.walk(tmp_path)
+    ]
+
+    assert [
+        str(path.relative_to(tmp_path)) for path in walker.walk_directories(tmp_path)
+    ] == [".", "templates", "templates/pages"]
@@ -0,0 +1,75 @@
+import json
+import pickle
+
+from chalumo.stats import NULL_STATS, Stats
+
+
+def test_stats_record():
+    """
+    Statistics should sum phase times, calls and counters.
+    """
+    stats = Stats()
+
+    for i in range(3):
+        stats.stop("read", stats.start())
+    stats.count("files")
+    stats.count("bytes", 42)
+
+    assert stats.calls["read"] == 3
+    assert stats.phases["read"] > 0
+    assert stats.counters["files"] == 1
+    assert stats.counters["bytes"] == 42
+
+    assert list(stats.timed("discovery", ["a", "b"])) == ["a", "b"]
+    assert stats.calls["discovery"] == 3
+
+
+def test_stats_merge():
+    """
+    Popped values should reset statistics and be merged in other statistics.
+    """
+    worker = Stats()
+    worker.stop("substitute", worker.start())
+    worker.count("attributes", 5)
+
+    # A copy for a worker starts empty
+    assert pickle.loads(pickle.dumps(worker)).counters["attributes"] == 0
+
+    main = Stats()
+    main.count("attributes", 1)
+    main.merge(worker.pop())
+
+    assert worker.counters["attributes"] == 0
+    assert main.counters["attributes"] == 6
+    assert main.calls["substitute"] == 1
+
+
+def test_stats_outputs():
+    """
+    Statistics should be output as JSON or as a table of used phases.
+    """
+    stats = Stats()
+    stats.stop("read", stats.start())
+    stats.count("files", 2)
+
+    data = json.loads(stats.to_json())
+
+    assert data["phases"]["read"]["calls"] == 1
+    assert data["counters"]["files"] == 2
+
+    table = stats.to_table()
+
+    assert "read" in table
+    assert "write" not in table
+
+
+def test_null_stats():
+    """
+    Disabled statistics should not record anything.
+    """
+    items = ["a"]
+
+    assert NULL_STATS.start() is None
+    assert NULL_STATS.stop("read", None) is None
+    assert NULL_STATS.timed("discovery", items) is items
+    assert not hasattr(NULL_STATS, "counters")
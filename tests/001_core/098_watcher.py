@@ -0,0 +1,197 @@
+import ctypes
+import errno
+import logging
+import os
+
+import pytest
+
+from chalumo.discovery import SourceDiscovery
+from chalumo.watcher import (
+    BaseWatcher, InotifyWatcher, PollingWatcher, get_watcher,
+)
+
+
+class ScriptedWatcher(BaseWatcher):
+    """
+    Watcher which returns scripted changes.
+    """
+    def __init__(self, *args, **kwargs):
+        self.changes = kwargs.pop("changes")
+        self.timeouts = []
+        super().__init__(*args, **kwargs)
+
+    def wait(self, timeout=None):
+        self.timeouts.append(timeout)
+        return set(self.changes.pop(0))
+
+
+class FailingLibc:
+    """
+    C library whose inotify instances can not watch any directory.
+    """
+    def __init__(self, code):
+        self.code = code
+        self.opened = []
+
+    def inotify_init1(self, flags):
+        fd = os.open(os.devnull, os.O_RDONLY)
+        self.opened.append(fd)
+        return fd
+
+    def inotify_add_watch(self, fd, path, mask):
+        ctypes.set_errno(self.code)
+        return -1
+
+
+def build_tree(basepath, paths):
+    """
+    Create files for given relative paths.
+    """
+    for path in paths:
+        path = basepath / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("<p>Foo</p>\n")
+
+
+def test_watcher_is_source(tmp_path):
+    """
+    Only existing files which would be discovered should be sources.
+    """
+    build_tree(tmp_path, [
+        "index.html", "readme.txt", "node_modules/lib.html", "static/foo.html",
+    ])
+
+    watcher = BaseWatcher(SourceDiscovery(excludes=["static"]), tmp_path)
+
+    assert [
+        name for name in [
+            "index.html", "readme.txt", "node_modules/lib.html", "static/foo.html",
+            "missing.html",
+        ]
+        if watcher.is_source(tmp_path / name)
+    ] == ["index.html"]
+
+    watcher = BaseWatcher(SourceDiscovery(), tmp_path / "readme.txt")
+
+    assert watcher.is_source(tmp_path / "readme.txt") is True
+    assert watcher.is_source(tmp_path / "index.html") is False
+    # Base watcher never detects any change
+    assert watcher.wait(0) == set()
+
+
+def test_watcher_debounce(tmp_path):
+    """
+    Changes should be collected until there is none during debounce delay and only
+    batches with sources should be yielded.
+    """
+    build_tree(tmp_path, ["a.html", "b.html", "c.txt"])
+    a, b, c = [tmp_path / name for name in ["a.html", "b.html", "c.txt"]]
+
+    watcher = ScriptedWatcher(
+        SourceDiscovery(),
+        tmp_path,
+        debounce=0.1,
+        changes=[[b], [a, b], [], [c], [], [a], []],
+    )
+    batches = watcher.watch()
+
+    assert next(batches) == [a, b]
+    assert next(batches) == [a]
+    assert watcher.timeouts == [None, 0.1, 0.1, None, 0.1, None, 0.1]
+
+
+def test_polling_watcher(tmp_path):
+    """
+    Polling should report modified and new sources but not deleted ones.
+    """
+    build_tree(tmp_path, ["a.html", "b.html", "c.html"])
+
+    watcher = PollingWatcher(SourceDiscovery(), tmp_path, interval=0.01)
+
+    assert watcher.wait(0) == set()
+
+    stat = (tmp_path / "a.html").stat()
+    os.utime(tmp_path / "a.html", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    (tmp_path / "b.html").unlink()
+    build_tree(tmp_path, ["sub/d.html", "e.txt"])
+
+    assert watcher.wait(0) == {tmp_path / "a.html", tmp_path / "sub" / "d.html"}
+    assert watcher.wait(0) == set()
+
+
+@pytest.mark.skipif(
+    not InotifyWatcher.is_available(), reason="Platform does not support inotify"
+)
+def test_inotify_watcher(tmp_path):
+    """
+    Kernel notifications should report written files and files from new
+    directories.
+    """
+    build_tree(tmp_path, ["a.html", "node_modules/lib.html"])
+
+    watcher = InotifyWatcher(SourceDiscovery(), tmp_path)
+
+    try:
+        assert sorted(watcher.directories.values()) == [tmp_path]
+        assert watcher.wait(0) == set()
+
+        build_tree(tmp_path, ["a.html", "sub/deep/d.html"])
+
+        changed = set()
+        while True:
+            more = watcher.wait(0.2)
+            if not more:
+                break
+            changed.update(more)
+
+        assert changed == {tmp_path / "a.html", tmp_path / "sub" / "deep" / "d.html"}
+        assert sorted(watcher.directories.values()) == [
+            tmp_path, tmp_path / "sub", tmp_path / "sub" / "deep",
+        ]
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(
+    not InotifyWatcher.is_available(), reason="Platform does not support inotify"
+)
+def test_inotify_watcher_removed_directory(tmp_path):
+    """
+    A directory removed before being watched should be ignored.
+    """
+    watcher = InotifyWatcher(SourceDiscovery(), tmp_path)
+
+    try:
+        watcher.add_watch(tmp_path / "removed")
+        assert sorted(watcher.directories.values()) == [tmp_path]
+    finally:
+        watcher.close()
+
+
+def test_inotify_watcher_failure(tmp_path, monkeypatch, caplog):
+    """
+    A directory which can not be watched should raise an error and the best watcher
+    should then fallback to polling with a warning.
+    """
+    build_tree(tmp_path, ["a.html"])
+
+    libc = FailingLibc(errno.ENOSPC)
+    monkeypatch.setattr(InotifyWatcher, "get_libc", staticmethod(lambda: libc))
+
+    with pytest.raises(OSError) as excinfo:
+        InotifyWatcher(SourceDiscovery(), tmp_path)
+
+    assert excinfo.value.errno == errno.ENOSPC
+
+    # Instance has been closed
+    with pytest.raises(OSError):
+        os.fstat(libc.opened[0])
+
+    caplog.set_level(logging.WARNING, logger="chalumo")
+    watcher = get_watcher(SourceDiscovery(), tmp_path)
+
+    assert isinstance(watcher, PollingWatcher)
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage().startswith(
+        "⚠️ Unable to watch with inotify, fallback to polling:"
+    )
@@ -1,8 +1,14 @@
+import random
 from pathlib import Path
 
 import pytest
 
-from chalumo.diff import SourceDiff
+from chalumo.diff import (
+    DIFF_ENGINES, SourceDiff, get_edit_blocks, get_popular_blocks,
+)
+from chalumo.exceptions import HtmlLinterException
+from chalumo.lines import LineIndex
+from chalumo.stats import Stats
 
 
 class MockedSourceDiff(SourceDiff):
@@ -99,13 +105,14 @@ def test_diff_source(filepath, from_source, to_source, expected_from, expected_t
         ],
     ),
 ])
-def test_diff_run(settings, sourcepath, expected):
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_diff_run(settings, sourcepath, expected, jobs):
     """
     Running diff on sources should output a correct unified diff for changes from
-    rules applications.
+    rules applications, in the same order whatever is the number of jobs.
     """
     # Use pragma tag to limit output
-    differ = MockedSourceDiff(pragma_tag="{# djlint:on #}")
+    differ = MockedSourceDiff(pragma_tag="{# djlint:on #}", jobs=jobs)
 
     basepath = settings.fixtures_path / sourcepath
 
@@ -121,3 +128,207 @@ def test_diff_run(settings, sourcepath, expected):
         output.extend(item.split("\n"))
 
     assert output == expected
+
+
+def test_diff_run_cache(settings, tmp_path):
+    """
+    Sources known as clean from cache should be skipped on the next runs.
+    """
+    basepath = tmp_path / "sources"
+    basepath.mkdir()
+    (basepath / "clean.html").write_text('<p class="foo bar">Clean</p>\n')
+    (basepath / "dirty.html").write_text('<p class="foo  bar">Dirty</p>\n')
+
+    cache_dir = tmp_path / "cache"
+
+    processed = []
+
+    class CountingSourceDiff(MockedSourceDiff):
+        def process_source(self, filepath, source):
+            processed.append(filepath.name)
+            return super().process_source(filepath, source)
+
+    first = CountingSourceDiff(cache_dir=cache_dir)
+    first.run(basepath)
+
+    second = CountingSourceDiff(cache_dir=cache_dir)
+    second.run(basepath)
+
+    # Clean source has been processed only on the first run
+    assert processed == ["clean.html", "dirty.html", "dirty.html"]
+    assert first.mocked_output == second.mocked_output
+    assert len(second.mocked_output) == 1
+
+    # A different configuration does not use the same results
+    other = CountingSourceDiff(cache_dir=cache_dir, enabled_rules=["H050"])
+    other.run(basepath)
+
+    assert processed[3:] == ["clean.html", "dirty.html"]
+
+
+def build_random_source(randomizer, lines):
+    """
+    Build a random source with some dirty attributes, possibly on multiple lines.
+    """
+    words = ["foo", "bar", "ping", " ", "  ", "\n"]
+    source = []
+
+    for i in range(lines):
+        picked = randomizer.random()
+
+        if picked < 0.3:
+            value = "".join([
+                randomizer.choice(words) for i in range(randomizer.randint(0, 6))
+            ])
+            source.append('<div class="{}">Foo</div>\n'.format(value))
+        elif picked < 0.4:
+            source.append("\n")
+        else:
+            source.append("<p>Line {}</p>\n".format(randomizer.randint(0, 3)))
+
+    return "".join(source)
+
+
+@pytest.mark.parametrize("context, sizes, count", [
+    (0, (0, 150), 300),
+    (1, (0, 150), 300),
+    (4, (0, 150), 300),
+    # Large sources where difflib applies its autojunk heuristic
+    (3, (190, 600), 60),
+    (4, (190, 600), 60),
+])
+def test_diff_source_span_conformance(context, sizes, count):
+    """
+    Diff built from edit spans should be exactly the same than the one from difflib.
+    """
+    randomizer = random.Random(42)
+    reference = SourceDiff(diff_engine="difflib", diff_context=context)
+    differ = SourceDiff(diff_context=context)
+
+    for i in range(count):
+        source = build_random_source(randomizer, randomizer.randint(*sizes))
+        if randomizer.random() < 0.3:
+            source = source.rstrip("\n")
+
+        result = differ.process_source(Path("foo.html"), source)
+
+        assert result.edits is not None
+        assert "".join(differ.diff_source(*result, edits=result.edits)) == (
+            "".join(reference.diff_source(*result, edits=result.edits))
+        )
+
+
+def build_template_source(randomizer, lines):
+    """
+    Build a random template source with some popular lines and dirty attributes on
+    lines which are not repeated.
+    """
+    source = []
+
+    for i in range(lines):
+        picked = randomizer.random()
+
+        if picked < 0.1:
+            source.append('<div class=" item-{}  {} ">\n'.format(
+                i, randomizer.choice(["foo", "bar"])
+            ))
+        elif picked < 0.3:
+            source.append("</div>\n")
+        elif picked < 0.4:
+            source.append("\n")
+        else:
+            source.append('<p class="line-{}">Line</p>\n'.format(i))
+
+    return "".join(source)
+
+
+def test_diff_source_span_popular():
+    """
+    Diff built from edit spans on large sources with popular lines should be exactly
+    the same than the one from difflib, without falling back to difflib.
+    """
+    randomizer = random.Random(42)
+    reference = SourceDiff(diff_engine="difflib")
+    differ = SourceDiff()
+
+    for i in range(60):
+        source = build_template_source(randomizer, randomizer.randint(200, 600))
+        result = differ.process_source(Path("foo.html"), source)
+
+        index = LineIndex(source)
+        popular, blocks = get_popular_blocks(
+            index, get_edit_blocks(index, result.edits, margin=0)
+        )
+        assert popular == {"</div>\n", "\n"}
+        assert blocks is not None
+
+        assert "".join(differ.diff_source(*result, edits=result.edits)) == (
+            "".join(reference.diff_source(*result, edits=result.edits))
+        )
+
+
+@pytest.mark.parametrize("engine", DIFF_ENGINES)
+def test_diff_run_engines(settings, engine):
+    """
+    Every diff engine should output the same diff on fixtures.
+    """
+    reference = MockedSourceDiff(diff_engine="difflib")
+    reference.run(settings.fixtures_path)
+
+    differ = MockedSourceDiff(diff_engine=engine)
+    differ.run(settings.fixtures_path)
+
+    assert len(differ.mocked_output) > 0
+    assert differ.mocked_output == reference.mocked_output
+
+
+def test_diff_unknown_engine():
+    """
+    An unknown diff engine should raise an error.
+    """
+    with pytest.raises(HtmlLinterException):
+        SourceDiff(diff_engine="nope")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_diff_run_stats(tmp_path, jobs):
+    """
+    Every phase and counter should be recorded, including from worker processes.
+    """
+    for i in range(3):
+        (tmp_path / "{}.html".format(i)).write_text(
+            '<p class="foo  bar">A</p><p class="foo bar">B</p>\n'
+        )
+
+    stats = Stats()
+    outputs = []
+    differ = SourceDiff(
+        stats=stats, jobs=jobs, cache_dir=None, output_callable=outputs.append,
+    )
+    differ.run(tmp_path)
+
+    assert len(outputs) == 3
+    assert stats.counters == {
+        "files": 3, "bytes": 150, "attributes": 6, "changed": 3,
+    }
+    assert stats.calls["discovery"] == 4
+    for phase in ["read", "preprocess", "substitute", "postprocess", "diff"]:
+        assert stats.calls[phase] == 3
+
+
+def test_diff_run_files(tmp_path):
+    """
+    Only given files should be output, whatever are discovery patterns.
+    """
+    for name in ["a.html", "b.html", "c.txt"]:
+        (tmp_path / name).write_text('<p class="foo  foo">Foo</p>\n')
+
+    outputs = []
+    SourceDiff(output_callable=outputs.append).run_files(
+        [tmp_path / "b.html", tmp_path / "c.txt"]
+    )
+
+    assert [output.splitlines()[0] for output in outputs] == [
+        "--- {}".format(tmp_path / "b.html"),
+        "--- {}".format(tmp_path / "c.txt"),
+    ]
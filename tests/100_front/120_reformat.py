@@ -1,15 +1,20 @@
+import os
 import shutil
+import stat
 
 from pathlib import Path
 
+import pytest
+
 from chalumo.reformat import SourceWriter
 
 
-def test_reformat_run(settings, tmp_path):
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_reformat_run(settings, tmp_path, jobs):
     """
     SourceWriter should rewrite source content with applied rules fixes.
     """
-    formatter = SourceWriter(pragma_tag="{# djlint:on #}")
+    formatter = SourceWriter(pragma_tag="{# djlint:on #}", jobs=jobs)
 
     # Copy sources structure from data fixtures
     source_fixtures_path = settings.fixtures_path / Path("sample_structure/subdir_1")
@@ -53,3 +58,107 @@ def test_reformat_run(settings, tmp_path):
         source = destination_fixtures_path / name
         print(source)
         assert source.read_text() == content
+
+
+def test_reformat_unchanged(tmp_path):
+    """
+    Unchanged sources should not be rewritten at all.
+    """
+    clean = tmp_path / "clean.html"
+    clean.write_text('<p class="foo bar">Clean</p>\n')
+    dirty = tmp_path / "dirty.html"
+    dirty.write_text('<p class="foo  bar">Dirty</p>\n')
+
+    # Set an old modification time to detect any write
+    os.utime(clean, ns=(0, 0))
+    os.utime(dirty, ns=(0, 0))
+
+    formatter = SourceWriter(cache_dir=None)
+
+    assert formatter.write_file(clean) is None
+    assert formatter.write_file(dirty) == dirty
+
+    assert clean.stat().st_mtime_ns == 0
+    assert dirty.stat().st_mtime_ns > 0
+    assert dirty.read_text() == '<p class="foo bar">Dirty</p>\n'
+
+
+def test_reformat_atomic(tmp_path):
+    """
+    Rewritten sources should keep their permissions and no temporary file should be
+    left.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo  bar">Dirty</p>\n')
+    source.chmod(0o640)
+
+    SourceWriter(cache_dir=None).run(tmp_path)
+
+    assert source.read_text() == '<p class="foo bar">Dirty</p>\n'
+    assert stat.S_IMODE(source.stat().st_mode) == 0o640
+    assert [item.name for item in tmp_path.iterdir()] == ["dirty.html"]
+
+
+def test_reformat_symlink(tmp_path):
+    """
+    Rewriting a source through a symbolic link should write its target and keep the
+    link.
+    """
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "templates").mkdir()
+    target = tmp_path / "shared" / "dirty.html"
+    target.write_text('<p class="foo  bar">Dirty</p>\n')
+    link = tmp_path / "templates" / "dirty.html"
+    link.symlink_to(target)
+
+    assert SourceWriter(cache_dir=None).write_file(link) == link
+
+    assert link.is_symlink()
+    assert target.read_text() == '<p class="foo bar">Dirty</p>\n'
+    assert [item.name for item in (tmp_path / "shared").iterdir()] == ["dirty.html"]
+    assert [item.name for item in (tmp_path / "templates").iterdir()] == [
+        "dirty.html"
+    ]
+
+
+def test_reformat_modified_since_read(tmp_path):
+    """
+    A source modified between its read and its write should not be clobbered.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo  bar">Dirty</p>\n')
+
+    class ConcurrentSourceWriter(SourceWriter):
+        def process_source(self, filepath, content):
+            # Simulate another program writing to the file meanwhile
+            filepath.write_text('<p class="ping  pong">Edited</p>\n')
+            return super().process_source(filepath, content)
+
+    formatter = ConcurrentSourceWriter(cache_dir=None)
+
+    assert formatter.write_file(source) is None
+    assert source.read_text() == '<p class="ping  pong">Edited</p>\n'
+
+
+def test_reformat_replaced_since_read(tmp_path):
+    """
+    A source replaced by another file between its read and its write should not be
+    clobbered, even with the same size and modification time.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo  bar">Dirty</p>\n')
+
+    class ConcurrentSourceWriter(SourceWriter):
+        def process_source(self, filepath, content):
+            # Simulate an editor which writes a new file renamed into place
+            other = tmp_path / "other.tmp"
+            other.write_text('<p class="bar  foo">Dirty</p>\n')
+            mtime = filepath.stat().st_mtime_ns
+            os.utime(other, ns=(mtime, mtime))
+            os.replace(other, filepath)
+            return super().process_source(filepath, content)
+
+    formatter = ConcurrentSourceWriter(cache_dir=None)
+
+    assert formatter.write_file(source) is None
+    assert source.read_text() == '<p class="bar  foo">Dirty</p>\n'
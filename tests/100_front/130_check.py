@@ -0,0 +1,89 @@
+import pytest
+
+from chalumo.check import SourceChecker
+
+
+SOURCE = (
+    '<p class="foo  bar">Foo</p>\n'
+    '<div>\n'
+    '    <i class="ping ping">Ping</i><b class="clean">Clean</b>\n'
+    '    <i class=" a\ta  b">Pong</i>\n'
+    '</div>\n'
+)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_check_run(tmp_path, jobs):
+    """
+    Checker should output every violation with its position and return their count.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+    (tmp_path / "clean.html").write_text('<p class="foo bar">Foo</p>\n')
+
+    outputs = []
+    checker = SourceChecker(output_callable=outputs.append, jobs=jobs)
+
+    assert checker.run(tmp_path) == 4
+
+    assert outputs == [
+        "{}:{}".format(tmp_path / "dirty.html", line)
+        for line in [
+            (
+                "1:4: H050 Only a single whitespace separator and no leading or "
+                "trailing whitespace."
+            ),
+            "3:8: H051 No duplicate keyword is allowed.",
+            (
+                "4:8: H050 Only a single whitespace separator and no leading or "
+                "trailing whitespace."
+            ),
+            "4:8: H051 No duplicate keyword is allowed.",
+        ]
+    ]
+
+
+def test_check_fail_fast(tmp_path):
+    """
+    With fail fast enabled, checker should stop at the first violation.
+    """
+    for name in ["a.html", "b.html"]:
+        (tmp_path / name).write_text(SOURCE)
+
+    outputs = []
+    checker = SourceChecker(output_callable=outputs.append, fail_fast=True)
+
+    assert checker.run(tmp_path) == 1
+    assert len(outputs) == 1
+    assert outputs[0].startswith("{}:1:4: H050".format(tmp_path / "a.html"))
+
+
+def test_check_no_fixed_content():
+    """
+    Checker should find violations from edits without rendering fixed content.
+    """
+    checker = SourceChecker()
+
+    result = checker.process_source("/foo", SOURCE)
+    violations = checker.get_violations(result)
+
+    assert [(v.line, v.column, v.code) for v in violations] == [
+        (1, 4, "H050"), (3, 8, "H051"), (4, 8, "H050"), (4, 8, "H051"),
+    ]
+    assert result._fixed is None
+
+
+def test_check_django_tags():
+    """
+    Identical template tags in a value should never be violations.
+    """
+    checker = SourceChecker(compatibility="django", enabled_rules=["H051"])
+
+    result = checker.process_source(
+        "/foo",
+        '<p class="{% if a %}foo{% endif %} {% if a %}bar{% endif %}">\n'
+        '<p class="foo {{ x }} foo">\n'
+    )
+
+    assert [(v.line, v.column, v.code) for v in checker.get_violations(result)] == [
+        (2, 4, "H051"),
+    ]
@@ -0,0 +1,165 @@
+import io
+import json
+
+import pytest
+
+from chalumo.check import SourceChecker
+from chalumo.exceptions import HtmlLinterException
+from chalumo.reporters import JsonLinesReporter, SarifReporter, get_reporter
+
+
+def build_sources(basepath):
+    (basepath / "clean.html").write_text('<p class="foo bar">Foo</p>\n')
+    (basepath / "dirty.html").write_text(
+        '<p class="foo  bar">Foo</p>\n<i class="a a">Bar</i>\n'
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_jsonl_reporter(tmp_path, jobs):
+    """
+    JSON Lines reporter should write a record per violation, per file and a summary.
+    """
+    build_sources(tmp_path)
+
+    stream = io.StringIO()
+    checker = SourceChecker(
+        reporter=JsonLinesReporter(stream), jobs=jobs, cache_dir=None,
+    )
+
+    assert checker.run(tmp_path) == 2
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert [
+        (record["type"], record.get("path"), record.get("code"))
+        for record in records
+    ] == [
+        ("file", str(tmp_path / "clean.html"), None),
+        ("violation", str(tmp_path / "dirty.html"), "H050"),
+        ("violation", str(tmp_path / "dirty.html"), "H051"),
+        ("file", str(tmp_path / "dirty.html"), None),
+        ("summary", None, None),
+    ]
+
+    assert records[2]["line"] == 2
+    assert records[2]["column"] == 4
+    assert records[3]["violations"] == 2
+    assert records[3]["size"] == 51
+    assert records[3]["duration"] > 0
+    assert records[4]["files"] == 2
+    assert records[4]["violations"] == 2
+    assert records[4]["size"] == 78
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_jsonl_reporter_cache(tmp_path, jobs):
+    """
+    Files known as clean from cache should still be reported, so the summary is the
+    same on every run.
+    """
+    basepath = tmp_path / "sources"
+    basepath.mkdir()
+    build_sources(basepath)
+
+    def report():
+        stream = io.StringIO()
+        checker = SourceChecker(
+            reporter=JsonLinesReporter(stream),
+            jobs=jobs,
+            cache_dir=tmp_path / "cache",
+        )
+        checker.run(basepath)
+
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    first = report()
+    second = report()
+
+    assert [
+        (record["path"], record["cached"])
+        for record in second if record["type"] == "file"
+    ] == [
+        (str(basepath / "clean.html"), True),
+        (str(basepath / "dirty.html"), False),
+    ]
+    assert first[0]["cached"] is False
+
+    # Durations are left apart since they change on each run
+    for records in (first, second):
+        del records[-1]["duration"]
+    assert first[-1] == second[-1] == {
+        "type": "summary", "files": 2, "violations": 2, "size": 78,
+    }
+
+
+def test_sarif_reporter(tmp_path):
+    """
+    SARIF reporter should write a valid document with every result and artifact.
+    """
+    build_sources(tmp_path)
+
+    stream = io.StringIO()
+    checker = SourceChecker(
+        reporter=SarifReporter(stream, rules=["H050"]),
+        enabled_rules=["H050"],
+        cache_dir=None,
+    )
+
+    assert checker.run(tmp_path) == 1
+
+    document = json.loads(stream.getvalue())
+    run = document["runs"][0]
+
+    assert document["version"] == "2.1.0"
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == ["H050"]
+    assert run["results"] == [
+        {
+            "ruleId": "H050",
+            "level": "error",
+            "message": {
+                "text": (
+                    "Only a single whitespace separator and no leading or trailing "
+                    "whitespace."
+                ),
+            },
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {
+                        "uri": (tmp_path / "dirty.html").as_posix()
+                    },
+                    "region": {"startLine": 1, "startColumn": 4},
+                },
+            }],
+        },
+    ]
+    assert [
+        (artifact["length"], artifact["properties"]["violations"])
+        for artifact in run["artifacts"]
+    ] == [(27, 0), (51, 1)]
+    assert run["properties"]["files"] == 2
+
+
+def test_sarif_reporter_fail_fast(tmp_path):
+    """
+    Document should be complete even when checking stopped at first violation.
+    """
+    build_sources(tmp_path)
+
+    stream = io.StringIO()
+    checker = SourceChecker(
+        reporter=SarifReporter(stream), fail_fast=True, cache_dir=None,
+    )
+
+    assert checker.run(tmp_path) == 1
+    assert len(json.loads(stream.getvalue())["runs"][0]["results"]) == 1
+
+
+def test_get_reporter():
+    """
+    Reporter should be built from its format name.
+    """
+    assert isinstance(get_reporter("jsonl", io.StringIO()), JsonLinesReporter)
+
+    with pytest.raises(HtmlLinterException):
+        get_reporter("nope", io.StringIO())
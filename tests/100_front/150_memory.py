@@ -0,0 +1,46 @@
+"""
+Memory benchmarks to catch sources being held in memory all at once.
+
+Peak memory allocated while processing a corpus must barely grow with the number of
+files. The budget is the allowed peak for the biggest corpus, it can be changed with
+environment variable ``CHALUMO_MEMORY_BUDGET`` (in megabytes) for other
+environments.
+"""
+import os
+
+import pytest
+
+from benchmarks.corpus import generate_corpus, get_options
+from benchmarks.memory import run_command, trace_peak
+
+
+MEMORY_BUDGET = float(os.environ.get("CHALUMO_MEMORY_BUDGET", "4")) * 1000000
+
+# Numbers of files of measured corpora
+SIZES = [20, 80]
+
+# A small memo is quickly full so it does not grow with corpus anymore
+MEMO_SIZE = 64
+
+
+@pytest.mark.parametrize("command", ["diff", "reformat"])
+def test_memory_peak(tmp_path, command):
+    """
+    Memory peak should grow sublinearly with the number of files and stay in budget.
+    """
+    options = get_options(size=5000)
+
+    # A first run imports lazy modules so their allocations are not measured
+    generate_corpus(tmp_path / "warmup", dict(options, files=2))
+    run_command(command, tmp_path / "warmup", memo_size=MEMO_SIZE)
+
+    peaks = []
+    for count in SIZES:
+        basepath = tmp_path / str(count)
+        generate_corpus(basepath, dict(options, files=count))
+
+        peaks.append(trace_peak(run_command, command, basepath, memo_size=MEMO_SIZE))
+
+    # Corpus is four times bigger but sources are processed one at a time
+    assert peaks[-1] < peaks[0] * 2
+    assert peaks[-1] < MEMORY_BUDGET
@@ -0,0 +1,315 @@
+import json
+import logging
+import socket
+
+import pytest
+
+from chalumo import __version__
+from chalumo.client import connect, forward
+from chalumo.diff import SourceDiff
+from chalumo.exceptions import HtmlLinterException
+from chalumo.rules import get_rules_fingerprint
+from chalumo.server import DaemonServer
+
+
+SOURCE = (
+    '<p class="foo  bar">Foo</p>\n'
+    '<div>\n'
+    '    <i class="ping ping">Ping</i><b class="clean">Clean</b>\n'
+    '</div>\n'
+)
+
+
+def run_forward(server, request, log=None):
+    """
+    Forward a request to the daemon and return its exit code with outputs.
+    """
+    outputs = []
+    errors = []
+
+    code = forward(
+        server.socket_path,
+        dict(request, version=__version__, rules=get_rules_fingerprint()),
+        outputs.append,
+        errors.append,
+        log=log,
+    )
+
+    return code, "".join(outputs), errors
+
+
+def test_forward_no_daemon(tmp_path):
+    """
+    Client should not run anything when no daemon is listening.
+    """
+    request = {"command": "diff", "basepath": str(tmp_path)}
+
+    assert forward(tmp_path / "daemon.sock", request, print, print) is None
+
+
+def test_forward_busy_daemon(tmp_path_factory):
+    """
+    Client should not run anything when daemon does not accept its request in time.
+    """
+    socket_path = tmp_path_factory.mktemp("busy") / "daemon.sock"
+    request = {"command": "diff", "basepath": str(socket_path.parent)}
+
+    # A listening socket which never answers, like a daemon busy with another run
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+
+        assert forward(socket_path, request, print, print, timeout=0.1) is None
+
+
+def test_connect_not_allowed(tmp_path, monkeypatch):
+    """
+    Client should consider there is no daemon when it is not allowed to connect.
+    """
+    class ForbiddenSocket:
+        def __init__(self, *args):
+            self.closed = False
+
+        def settimeout(self, timeout):
+            pass
+
+        def connect(self, address):
+            raise PermissionError(address)
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(socket, "socket", ForbiddenSocket)
+
+    assert connect(tmp_path / "daemon.sock") is None
+
+
+def test_daemon_diff(tmp_path, daemon):
+    """
+    Daemon should output the same diff than a run in current process and reuse its
+    configured instance with its warm memo for next runs with same options.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+    (tmp_path / "clean.html").write_text('<p class="foo bar">Foo</p>\n')
+
+    outputs = []
+    SourceDiff(output_callable=outputs.append).run(tmp_path)
+
+    request = {
+        "command": "diff",
+        "basepath": str(tmp_path),
+        "options": {"compatibility": "html"},
+    }
+
+    code, output, errors = run_forward(daemon, request)
+
+    assert code == 0
+    assert errors == []
+    assert output == "".join([item + "\n" for item in outputs])
+
+    assert run_forward(daemon, request)[1] == output
+
+    assert len(daemon.instances) == 1
+    instance = list(daemon.instances.values())[0]
+    assert instance.normalize_value.cache_info().hits > 0
+
+
+def test_daemon_check(tmp_path, daemon):
+    """
+    Daemon should run checks with the requested report and return the exit code.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+
+    request = {"command": "check", "basepath": str(tmp_path)}
+
+    code, output, errors = run_forward(daemon, request)
+
+    assert code == 1
+    assert output.splitlines() == [
+        (
+            "{}:1:4: H050 Only a single whitespace separator and no leading or "
+            "trailing whitespace."
+        ).format(tmp_path / "dirty.html"),
+        "{}:3:8: H051 No duplicate keyword is allowed.".format(
+            tmp_path / "dirty.html"
+        ),
+    ]
+
+    report = tmp_path / "report.jsonl"
+    code, output, errors = run_forward(daemon, dict(
+        request, format="jsonl", output=str(report), stats="json",
+    ))
+
+    assert code == 1
+    assert output == ""
+    records = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [record["type"] for record in records] == [
+        "violation", "violation", "file", "summary"
+    ]
+    # Statistics are output on standard error
+    assert json.loads(errors[0])["counters"]["files"] == 1
+
+    (tmp_path / "dirty.html").write_text('<p class="foo bar">Foo</p>\n')
+
+    assert run_forward(daemon, request)[:2] == (0, "")
+
+
+def test_daemon_reformat_pool(tmp_path, daemon):
+    """
+    Daemon should rewrite sources and keep the pool of processes between runs.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+
+    request = {
+        "command": "reformat",
+        "basepath": str(tmp_path),
+        "options": {"jobs": 2},
+    }
+
+    assert run_forward(daemon, request)[:2] == (0, "")
+    assert (tmp_path / "dirty.html").read_text() == (
+        '<p class="foo bar">Foo</p>\n'
+        '<div>\n'
+        '    <i class="ping">Ping</i><b class="clean">Clean</b>\n'
+        '</div>\n'
+    )
+
+    instance = list(daemon.instances.values())[0]
+    executor = instance.executor
+    assert executor is not None
+
+    (tmp_path / "dirty.html").write_text(SOURCE)
+    assert run_forward(daemon, request)[0] == 0
+    assert instance.executor is executor
+    assert "ping ping" not in (tmp_path / "dirty.html").read_text()
+
+
+def test_daemon_client_cwd(tmp_path, monkeypatch, daemon):
+    """
+    Daemon should resolve relative paths from each client working directory, even
+    from the worker processes of a pool started for another client.
+    """
+    request = {
+        "command": "reformat",
+        "basepath": "templates",
+        "options": {"jobs": 2},
+    }
+
+    for name in ("foo", "bar"):
+        (tmp_path / name / "templates").mkdir(parents=True)
+        (tmp_path / name / "templates" / "dirty.html").write_text(SOURCE)
+        (tmp_path / name / "templates" / "other.html").write_text(SOURCE)
+
+    for name in ("foo", "bar"):
+        monkeypatch.chdir(tmp_path / name)
+        assert run_forward(daemon, request)[:2] == (0, "")
+
+    assert len(daemon.instances) == 1
+
+    for name in ("foo", "bar"):
+        for filename in ("dirty.html", "other.html"):
+            source = tmp_path / name / "templates" / filename
+            assert "ping ping" not in source.read_text()
+
+
+def test_daemon_error(tmp_path, daemon):
+    """
+    Daemon should report a failed run and keep serving.
+    """
+    code, output, errors = run_forward(
+        daemon, {"command": "nope", "basepath": str(tmp_path)}
+    )
+
+    assert code == 1
+    assert errors == ["Unknown daemon command: nope"]
+
+    code, output, errors = run_forward(
+        daemon, {"command": "diff", "basepath": str(tmp_path)}
+    )
+
+    assert (code, errors) == (0, [])
+
+
+def test_daemon_refused(tmp_path, daemon):
+    """
+    Daemon should refuse to run a request from a client with another version or
+    other rules.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+
+    request = {
+        "command": "diff",
+        "basepath": str(tmp_path),
+        "version": __version__,
+        "rules": get_rules_fingerprint(),
+    }
+
+    for mismatch in [{"version": "0.0.0"}, {"rules": "nope"}, {"version": None}]:
+        outputs = []
+        assert forward(
+            daemon.socket_path, dict(request, **mismatch), outputs.append, print
+        ) is None
+        assert outputs == []
+
+    assert daemon.instances == {}
+
+
+@pytest.mark.parametrize("log_level, expected", [
+    (logging.INFO, True),
+    (logging.WARNING, False),
+])
+def test_daemon_logs(tmp_path, daemon, log_level, expected):
+    """
+    Daemon should send the log records of a run down to the client verbosity.
+    """
+    (tmp_path / "dirty.html").write_text(SOURCE)
+
+    records = []
+    code, output, errors = run_forward(
+        daemon,
+        {"command": "diff", "basepath": str(tmp_path), "log_level": log_level},
+        log=lambda level, message: records.append((level, message)),
+    )
+
+    assert code == 0
+    assert output != ""
+    assert errors == []
+    assert (
+        (logging.INFO, "🚀 Processing: {}".format(tmp_path / "dirty.html"))
+        in records
+    ) is expected
+
+    # Daemon logger is restored after the run
+    assert daemon.log.handlers == [
+        handler for handler in daemon.log.handlers
+        if handler.__class__.__name__ != "LogForwarder"
+    ]
+
+
+def test_daemon_instances(tmp_path):
+    """
+    Least recently used instance should be closed when there are too many of them.
+    """
+    server = DaemonServer(tmp_path / "daemon.sock", max_instances=2)
+
+    diff = server.get_instance("diff", {})
+    check = server.get_instance("check", {})
+
+    assert server.get_instance("diff", {}) is diff
+    assert server.get_instance("diff", {}, stats=True) is not diff
+
+    assert list(server.instances.values())[0] is diff
+    assert check not in server.instances.values()
+
+    with pytest.raises(HtmlLinterException):
+        server.get_instance("nope", {})
+
+
+def test_daemon_already_running(daemon):
+    """
+    A second daemon should not replace a daemon which is listening.
+    """
+    with pytest.raises(HtmlLinterException):
+        DaemonServer(daemon.socket_path).serve()
+
+    assert daemon.socket_path.exists()
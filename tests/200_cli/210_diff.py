@@ -3,6 +3,7 @@ NOTE:
     The diff command is used to test the common shared options so that other commands
     do no test them again.
 """
+import json
 import logging
 import shutil
 from pathlib import Path
@@ -311,3 +312,167 @@ def test_cli_diff_pattern(caplog, settings):
         expected = [item.format(basepath) for item in expected]
 
         assert result.output == "\n".join(expected)
+
+
+def test_cli_diff_exclude(caplog, settings):
+    """
+    Command should discover sources from many patterns and without excluded paths.
+    """
+    sources_path = settings.fixtures_path / Path("sample_structure/subdir_2")
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        basepath = Path.cwd() / Path("subdir_2")
+        shutil.copytree(sources_path, basepath)
+
+        result = runner.invoke(cli_frontend, [
+            "--verbose", "0",
+            "diff",
+            str(basepath),
+            "--pattern", "**/*.txt",
+            "--pattern", "**/*.html",
+            "--exclude", "subdir_2_1",
+        ])
+
+        assert result.exit_code == 0
+
+        headers = [
+            line for line in result.output.splitlines() if line.startswith("--- ")
+        ]
+
+        assert headers == [
+            "--- {}/not_html.txt".format(basepath),
+            "--- {}/notag_zip.html".format(basepath),
+        ]
+
+
+def test_cli_diff_jobs(caplog, settings):
+    """
+    Command should output the same diff in the same order with many jobs.
+    """
+    sources_path = settings.fixtures_path / Path("sample_structure/subdir_1")
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        basepath = Path.cwd() / Path("subdir_1")
+        shutil.copytree(sources_path, basepath)
+
+        single = runner.invoke(cli_frontend, [
+            "--verbose", "0",
+            "diff",
+            str(basepath),
+        ])
+
+        parallel = runner.invoke(cli_frontend, [
+            "--verbose", "0",
+            "diff",
+            "--jobs", "3",
+            str(basepath),
+        ])
+
+        assert single.exit_code == 0
+        assert parallel.exit_code == 0
+
+        assert parallel.output == single.output
+        assert parallel.output.startswith(
+            "--- {}/notag_ping.html".format(basepath)
+        )
+
+
+def test_cli_diff_cache(caplog, tmp_path):
+    """
+    Command should store clean sources in given cache directory except when cache is
+    disabled.
+    """
+    cache_dir = tmp_path / "cache"
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        basepath = Path.cwd() / Path("sources")
+        basepath.mkdir()
+        (basepath / "clean.html").write_text('<p class="foo bar">Clean</p>')
+        (basepath / "dirty.html").write_text('<p class="foo  bar">Dirty</p>')
+
+        result = runner.invoke(cli_frontend, [
+            "--verbose", "0",
+            "diff",
+            "--no-cache",
+            "--cache-dir", str(cache_dir),
+            str(basepath),
+        ])
+
+        assert result.exit_code == 0
+        assert cache_dir.exists() is False
+
+        result = runner.invoke(cli_frontend, [
+            "--verbose", "0",
+            "diff",
+            "--cache-dir", str(cache_dir),
+            str(basepath),
+        ])
+
+        assert result.exit_code == 0
+        # Only the clean source is stored
+        assert len(list(cache_dir.glob("*/*"))) == 1
+
+
+def test_cli_diff_stats(tmp_path):
+    """
+    Statistics should be output on standard error in the required format.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo  bar">Dirty</p>\n')
+
+    runner = CliRunner()
+
+    result = runner.invoke(cli_frontend, [
+        "--verbose", "0", "diff", "--no-cache", "--stats", "json", str(source),
+    ])
+
+    assert result.exit_code == 0
+    assert result.stdout.startswith("--- ")
+    assert json.loads(result.stderr)["counters"] == {
+        "files": 1, "bytes": 30, "attributes": 1, "changed": 1,
+    }
+
+    result = runner.invoke(cli_frontend, [
+        "--verbose", "0", "diff", "--no-cache", "--stats", "table", str(source),
+    ])
+
+    assert result.exit_code == 0
+    assert result.stderr.splitlines()[0].split() == ["Phase", "Calls", "Time", "Share"]
+
+
+def test_cli_diff_watch(tmp_path, monkeypatch):
+    """
+    With watch mode, command should run on every source then again on each batch of
+    changed sources until interrupted.
+    """
+    from chalumo import watcher
+
+    source = tmp_path / "foo.html"
+    source.write_text('<p class="foo  foo">Foo</p>\n')
+
+    class FakeWatcher(watcher.BaseWatcher):
+        def watch(self):
+            source.write_text('<p class="bar  bar">Bar</p>\n')
+            yield [source]
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(
+        watcher, "get_watcher", lambda *args, **kwargs: FakeWatcher(*args)
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli_frontend,
+        ["--verbose", "0", "diff", "--no-cache", "--watch", str(tmp_path)],
+    )
+
+    assert result.exit_code == 0
+    assert [
+        line for line in result.output.splitlines() if line.startswith("-<p")
+    ] == [
+        '-<p class="foo  foo">Foo</p>',
+        '-<p class="bar  bar">Bar</p>',
+    ]
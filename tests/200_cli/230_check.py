@@ -0,0 +1,61 @@
+import json
+
+from click.testing import CliRunner
+
+from chalumo.cli.entrypoint import cli_frontend
+
+
+def test_cli_check(tmp_path):
+    """
+    Command should output violations and exit with an error code when there is any.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo">Clean</p>\n<p class="foo  foo">Dirty</p>\n')
+
+    runner = CliRunner()
+    command = ["--verbose", "0", "check", "--no-cache"]
+
+    result = runner.invoke(cli_frontend, command + [str(source)])
+
+    assert result.exit_code == 1
+    assert result.output.splitlines() == [
+        (
+            "{}:2:4: H050 Only a single whitespace separator and no leading or "
+            "trailing whitespace."
+        ).format(source),
+        "{}:2:4: H051 No duplicate keyword is allowed.".format(source),
+    ]
+
+    result = runner.invoke(cli_frontend, command + ["--fail-fast", str(source)])
+
+    assert result.exit_code == 1
+    assert len(result.output.splitlines()) == 1
+
+    source.write_text('<p class="foo">Clean</p>\n')
+
+    result = runner.invoke(cli_frontend, command + [str(source)])
+
+    assert result.exit_code == 0
+    assert result.output == ""
+
+
+def test_cli_check_report(tmp_path):
+    """
+    Command should write the report in the given format to the output file.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text('<p class="foo  foo">Dirty</p>\n')
+    report = tmp_path / "report.jsonl"
+
+    runner = CliRunner()
+
+    result = runner.invoke(cli_frontend, [
+        "--verbose", "0", "check", "--no-cache", "--format", "jsonl",
+        "--output", str(report), str(source),
+    ])
+
+    assert result.exit_code == 1
+    assert result.output == ""
+    assert [
+        json.loads(line)["type"] for line in report.read_text().splitlines()
+    ] == ["violation", "violation", "file", "summary"]
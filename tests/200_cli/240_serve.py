@@ -0,0 +1,96 @@
+import logging
+import threading
+
+from click.testing import CliRunner
+
+from chalumo.cli.entrypoint import cli_frontend
+
+
+SOURCE = '<p class="foo">Clean</p>\n<p class="foo  foo">Dirty</p>\n'
+
+
+def test_cli_forward(tmp_path, daemon):
+    """
+    Commands should forward their run to a listening daemon and output the same
+    thing than a run in current process.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text(SOURCE)
+
+    runner = CliRunner()
+    base = ["--verbose", "0"]
+    options = ["--no-cache", "--socket", str(daemon.socket_path), str(source)]
+
+    for command, exit_code in [("diff", 0), ("check", 1)]:
+        local = runner.invoke(
+            cli_frontend, base + [command, "--no-daemon"] + options
+        )
+        forwarded = runner.invoke(cli_frontend, base + [command] + options)
+
+        assert forwarded.exit_code == local.exit_code == exit_code
+        assert forwarded.output == local.output
+        assert forwarded.output != ""
+
+    assert len(daemon.instances) == 2
+
+    result = runner.invoke(cli_frontend, base + ["reformat"] + options)
+
+    assert result.exit_code == 0
+    assert source.read_text() == '<p class="foo">Clean</p>\n<p class="foo">Dirty</p>\n'
+
+
+def test_cli_fallback(tmp_path):
+    """
+    Commands should run in current process when no daemon is listening and stopping
+    a daemon which is not listening does nothing.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text(SOURCE)
+
+    runner = CliRunner()
+    socket = ["--socket", str(tmp_path / "daemon.sock")]
+
+    result = runner.invoke(
+        cli_frontend,
+        ["--verbose", "0", "check", "--no-cache"] + socket + [str(source)],
+    )
+
+    assert result.exit_code == 1
+    assert len(result.output.splitlines()) == 2
+
+    result = runner.invoke(cli_frontend, ["--verbose", "0", "serve", "--stop"] + socket)
+
+    assert result.exit_code == 0
+
+
+def test_cli_forward_logs(tmp_path, daemon, caplog):
+    """
+    Log records of a forwarded run should be emitted by the client like the ones of
+    a run in current process.
+    """
+    source = tmp_path / "dirty.html"
+    source.write_text(SOURCE)
+
+    runner = CliRunner()
+    options = ["--no-cache", "--socket", str(daemon.socket_path), str(source)]
+
+    def client_records():
+        # Daemon thread records are left apart, only client ones reach its stderr
+        records = [
+            (record.levelno, record.getMessage()) for record in caplog.records
+            if record.thread == threading.get_ident()
+        ]
+        caplog.clear()
+        return records
+
+    caplog.set_level(logging.INFO, logger="chalumo")
+    runner.invoke(cli_frontend, ["diff", "--no-daemon"] + options)
+    local = client_records()
+
+    result = runner.invoke(cli_frontend, ["diff"] + options)
+    forwarded = client_records()
+
+    assert result.exit_code == 0
+    processing = (logging.INFO, "🚀 Processing: {}".format(source))
+    assert processing in local
+    assert processing in forwarded
@@ -0,0 +1,93 @@
+"""
+Startup benchmarks to catch regressions on command startup cost.
+
+The time budget is the allowed overhead of a cold command over a bare interpreter
+startup, it can be changed with environment variable ``CHALUMO_STARTUP_BUDGET`` (in
+seconds) for slow environments.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+STARTUP_BUDGET = float(os.environ.get("CHALUMO_STARTUP_BUDGET", "0.5"))
+
+# Modules which must never be imported for the benchmarked commands
+FORBIDDEN_MODULES = ["django", "pkg_resources", "setuptools"]
+
+SCRIPT = """
+import json
+import sys
+
+from chalumo.cli.entrypoint import cli_frontend
+
+try:
+    cli_frontend(sys.argv[2:])
+except SystemExit:
+    pass
+
+with open(sys.argv[1], "w") as fp:
+    json.dump(sorted(sys.modules), fp)
+"""
+
+
+def run_cold(settings, modules_path, *args):
+    """
+    Run a command in a new interpreter and return its duration.
+    """
+    env = dict(os.environ, PYTHONPATH=str(settings.package_path))
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", SCRIPT, str(modules_path)] + list(args),
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+    return time.perf_counter() - start
+
+
+def bare_startup():
+    """
+    Return the duration of a bare interpreter startup.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+
+    return time.perf_counter() - start
+
+
+@pytest.mark.parametrize("args", [
+    ["version"],
+    ["--verbose", "0", "diff", "--no-cache", "{FIXTURES}/sample_structure/basic.html"],
+    [
+        "--verbose", "0", "diff", "--no-cache", "--profile", "django",
+        "{FIXTURES}/sample_structure/basic.html",
+    ],
+])
+def test_cold_startup(settings, tmp_path, args):
+    """
+    Cold command should not import heavy modules and stay in startup time budget.
+    """
+    args = [settings.format(item) for item in args]
+    modules_path = tmp_path / "modules.json"
+
+    # Keep the best of some runs to reduce noise
+    overhead = min([
+        run_cold(settings, modules_path, *args) - bare_startup()
+        for i in range(3)
+    ])
+
+    modules = json.loads(modules_path.read_text())
+    imported = [
+        name for name in modules
+        if name.split(".")[0] in FORBIDDEN_MODULES
+    ]
+
+    assert imported == []
+    assert overhead < STARTUP_BUDGET
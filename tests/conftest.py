@@ -1,6 +1,8 @@
 """
 Pytest fixtures
 """
+import threading
+import time
 from pathlib import Path
 
 import pytest
@@ -54,6 +56,15 @@ class FixturesSettingsTestMixin(object):
         )
 
 
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path_factory, monkeypatch):
+    """
+    Point the user cache directory to a temporary directory so tests never use or
+    pollute the real user cache.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("user_cache")))
+
+
 @pytest.fixture(scope="function")
 def temp_builds_dir(tmp_path):
     """
@@ -77,3 +88,33 @@ def settings():
                 print(settings.format("Application version: {VERSION}"))
     """
     return FixturesSettingsTestMixin()
+
+
+@pytest.fixture(scope="function")
+def daemon(tmp_path_factory):
+    """
+    Start a daemon server in a thread and return it, it is stopped at the end of test.
+
+    Socket lives in a short temporary directory since socket paths are limited to
+    about a hundred characters.
+    """
+    from chalumo.client import forward
+    from chalumo.server import DaemonServer
+
+    server = DaemonServer(tmp_path_factory.mktemp("daemon") / "daemon.sock")
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while not server.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    yield server
+
+    forward(
+        server.socket_path,
+        {"command": "shutdown"},
+        write=lambda text: None,
+        write_error=lambda text: None,
+    )
+    thread.join(5)